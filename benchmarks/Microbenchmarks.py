@@ -0,0 +1,293 @@
+"""
+Microbenchmarks of the hot paths of the mapping, planning and rendering code, on synthetic maps of several sizes.
+For each function and grid size, reports the per-call latency, the peak memory allocated during a call
+and how the latency scales with the number of squares. Results can be saved as a JSON baseline and compared
+with a previous one.
+
+Usage (from the benchmarks directory):
+    python3 Microbenchmarks.py [--sizes 100 300 1000] [--save baseline.json] [--compare baseline.json]
+    python3 Microbenchmarks.py --startup
+"""
+
+import sys
+sys.path.append("../src/")
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from math import log
+from Cartographer import Cartographer
+from PlanningModule import PlanningModule
+from Navigator import Navigator
+from Controller import Controller
+from SimWorld import SimWorld
+from SimRobot import SimRobot
+from robot import Snapshot
+from MapRenderer import HEADLESS, SAVE_ONLY
+
+# Cartographer.CELL_SIZE, needed before building the cartographer
+CELL_SIZE = 0.3
+
+
+class Scene:
+    """
+    A synthetic warehouse of size x size squares, partially explored, with recorded scans to replay
+    """
+    def __init__(self, size, explored=0.5, scanCount=20, seed=0):
+        random.seed(seed)
+        self.size = size
+        extent = size * CELL_SIZE
+        self.world = SimWorld.warehouse(width=extent, height=extent)
+        # rendering is measured separately
+        self.cartographer = Cartographer(-extent / 2, extent / 2, -extent / 2, extent / 2, HEADLESS)
+        controller = Controller(self.cartographer)
+        self.navigator = Navigator(controller, self.cartographer)
+        self.planningModule = PlanningModule(self.cartographer, self.navigator, controller)
+
+        # Scan from a lattice of positions covering the explored part of the warehouse
+        robot = SimRobot(self.world)
+        spacing = self.cartographer.LASER_MAX_DISTANCE * 0.8
+        for x in np.arange(-extent / 2 + 2, -extent / 2 + extent * explored, spacing):
+            for y in np.arange(-extent / 2 + 2, extent / 2 - 2, spacing):
+                if self.moveTo(x, y):
+                    self.cartographer.update(robot)
+        self.planningModule.pickDestination(self.snapshot())
+        # Scans replayed by the benchmarks, taken from random free positions of the explored part
+        self.scans = []
+        while len(self.scans) < scanCount:
+            if self.moveTo(random.uniform(-extent / 2, -extent / 2 + extent * explored),
+                           random.uniform(-extent / 2, extent / 2), random.uniform(-np.pi, np.pi)):
+                self.scans.append(self.snapshot())
+
+    def moveTo(self, x, y, heading=0):
+        """Teleports the robot, returns False if the position is not free"""
+        if self.world.isColliding(x, y):
+            return False
+        self.world.x, self.world.y, self.world.heading = x, y, heading
+        return True
+
+    def snapshot(self):
+        return Snapshot(self.world.time, self.world.getPose(), self.world.getLaser(), self.world.laserAngles.tolist())
+
+    def getFreeSquares(self):
+        free = (self.cartographer.getStates() == self.cartographer.EMPTY) & ~self.cartographer.getBlocked()
+        rows, cols = np.nonzero(free)
+        return list(zip(rows.tolist(), cols.tolist()))
+
+
+def getBenchmarks(scene):
+    """
+    :return: a dictionary name -> function running one call, given the call number
+    """
+    cartographer = scene.cartographer
+    freeSquares = scene.getFreeSquares()
+    destinations = [random.choice(freeSquares) for _ in range(len(scene.scans))]
+
+    def scan(i):
+        return scene.scans[i % len(scene.scans)]
+
+    def configurationSpace(i):
+        position = scan(i).getPosition()
+        cartographer.updateConfigurationSpace(cartographer.getWindow(position, cartographer.LASER_MAX_DISTANCE))
+
+    def pickDestination(i):
+        cartographer.update(scan(i))
+        scene.planningModule.pickDestination(scan(i))
+
+    def updatePyramid(i):
+        position = scan(i).getPosition()
+        cartographer.pyramid.updateWindow(cartographer.getWindow(position, cartographer.LASER_MAX_DISTANCE))
+
+    def updateMap(i):
+        renderer = scene.renderer
+        row, col = cartographer.getGridPosition(scan(i).getPosition())
+        renderer.updateMap(cartographer.map, cartographer.MAXVALUE, row, col)
+
+    return {
+        'Cartographer.update': lambda i: cartographer.update(scan(i)),
+        'Cartographer.handleLasers': lambda i: cartographer.handleLasers(scan(i)),
+        'Cartographer.updateConfigurationSpace': configurationSpace,
+        'MapPyramid.updateWindow': updatePyramid,
+        'PlanningModule.getBorders': lambda i: scene.planningModule.getBorders(scan(i)),
+        'PlanningModule.pickDestination': pickDestination,
+        'Navigator.computePath': lambda i: scene.navigator.computePath(scan(i), destinations[i % len(destinations)]),
+        # a new destination at each call : the search starts over
+        'Navigator.repairPath': lambda i: scene.navigator.repairPath(scan(i), destinations[i % len(destinations)]),
+        'ShowMap.updateMap': updateMap,
+    }
+
+
+def measure(function, minCalls, budget):
+    """
+    Calls function at least minCalls times, and until budget seconds are spent
+    :return: the list of the latencies (seconds)
+    """
+    latencies = []
+    start = time.perf_counter()
+    while len(latencies) < minCalls or time.perf_counter() - start < budget:
+        callStart = time.perf_counter()
+        function(len(latencies))
+        latencies.append(time.perf_counter() - callStart)
+        if len(latencies) >= 1000:
+            break
+    return latencies
+
+
+def measurePeakMemory(function):
+    """
+    :return: the peak memory (bytes) allocated by one call
+    """
+    tracemalloc.start()
+    function(0)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def getScaling(results, sizes):
+    """
+    :return: for each benchmark, the exponent k of latency ~ squares^k between consecutive grid sizes
+    """
+    scaling = {}
+    for name, bySize in results.items():
+        exponents = []
+        for small, large in zip(sizes, sizes[1:]):
+            ratio = bySize[str(large)]['median'] / bySize[str(small)]['median']
+            exponents.append(round(log(ratio) / log((large / small) ** 2), 2))
+        scaling[name] = exponents
+    return scaling
+
+
+def getRevision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes, minCalls, budget, only=None):
+    import matplotlib
+    matplotlib.use('Agg')
+    from show_map import ShowMap
+
+    results = {}
+    # the images saved by the renderer do not end up in the working directory
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            start = time.perf_counter()
+            scene = Scene(size)
+            scene.renderer = ShowMap(size, size, False, maxFrameRate=None, mapName=os.path.join(directory, 'map.png'))
+            print("%d x %d map built in %.1f s" % (size, size, time.perf_counter() - start))
+            for name, function in getBenchmarks(scene).items():
+                if only and not any(word in name for word in only):
+                    continue
+                latencies = measure(function, minCalls, budget)
+                peak = measurePeakMemory(function)
+                results.setdefault(name, {})[str(size)] = {
+                    'calls': len(latencies), 'median': float(np.median(latencies)), 'mean': float(np.mean(latencies)),
+                    'min': float(np.min(latencies)), 'max': float(np.max(latencies)), 'peakMemory': peak}
+                print("  %-40s %10.3f ms  (min %.3f, %d calls)  peak %8.1f kB"
+                      % (name, np.median(latencies) * 1000, np.min(latencies) * 1000, len(latencies), peak / 1024))
+            scene.renderer.close()
+    return {'revision': getRevision(), 'python': platform.python_version(), 'numpy': np.__version__,
+            'sizes': sizes, 'results': results, 'scaling': getScaling(results, sizes)}
+
+
+# Run in a fresh interpreter : time and memory needed to build the cartographer and show the first map
+STARTUP = """
+import json, resource, sys, time
+start = time.perf_counter()
+sys.path.append(%r)
+from Cartographer import Cartographer
+cartographer = Cartographer(-22, 22, -17, 17, %d)
+cartographer.showMap.updateMap(cartographer.map, cartographer.MAXVALUE, 0, 0)
+ready = time.perf_counter() - start
+cartographer.showMap.close()
+print(json.dumps({'ready': ready, 'closed': time.perf_counter() - start,
+                  'memory': (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                             + resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) * 1024,
+                  'matplotlib': 'matplotlib' in sys.modules}))
+"""
+
+
+def measureStartup(showGUI, repeat=3):
+    """
+    :return: the median time until the first map update is done, the median time until the map is saved and
+    closed, the peak memory of the processes (bytes) and whether matplotlib was imported by the mapping process
+    """
+    source = os.path.abspath("../src/")
+    runs = []
+    with tempfile.TemporaryDirectory() as directory:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output = subprocess.check_output([sys.executable, '-c', STARTUP % (source, showGUI)], cwd=directory)
+            result = json.loads(output.decode().strip().splitlines()[-1])
+            result['process'] = time.perf_counter() - start
+            runs.append(result)
+    return {key: float(np.median([run[key] for run in runs])) for key in ('ready', 'closed', 'process', 'memory')} \
+        | {'matplotlib': runs[0]['matplotlib']}
+
+
+def compare(report, baseline, threshold):
+    """
+    Prints the latency ratio of every benchmark with respect to the baseline
+    :return: the number of regressions (ratio above 1 + threshold)
+    """
+    regressions = 0
+    print("\nComparison with baseline %s (median latency ratio)" % baseline.get('revision'))
+    for name, bySize in report['results'].items():
+        for size, result in bySize.items():
+            reference = baseline['results'].get(name, {}).get(size)
+            if reference is None:
+                continue
+            ratio = result['median'] / reference['median']
+            flag = ''
+            if ratio > 1 + threshold:
+                flag = '  REGRESSION'
+                regressions += 1
+            print("  %-40s %5s  x%.2f%s" % (name, size, ratio, flag))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 300, 1000], help='grid sizes (squares per side)')
+    parser.add_argument('--calls', type=int, default=3, help='minimum number of calls per benchmark')
+    parser.add_argument('--budget', type=float, default=1, help='seconds spent at least on each benchmark')
+    parser.add_argument('--only', nargs='+', help='only run the benchmarks whose name contains one of these words')
+    parser.add_argument('--save', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='JSON baseline to compare with')
+    parser.add_argument('--threshold', type=float, default=0.2, help='relative slowdown reported as a regression')
+    parser.add_argument('--startup', action='store_true', help='only measure the startup of each rendering mode')
+    args = parser.parse_args()
+
+    if args.startup:
+        for name, showGUI in (('headless', HEADLESS), ('save only', SAVE_ONLY)):
+            result = measureStartup(showGUI)
+            print("%-10s first map after %6.0f ms, closed after %6.0f ms, process %6.0f ms, peak memory %6.1f MB%s"
+                  % (name, result['ready'] * 1000, result['closed'] * 1000, result['process'] * 1000,
+                     result['memory'] / 2 ** 20, ', imports matplotlib' if result['matplotlib'] else ''))
+        return
+
+    report = run(args.sizes, args.calls, args.budget, args.only)
+    print("\nScaling exponents (latency ~ squares^k) between consecutive sizes:")
+    for name, exponents in report['scaling'].items():
+        print("  %-40s %s" % (name, exponents))
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(report, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if compare(report, baseline, args.threshold) > 0:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+End-to-end exploration scenarios : the whole pipeline of Main.py (Cartographer, PlanningModule, Navigator and
+Controller) explores reference worlds with an in-process simulated robot on a virtual clock.
+For each run, records the explored area over (simulated) time, the distance travelled, the number of planning
+calls, the CPU time spent in each subsystem, the timing of the control loop and the accuracy of the final map
+against the ground truth.
+
+Usage (from the benchmarks directory):
+    python3 Scenarios.py [--worlds corridors hall racks] [--seeds 0 1 2] [--time-limit 1800] [--output report.json]
+"""
+
+import sys
+sys.path.append("../src/")
+import argparse
+import json
+import random
+import time
+import numpy as np
+from Cartographer import Cartographer
+from SimWorld import SimWorld
+from SimRobot import SimRobot
+from Clock import VirtualClock
+from Main import buildModules, explore
+from MapRenderer import HEADLESS
+from Microbenchmarks import getRevision
+
+
+def corridors(resolution=0.1):
+    """Office-like floor : a spine corridor with dead-end corridors branching from it, and a loop"""
+    width, height = 40, 30
+    occupied = np.ones((int(width / resolution), int(height / resolution)), dtype=bool)
+
+    def carve(x1, y1, x2, y2):
+        occupied[int(x1 / resolution):int(x2 / resolution), int(y1 / resolution):int(y2 / resolution)] = False
+
+    carve(2, 2, 5, 28)
+    for y in (3, 10, 17, 24):
+        carve(2, y, 38, y + 2.5)
+    carve(35.5, 3, 38, 12.5)
+    carve(20, 17, 22.5, 26.5)
+    return SimWorld(occupied, resolution, (-width / 2, -height / 2), (-16.5, -15 + 4.2, 0))
+
+
+def hall(resolution=0.1):
+    """Open hall with a grid of pillars"""
+    width, height = 40, 30
+    occupied = np.zeros((int(width / resolution), int(height / resolution)), dtype=bool)
+    wall = int(0.3 / resolution)
+    occupied[:wall, :] = occupied[-wall:, :] = True
+    occupied[:, :wall] = occupied[:, -wall:] = True
+    pillar = int(0.6 / resolution)
+    for x in np.arange(6, width, 6):
+        for y in np.arange(6, height, 6):
+            row, col = int(x / resolution), int(y / resolution)
+            occupied[row:row + pillar, col:col + pillar] = True
+    return SimWorld(occupied, resolution, (-width / 2, -height / 2), (1.5, 1.5, 0))
+
+
+def racks(resolution=0.1):
+    """Warehouse with rack aisles (see SimWorld.warehouse)"""
+    return SimWorld.warehouse(resolution=resolution, pose=(0, 0, 0))
+
+
+WORLDS = {'corridors': corridors, 'hall': hall, 'racks': racks}
+
+
+class TimeLimitReached(Exception):
+    pass
+
+
+class LimitedClock(VirtualClock):
+    """A virtual clock ending the scenario when the time limit is reached"""
+    def __init__(self, limit):
+        super().__init__()
+        self.limit = limit
+
+    def sleep(self, duration):
+        super().sleep(duration)
+        if self.time >= self.limit:
+            raise TimeLimitReached()
+
+
+class Profiler:
+    """
+    Measures the CPU time spent in methods, grouped by subsystem. Time spent in a nested subsystem
+    (e.g. a map update made by the controller) is only counted for the nested one
+    """
+    def __init__(self):
+        self.cpu = {}
+        self.calls = {}
+        self.stack = []
+
+    def wrap(self, instance, method, subsystem):
+        function = getattr(instance, method)
+
+        def wrapper(*args, **kwargs):
+            self.stack.append([time.process_time(), 0])
+            try:
+                return function(*args, **kwargs)
+            finally:
+                start, nested = self.stack.pop()
+                elapsed = time.process_time() - start
+                self.cpu[subsystem] = self.cpu.get(subsystem, 0) + elapsed - nested
+                self.calls[method] = self.calls.get(method, 0) + 1
+                if self.stack:
+                    self.stack[-1][1] += elapsed
+
+        setattr(instance, method, wrapper)
+
+
+def getGroundTruth(world, cartographer):
+    """
+    :return: boolean array of the cartographer's shape, True for the squares containing an obstacle
+    """
+    rows, cols = np.nonzero(world.occupied)
+    x = world.origin[0] + (rows + 0.5) * world.resolution
+    y = world.origin[1] + (cols + 0.5) * world.resolution
+    squareRows = np.floor((x - cartographer.xMin) / cartographer.CELL_SIZE).astype(int)
+    squareCols = np.floor((y - cartographer.yMin) / cartographer.CELL_SIZE).astype(int)
+    inside = (squareRows >= 0) & (squareRows < cartographer.getWidth()) \
+        & (squareCols >= 0) & (squareCols < cartographer.getHeight())
+    truth = np.zeros(cartographer.map.shape, dtype=bool)
+    truth[squareRows[inside], squareCols[inside]] = True
+    return truth
+
+
+def getMapQuality(world, cartographer):
+    """
+    :return: dictionary of the final map's quality measures against the ground truth
+    """
+    truth = getGroundTruth(world, cartographer)
+    states = cartographer.getStates()
+    known = states != cartographer.UNKNOWN
+    mappedOccupied = states == cartographer.OCCUPIED
+    squareArea = cartographer.CELL_SIZE ** 2
+    return {
+        'knownArea': float(known.sum() * squareArea),
+        # fraction of the known squares whose state agrees with the ground truth
+        'accuracy': float((mappedOccupied[known] == truth[known]).mean()) if known.any() else None,
+        # obstacles mapped as empty are the dangerous errors
+        'obstaclesMappedEmpty': int((truth & (states == cartographer.EMPTY)).sum()),
+        'freeCoverage': float((known & ~truth).sum() / max(1, (~truth).sum())),
+    }
+
+
+def runScenario(worldName, seed, timeLimit, samplePeriod=10):
+    random.seed(seed)
+    np.random.seed(seed)
+    world = WORLDS[worldName]()
+    clock = LimitedClock(timeLimit)
+    robot = SimRobot(world, clock)
+    extent = np.array(world.occupied.shape) * world.resolution
+    cartographer = Cartographer(world.origin[0], world.origin[0] + extent[0],
+                                world.origin[1], world.origin[1] + extent[1], HEADLESS)
+    squareArea = cartographer.CELL_SIZE ** 2
+
+    wallStart = time.perf_counter()
+    cpuStart = time.process_time()
+    controller, navigator, planningModule = buildModules(robot, cartographer, clock)
+    profiler = Profiler()
+    profiler.wrap(cartographer, 'update', 'mapping')
+    profiler.wrap(planningModule, 'pickDestination', 'frontiers')
+    profiler.wrap(navigator, 'computePath', 'pathPlanning')
+    profiler.wrap(navigator, 'repairPath', 'pathPlanning')
+    profiler.wrap(navigator.hierarchicalPlanner, 'findPath', 'pathPlanning')
+    profiler.wrap(controller, 'move', 'control')
+    profiler.wrap(controller, 'wander', 'control')
+    for method in ('getLaser', 'getPosition', 'getHeading', 'getSnapshot', 'setMotion'):
+        profiler.wrap(robot, method, 'simulation')
+
+    # explored area over time, sampled at each map update
+    curve = []
+    profiledUpdate = cartographer.update
+
+    def update(robot):
+        profiledUpdate(robot)
+        if not curve or clock.now() - curve[-1][0] >= samplePeriod:
+            known = (cartographer.getStates() != cartographer.UNKNOWN).sum()
+            curve.append((clock.now(), float(known * squareArea), world.distanceTravelled))
+
+    cartographer.update = update
+    update(robot)
+    finished = True
+    try:
+        explore(robot, planningModule)
+    except TimeLimitReached:
+        finished = False
+    wallTime = time.perf_counter() - wallStart
+
+    quality = getMapQuality(world, cartographer)
+    curve.append((clock.now(), quality['knownArea'], world.distanceTravelled))
+    minutes = max(clock.now(), 1e-9) / 60
+    return {
+        'world': worldName, 'seed': seed, 'finished': finished,
+        'simulatedTime': clock.now(), 'wallTime': wallTime, 'cpuTime': time.process_time() - cpuStart,
+        'distanceTravelled': world.distanceTravelled, 'collisions': world.collisions,
+        'destinationPicks': profiler.calls.get('pickDestination', 0),
+        'pathPlans': profiler.calls.get('computePath', 0),
+        'pathRepairs': profiler.calls.get('repairPath', 0),
+        # plans of computePath made on clusters (far destinations)
+        'hierarchicalPlans': profiler.calls.get('findPath', 0),
+        'mapUpdates': profiler.calls.get('update', 0),
+        'cpuBySubsystem': profiler.cpu,
+        # ticks of the control loop, missed deadlines and jitter (seconds)
+        'controlTicks': controller.scheduler.getStatistics(),
+        'squareMetersPerMinute': quality['knownArea'] / minutes,
+        'squareMetersPerMeter': quality['knownArea'] / max(world.distanceTravelled, 1e-9),
+        'map': quality,
+        # (simulated time, explored area, distance travelled)
+        'curve': curve,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--worlds', nargs='+', default=list(WORLDS), choices=list(WORLDS))
+    parser.add_argument('--seeds', type=int, nargs='+', default=[0])
+    parser.add_argument('--time-limit', type=float, default=1800, help='simulated seconds per run')
+    parser.add_argument('--output', help='write the report to this JSON file')
+    args = parser.parse_args()
+
+    runs = []
+    for worldName in args.worlds:
+        for seed in args.seeds:
+            result = runScenario(worldName, seed, args.time_limit)
+            runs.append(result)
+            print("%-10s seed %-3d %s  %6.0f s simulated (%5.1f s wall)  %6.1f m2  %6.1f m2/min  %6.1f m  "
+                  "accuracy %.3f" % (worldName, seed, 'done   ' if result['finished'] else 'timeout',
+                                     result['simulatedTime'], result['wallTime'], result['map']['knownArea'],
+                                     result['squareMetersPerMinute'], result['distanceTravelled'],
+                                     result['map']['accuracy'] or 0))
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({'revision': getRevision(), 'timeLimit': args.time_limit, 'runs': runs}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
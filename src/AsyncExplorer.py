@@ -0,0 +1,177 @@
+"""
+Asynchronous exploration loop, built from the logic of PlanningModule, Navigator and Controller.
+Sensing requests are issued concurrently, the map is updated in a worker thread while the robot keeps moving,
+and motion commands are sent at a fixed rate without stopping the robot between them.
+
+Usage: python3 AsyncExplorer.py url x1 y1 x2 y2 showGUI (same arguments as Main.py)
+"""
+
+import asyncio
+from math import pi
+from random import random
+from sys import argv
+from AsyncRobot import AsyncRobot
+from Cartographer import Cartographer
+from PlanningModule import PlanningModule
+from Navigator import Navigator
+from Controller import Controller, getSteering
+
+
+class AsyncExplorer:
+    def __init__(self, robot, cartographer, planningModule, navigator, controller):
+        # control period in sec
+        self.PERIOD = 0.1
+        # turn rate (radians/s) used when the next point is behind the robot
+        self.TURN_RATE = 1
+        self.robot = robot
+        self.cartographer = cartographer
+        self.planningModule = planningModule
+        self.navigator = navigator
+        self.controller = controller
+        self.snapshot = None
+        self.mapping = None
+
+    async def sense(self):
+        """
+        Reads the pose and the laser at the same time, and starts integrating them in the map
+        if the previous map update is over
+        :return: the Snapshot
+        """
+        self.snapshot = await self.robot.getSnapshot()
+        if self.mapping is None or self.mapping.done():
+            if self.mapping is not None:
+                # raises the exception of the previous update, if any
+                self.mapping.result()
+            self.mapping = asyncio.get_running_loop().run_in_executor(None, self.cartographer.update, self.snapshot)
+        return self.snapshot
+
+    async def waitForMap(self):
+        """Waits for the current map update, the map can then be read and written safely"""
+        if self.mapping is not None:
+            await self.mapping
+
+    async def run(self):
+        """Explores until there is no destination left"""
+        await self.sense()
+        while True:
+            await self.waitForMap()
+            destination = self.planningModule.pickDestination(self.snapshot)
+            if not destination:
+                break
+            # the squares are renumbered when a tiled map grows, the real position of the destination does not change
+            with self.cartographer.lock:
+                target = self.cartographer.getRealPosition(destination)
+            await self.followThePath(target, self.planningModule.route)
+        await self.robot.setMotion(0, 0)
+        await self.waitForMap()
+
+    async def followThePath(self, target, route=None):
+        """
+        Same behaviour as Navigator.followThePath
+        :param target: real position of the destination
+        :param route: path to the destination (real positions) already found from the robot's position, used by the
+        first attempt
+        """
+        for attempt in range(self.navigator.MAX_ATTEMPT):
+            await self.waitForMap()
+            dest = self.cartographer.getGridPosition(target)
+            if self.navigator.reachedDestination(self.snapshot, dest):
+                await self.wander()
+                return
+            if route is not None:
+                path = [self.cartographer.getGridPosition(position) for position in route]
+            elif attempt > 0:
+                path = self.navigator.planAgain(self.snapshot, dest)
+            else:
+                path = self.navigator.computePath(self.snapshot, dest)
+            route = None
+            if not path:
+                self.cartographer.setOccupied(dest)
+                await self.wander()
+                return
+            path = self.navigator.convertPath(self.navigator.simplifyPath(self.snapshot, path))
+            if await self.move(path, target):
+                return
+            await self.wander()
+        await self.waitForMap()
+        self.cartographer.setOccupied(self.cartographer.getGridPosition(target))
+
+    async def move(self, path, target):
+        """
+        Follows the path with pure pursuit, the command is updated every PERIOD from a fresh pose
+        :param path: Path object
+        :param target: real position of the destination
+        :return: False iff an obstacle was on the way (or the robot is stuck, like in Controller.move)
+        """
+        loop = asyncio.get_running_loop()
+        self.controller.offset = 0
+        # distance the robot was asked to travel since checkpoint
+        checkpoint, commanded = None, 0
+        while True:
+            start = loop.time()
+            snapshot = await self.sense()
+            # the map is being updated in the executor meanwhile : the destination is read under the lock
+            if self.navigator.isDestinationOver(snapshot, target):
+                return True
+            if self.controller.isObstacleAhead(snapshot.getLaser()):
+                await self.robot.setMotion(0, 0)
+                return False
+            if checkpoint is None:
+                checkpoint = snapshot.getPosition()
+            elif commanded >= self.controller.v * self.controller.time:
+                if self.controller.isStuck(snapshot, checkpoint):
+                    await self.robot.setMotion(0, 0)
+                    return False
+                checkpoint, commanded = snapshot.getPosition(), 0
+            nextPoint = self.controller.getNextPoint(snapshot, path)
+            speed, turnRate, _ = getSteering(snapshot.getPosition(), snapshot.getHeading(), nextPoint,
+                                             self.controller.v, self.TURN_RATE)
+            await self.robot.setMotion(speed, turnRate)
+            await asyncio.sleep(max(0, self.PERIOD - (loop.time() - start)))
+            commanded += speed * self.PERIOD
+
+    async def wander(self):
+        """Same behaviour as Controller.wander"""
+        while True:
+            await self.robot.setMotion(0, 2 * pi * random())
+            await self.sleepSensing(1)
+            await self.robot.setMotion(0, 0)
+            snapshot = await self.sense()
+            if not self.controller.isObstacleAhead(snapshot.getLaser()):
+                break
+        await self.robot.setMotion(self.controller.OBSTACLE_MAX_DIST * 2, 0)
+        for _ in range(self.controller.WANDERING_DISTANCE):
+            await self.sleepSensing(0.5)
+            if self.controller.isObstacleAhead(self.snapshot.getLaser()):
+                break
+        await self.robot.setMotion(0, 0)
+
+    async def sleepSensing(self, duration):
+        """Waits for duration seconds, sensing (and mapping) every PERIOD meanwhile"""
+        loop = asyncio.get_running_loop()
+        end = loop.time() + duration
+        while loop.time() < end:
+            await self.sense()
+            await asyncio.sleep(min(self.PERIOD, max(0, end - loop.time())))
+
+
+async def explore(url, x1, y1, x2, y2, showGUI):
+    robot = await AsyncRobot(url).connect()
+    cartographer = Cartographer(x1, x2, y1, y2, showGUI)
+    controller = Controller(cartographer)
+    navigator = Navigator(controller, cartographer)
+    planningModule = PlanningModule(cartographer, navigator, controller)
+    try:
+        await AsyncExplorer(robot, cartographer, planningModule, navigator, controller).run()
+    finally:
+        await robot.close()
+    cartographer.showMap.close()
+
+
+def main():
+    _, url, x1, y1, x2, y2, showGUI = argv
+    asyncio.run(explore(url, int(x1), int(y1), int(x2), int(y2), int(showGUI)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+asyncio version of robot.Robot: the pose, laser and motion requests do not block and can be issued at the same time.
+Each endpoint has its own keep-alive connection, so requests to different endpoints run concurrently.
+"""
+
+import asyncio
+import json
+import time
+from math import pi
+import quaternion
+from robot import HEADERS, UnexpectedResponse, ConnectionFailed, Snapshot
+
+
+class AsyncConnection:
+    """
+    A persistent HTTP/1.1 connection over asyncio streams, reopened when it breaks
+    """
+    def __init__(self, host, port, timeout=1):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.reader = None
+        self.writer = None
+        # requests on the same connection are sent one after the other
+        self.lock = asyncio.Lock()
+
+    async def request(self, method, path, body=None, headers=None, retries=1):
+        """Sends a request and reads the whole response, returns the status and the body"""
+        headers = {} if headers is None else dict(headers)
+        error = None
+        async with self.lock:
+            for _ in range(retries + 1):
+                try:
+                    if self.writer is None:
+                        self.reader, self.writer = await asyncio.wait_for(
+                            asyncio.open_connection(self.host, self.port), self.timeout)
+                    return await asyncio.wait_for(self._exchange(method, path, body, headers), self.timeout)
+                except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+                    error = e
+                    self.close()
+        raise ConnectionFailed("%s %s failed: %r" % (method, path, error))
+
+    async def _exchange(self, method, path, body, headers):
+        data = body.encode() if body is not None else b''
+        lines = ["%s %s HTTP/1.1" % (method, path), "Host: %s:%d" % (self.host, self.port),
+                 "Content-Length: %d" % len(data)]
+        lines += ["%s: %s" % item for item in headers.items()]
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + data)
+        await self.writer.drain()
+
+        statusLine = await self.reader.readuntil(b"\r\n")
+        status = int(statusLine.split()[1])
+        responseHeaders = {}
+        while True:
+            line = await self.reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            name, _, value = line.decode().partition(":")
+            responseHeaders[name.strip().lower()] = value.strip()
+
+        if responseHeaders.get("transfer-encoding", "").lower() == "chunked":
+            content = b''
+            while True:
+                size = int((await self.reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                chunk = await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+                content += chunk[:-2]
+        elif "content-length" in responseHeaders:
+            content = await self.reader.readexactly(int(responseHeaders["content-length"]))
+        elif status in (204, 304):
+            content = b''
+        else:
+            content = await self.reader.read()
+            self.close()
+        if responseHeaders.get("connection", "").lower() == "close":
+            self.close()
+        return status, content
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+class AsyncRobot:
+    def __init__(self, url="http://localhost:50000", timeout=1):
+        host, _, port = url[len("http://"):].partition(":")
+        self.host = host
+        self.port = int(port) if port else 80
+        self.timeout = timeout
+        self.connections = {}
+        self.laser_angles = None
+
+    async def connect(self):
+        """Reads the laser properties, must be awaited before using the robot"""
+        self.laser_angles = await self.getLaserAngles()
+        return self
+
+    def getAngles(self):
+        return self.laser_angles
+
+    async def getHeading(self):
+        """Returns the heading as a unit vector (see robot.Robot.getHeading)"""
+        pose = await self._getPose()
+        return quaternion.heading(pose['Pose']['Orientation'])
+
+    async def getPosition(self):
+        pose = await self._getPose()
+        return dict(pose['Pose']['Position'])
+
+    async def getSnapshot(self):
+        """Requests the pose and the laser scan at the same time, returns them as a robot.Snapshot"""
+        pose, laser = await asyncio.gather(self._getPose(), self.getLaser())
+        return Snapshot(time.monotonic(), pose, laser, self.laser_angles)
+
+    async def setMotion(self, linearSpeed, turnrate):
+        """Sends a speed (m/s) and turn rate (radians/s) command to the MRDS server"""
+        params = json.dumps({'TargetLinearSpeed': float(linearSpeed), 'TargetAngularSpeed': float(turnrate)})
+        status, _ = await self._request('POST', '/lokarria/differentialdrive', params, HEADERS)
+        if status != 204:
+            raise UnexpectedResponse(status)
+
+    async def getLaser(self):
+        status, laserData = await self._request('GET', '/lokarria/laser/echoes')
+        if status != 200:
+            raise UnexpectedResponse(status)
+        return json.loads(laserData.decode())
+
+    async def getLaserAngles(self):
+        status, laserData = await self._request('GET', '/lokarria/laser/properties')
+        if status != 200:
+            raise UnexpectedResponse(status)
+        properties = json.loads(laserData.decode())
+        # Same angles as robot.Robot.getLaserAngles
+        a = properties['StartAngle']
+        angles = []
+        while a <= properties['EndAngle']:
+            angles.append(a)
+            a += pi / 180
+        return angles
+
+    async def close(self):
+        for connection in self.connections.values():
+            connection.close()
+        self.connections = {}
+
+    async def _getPose(self):
+        status, poseData = await self._request('GET', '/lokarria/localization')
+        if status != 200:
+            raise UnexpectedResponse(status)
+        return json.loads(poseData.decode())
+
+    async def _request(self, method, path, body=None, headers=None):
+        if path not in self.connections:
+            self.connections[path] = AsyncConnection(self.host, self.port, self.timeout)
+        return await self.connections[path].request(method, path, body, headers)
@@ -1,7 +1,11 @@
-from show_map import ShowMap
+from MapRenderer import createRenderer
+import threading
 import numpy as np
-from math import floor, cos, sin, atan2
-from Computations import pathToObstacle, getDistance
+from math import floor, ceil, atan2
+from scipy import ndimage
+from RayCasting import traceRays
+from TiledGrid import TiledGrid
+from MapPyramid import MapPyramid
 
 
 class Cartographer:
@@ -10,7 +14,14 @@ class Cartographer:
     and serves as an interface to get information on the map
     """
 
-    def __init__(self, xMin, xMax, yMin, yMax, showGUI):
+    def __init__(self, xMin, xMax, yMin, yMax, showGUI, tileSize=None, mapDirectory=None):
+        """
+        :param xMin, xMax, yMin, yMax: bounds of the map. A tiled map grows beyond them when needed
+        :param showGUI: see MapRenderer.createRenderer
+        :param tileSize: if given, the map is stored as tiles of tileSize x tileSize squares, allocated when
+        something is seen in them
+        :param mapDirectory: if given (with tileSize), the tiles of the map are memory-mapped files in this directory
+        """
         self.CELL_SIZE = 0.3
         self.EMPTY = 0
         self.OCCUPIED = 1
@@ -22,25 +33,54 @@ class Cartographer:
         self.LASER_MAX_DISTANCE = 10
         self.LASER_MAX_ANGLE = 50
         self.ROBOT_WIDTH = 0.8
+        # obstacles are inflated by this distance in the configuration space
+        self.INFLATION_RADIUS = self.ROBOT_WIDTH / 2
+        # number of map changes remembered for the consumers updating themselves incrementally
+        self.MAX_CHANGES = 64
 
         self.xMin = xMin
         self.xMax = xMax
         self.yMin = yMin
         self.yMax = yMax
-        self.showMap = ShowMap(self.getWidth(), self.getHeight(), showGUI)
-        self.map = np.ones((self.getWidth(), self.getHeight())) * (self.MAXVALUE + self.MINVALUE) // 2
+        # state of each possible value of a square
+        self.STATES = np.full(256, self.UNKNOWN, dtype=np.int8)
+        self.STATES[:self.EMPTY_THRESHOLD] = self.EMPTY
+        self.STATES[self.OCCUPIED_THRESHOLD + 1:] = self.OCCUPIED
+        shape = (int((xMax - xMin) / self.CELL_SIZE), int((yMax - yMin) / self.CELL_SIZE))
+        unknown = (self.MAXVALUE + self.MINVALUE) // 2
+        self.tiled = tileSize is not None
+        if self.tiled:
+            self.map = TiledGrid(shape, np.uint8, unknown, tileSize, mapDirectory)
+            self.states = TiledGrid(shape, np.int8, self.STATES[unknown], tileSize)
+            self.cspace = TiledGrid(shape, bool, False, tileSize)
+        else:
+            self.map = np.full(shape, unknown, dtype=np.uint8)
+            # state of every square, kept up to date with the map
+            self.states = self.STATES[self.map]
+            # configuration space : True for the squares too close to an obstacle for the robot
+            self.cspace = np.zeros(shape, dtype=bool)
+        self.showMap = createRenderer(self.getWidth(), self.getHeight(), showGUI)
+        # version of the map, increased each time the state of some squares changes
+        self.version = 0
+        self.changes = []
+        # smallest window containing every square whose state changed so far, None until something is seen
+        self.knownWindow = None
+        # coarser versions of the map, updated with every change
+        self.pyramid = MapPyramid(self)
+        # held while the map is written (see MappingWorker), and by the readers needing a consistent map
+        self.lock = threading.RLock()
 
     def getHeight(self):
         """
         :return: the number of squares in terms of height
         """
-        return int((self.yMax - self.yMin) / self.CELL_SIZE)
+        return self.map.shape[1]
 
     def getWidth(self):
         """
         :return: the number of squares in terms of width
         """
-        return int((self.xMax - self.xMin) / self.CELL_SIZE)
+        return self.map.shape[0]
 
     def isOutOfBound(self, square):
         """
@@ -55,56 +95,194 @@ class Cartographer:
         :param square: a pair
         :return: the state of the square
         """
-        if self.map[square[0]][square[1]] < self.EMPTY_THRESHOLD:
-            return self.EMPTY
-        elif self.map[square[0]][square[1]] > self.OCCUPIED_THRESHOLD:
-            return self.OCCUPIED
+        return self.states[square[0], square[1]]
+
+    def getStates(self, window=None):
+        """
+        Gives the states of the whole grid (or of a window of it) at once
+        :param window: (rowMin, rowMax, colMin, colMax), max excluded. The whole grid if None
+        :return: a read-only integer array containing the state (EMPTY, OCCUPIED or UNKNOWN) of every square.
+        For a dense map it is a view following the updates of the map, for a tiled map it is a copy of the window :
+        the readers of a tiled map should only ask for the window they need
+        """
+        states = self.states[:, :] if window is None else self.states[window[0]:window[1], window[2]:window[3]]
+        states.flags.writeable = False
+        return states
+
+    def getBlocked(self, window=None):
+        """
+        :param window: (rowMin, rowMax, colMin, colMax), max excluded. The whole grid if None
+        :return: a boolean array (the configuration space), True for the squares the robot cannot go through.
+        Like getStates, a copy of the window for a tiled map
+        """
+        if window is None:
+            return np.asarray(self.cspace)
+        return self.cspace[window[0]:window[1], window[2]:window[3]]
+
+    def isBlocked(self, square):
+        """
+        :param square: a pair
+        :return: True iff the robot cannot go through the square (obstacle or too close to one)
+        """
+        return self.cspace[square[0], square[1]]
+
+    def getWindow(self, center, radius):
+        """
+        :param center: a quaternion
+        :param radius: a distance
+        :return: the window (rowMin, rowMax, colMin, colMax) of the grid containing the disk, max excluded
+        """
+        row, col = self.getGridPosition(center)
+        margin = int(radius / self.CELL_SIZE) + 2
+        return max(0, row - margin), min(self.getWidth(), row + margin + 1), \
+            max(0, col - margin), min(self.getHeight(), col + margin + 1)
+
+    def recordChange(self, window):
+        """
+        Records that the state of some squares inside the given window changed, and increases the map's version
+        :param window: (rowMin, rowMax, colMin, colMax), max excluded
+        """
+        self.version += 1
+        self.changes.append((self.version, window))
+        if len(self.changes) > self.MAX_CHANGES:
+            self.changes.pop(0)
+        self.knownWindow = window if self.knownWindow is None else uniteWindows(self.knownWindow, window)
+        self.pyramid.updateWindow(window)
+
+    def getBoundingWindow(self, squares, margin=1):
+        """
+        :param squares: a non empty list of squares (pairs)
+        :param margin: a number of squares
+        :return: the smallest window containing the squares, grown by margin squares on each side and clipped to
+        the grid
+        """
+        rows = [square[0] for square in squares]
+        cols = [square[1] for square in squares]
+        return self.expandWindow((min(rows), max(rows) + 1, min(cols), max(cols) + 1), margin)
+
+    def getKnownWindow(self, squares, margin=1):
+        """
+        The searches of the planners are limited to this window : the squares never seen are not worth going through
+        :param squares: a non empty list of squares (pairs) to include
+        :param margin: a number of squares
+        :return: the smallest window containing the squares and every square seen so far, grown by margin squares
+        on each side and clipped to the grid
+        """
+        window = self.getBoundingWindow(squares, 0)
+        if self.knownWindow is not None:
+            window = uniteWindows(window, self.knownWindow)
+        return self.expandWindow(window, margin)
+
+    def getChangesSince(self, version):
+        """
+        :param version: a version of the map
+        :return: the smallest window containing all the squares whose state changed since version,
+        None if nothing changed
+        """
+        if version >= self.version:
+            return None
+        if not self.changes or self.changes[0][0] > version + 1:
+            return 0, self.getWidth(), 0, self.getHeight()
+        windows = [window for (v, window) in self.changes if v > version]
+        return min(w[0] for w in windows), max(w[1] for w in windows), \
+            min(w[2] for w in windows), max(w[3] for w in windows)
+
+    def setOccupied(self, square):
+        """
+        Marks a square as occupied
+        :param square: a pair
+        """
+        with self.lock:
+            wasOccupied = self.getState(square) == self.OCCUPIED
+            self.map[square[0], square[1]] = self.MAXVALUE
+            self.states[square[0], square[1]] = self.OCCUPIED
+            if not wasOccupied:
+                self.recordChange(self.updateConfigurationSpace((square[0], square[0] + 1, square[1], square[1] + 1)))
+
+    def expandWindow(self, window, margin):
+        """
+        :param window: (rowMin, rowMax, colMin, colMax), max excluded
+        :param margin: a number of squares
+        :return: the window grown by margin squares on each side, clipped to the grid
+        """
+        return max(0, window[0] - margin), min(self.getWidth(), window[1] + margin), \
+            max(0, window[2] - margin), min(self.getHeight(), window[3] + margin)
+
+    def grow(self, center, radius):
+        """
+        Grows a tiled map by whole tiles until it contains the given disk. The squares are renumbered, so the
+        squares kept across map updates should be kept as real positions
+        :param center: a quaternion
+        :param radius: a distance
+        """
+        row, col = self.getGridPosition(center)
+        margin = int(radius / self.CELL_SIZE) + 2
+        tileSize = self.map.TILE_SIZE
+        rowsBefore = ceil(max(0, margin - row) / tileSize) * tileSize
+        colsBefore = ceil(max(0, margin - col) / tileSize) * tileSize
+        rowsAfter = ceil(max(0, row + margin + 1 - self.getWidth()) / tileSize) * tileSize
+        colsAfter = ceil(max(0, col + margin + 1 - self.getHeight()) / tileSize) * tileSize
+        if rowsBefore == rowsAfter == colsBefore == colsAfter == 0:
+            return
+        for grid in (self.map, self.states, self.cspace):
+            grid.grow(rowsBefore, rowsAfter, colsBefore, colsAfter)
+        self.xMin -= rowsBefore * self.CELL_SIZE
+        self.yMin -= colsBefore * self.CELL_SIZE
+        self.xMax = self.xMin + self.getWidth() * self.CELL_SIZE
+        self.yMax = self.yMin + self.getHeight() * self.CELL_SIZE
+        # the previous changes are in the old numbering : the consumers have to start over
+        self.version += 1
+        self.changes = []
+        self.pyramid.reset()
+        if self.knownWindow is not None:
+            rowMin, rowMax, colMin, colMax = self.knownWindow
+            self.knownWindow = (rowMin + rowsBefore, rowMax + rowsBefore, colMin + colsBefore, colMax + colsBefore)
+
+    def updateConfigurationSpace(self, window):
+        """
+        Inflates the obstacles by INFLATION_RADIUS in the configuration space, around squares whose state changed
+        The map itself is left untouched
+        :param window: (rowMin, rowMax, colMin, colMax), max excluded, containing the squares whose state changed
+        :return: the window of the configuration space that was recomputed
+        """
+        margin = ceil(self.INFLATION_RADIUS / self.CELL_SIZE)
+        inner = self.expandWindow(window, margin)
+        outer = self.expandWindow(inner, margin)
+        free = self.getStates(outer) != self.OCCUPIED
+        if free.all():
+            distances = np.full(free.shape, np.inf)
         else:
-            return self.UNKNOWN
-
-    def getSquaresInCircle(self, center, radius):
-        squares = set()
-        toProcess = [self.getGridPosition(center)]
-        while len(toProcess) > 0:
-            square = toProcess.pop()
-            pos = self.getRealPosition(square)
-            if getDistance(pos, center) < radius:
-                squares.add(square)
-                for i in range(-1, 2):
-                    for j in range(-1, 2):
-                        neighbor = square[0] + i, square[1] + j
-                        if neighbor not in squares and not self.isOutOfBound(neighbor):
-                            toProcess.append(neighbor)
-        return squares
-
-    def increaseThickness(self, robot):
-        squares = self.getSquaresInCircle(robot.getPosition(), self.LASER_MAX_DISTANCE)
-        while len(squares) > 0:
-            square = squares.pop()
-            if self.getState(square) == self.OCCUPIED:
-                neighbors = self.getSquaresInCircle(self.getRealPosition(square), self.ROBOT_WIDTH)
-                squares -= neighbors
-                for neighbor in neighbors:
-                    if self.getState(neighbor) == self.OCCUPIED:
-                        path = pathToObstacle(square, neighbor)
-                        for (row, col) in path:
-                            self.map[row][col] = min(self.MAXVALUE, self.map[row][col] + 3)
+            # Distance from every square to the closest obstacle
+            distances = ndimage.distance_transform_edt(free) * self.CELL_SIZE
+        distances = distances[inner[0] - outer[0]:inner[1] - outer[0], inner[2] - outer[2]:inner[3] - outer[2]]
+        self.cspace[inner[0]:inner[1], inner[2]:inner[3]] = distances < self.INFLATION_RADIUS
+        return inner
 
     def update(self, robot):
         """
-        Updates the map representation
-        :param robot: Robot object
+        Updates the map representation, holding the lock
+        :param robot: Robot object, or Snapshot
         """
-        if self.isOutOfBound(self.getGridPosition(robot.getPosition())):
-            return
-        self.handleLasers(robot)
-        self.increaseThickness(robot)
-        row, col = self.getGridPosition(robot.getPosition())
-        self.showMap.updateMap(self.map, self.MAXVALUE, row, col)
+        with self.lock:
+            if self.tiled:
+                self.grow(robot.getPosition(), self.LASER_MAX_DISTANCE)
+            elif self.isOutOfBound(self.getGridPosition(robot.getPosition())):
+                return
+            window = self.getWindow(robot.getPosition(), self.LASER_MAX_DISTANCE)
+            before = self.getStates(window).copy()
+            self.handleLasers(robot)
+            rows, cols = np.nonzero(self.getStates(window) != before)
+            if len(rows) > 0:
+                changed = (window[0] + rows.min(), window[0] + rows.max() + 1,
+                           window[2] + cols.min(), window[2] + cols.max() + 1)
+                self.recordChange(self.updateConfigurationSpace(changed))
+            row, col = self.getGridPosition(robot.getPosition())
+            self.showMap.updateMap(self.map, self.MAXVALUE, row, col)
 
     def handleLasers(self, robot):
         """
         Uses the laser scanners to detect obstacles and updates the map accordingly
+        All the beams of the scan are traced at once, then the map is updated with a few scatter operations
         :param robot: Robot object
         """
         robotPosition = robot.getPosition()
@@ -112,43 +290,93 @@ class Cartographer:
         robotAngle = atan2(robotHeading["Y"], robotHeading["X"])
         lasers = robot.getLaser()
         laserAngles = robot.getAngles()
-        obstaclePos = {}
+        middle = len(lasers['Echoes']) // 2
+        beams = slice(middle - self.LASER_MAX_ANGLE, middle + self.LASER_MAX_ANGLE)
+        echoes = np.asarray(lasers['Echoes'][beams], dtype=float)
+        angles = np.asarray(laserAngles[beams], dtype=float) + robotAngle
         # Find a potential obstacle for each laser
-        for i in range(len(lasers['Echoes']) // 2 - self.LASER_MAX_ANGLE,
-                       len(lasers['Echoes']) // 2 + self.LASER_MAX_ANGLE):
-            obstaclePos['X'] = lasers['Echoes'][i] * cos(laserAngles[i] + robotAngle) + robotPosition['X']
-            obstaclePos['Y'] = lasers['Echoes'][i] * sin(laserAngles[i] + robotAngle) + robotPosition['Y']
-            path = pathToObstacle(self.getGridPosition(robotPosition), self.getGridPosition(obstaclePos))
-            self.HIMMUpdate(path, robotPosition)
+        obstacleRows = np.floor((echoes * np.cos(angles) + robotPosition['X'] - self.xMin) / self.CELL_SIZE)
+        obstacleCols = np.floor((echoes * np.sin(angles) + robotPosition['Y'] - self.yMin) / self.CELL_SIZE)
+        obstacles = np.stack((obstacleRows, obstacleCols), axis=1).astype(np.int64)
+        rows, cols, valid = traceRays(self.getGridPosition(robotPosition), obstacles)
+
+        # Do not update beyond the LASER_MAX distance (nor anything after it on the same beam)
+        distances = np.hypot(rows * self.CELL_SIZE + self.xMin + self.CELL_SIZE / 2 - robotPosition['X'],
+                             cols * self.CELL_SIZE + self.yMin + self.CELL_SIZE / 2 - robotPosition['Y'])
+        reached = valid & ~np.logical_or.accumulate(distances > self.LASER_MAX_DISTANCE, axis=1)
+        inBound = (rows >= 0) & (rows < self.getWidth()) & (cols >= 0) & (cols < self.getHeight())
+        last = np.zeros_like(valid)
+        last[np.arange(len(valid)), valid.sum(axis=1) - 1] = True
 
-    def HIMMUpdate(self, path, robotPosition):
+        free = reached & inBound & ~last
+        hits = reached & inBound & last
+        beams = np.broadcast_to(np.arange(len(valid))[:, np.newaxis], valid.shape)
+        self.HIMMUpdate((rows[free], cols[free], beams[free]), (rows[hits], cols[hits], beams[hits]))
+
+    def HIMMUpdate(self, free, hits):
         """
-        Given a path from the robot to a potential obstacle, updates the map using HIMM method
-        :param path: a list of pairs, starting from the robot's position
-        :param robot: Robot object
+        Updates the map using HIMM method, for all the beams of a scan at once
+        The result is the one of processing the beams one after the other, except that the growth operator
+        is computed on the same map for all the obstacles of the scan. The growth operator is rounded down
+        :param free: a triple of integer arrays (rows, cols, beams), the squares crossed by each beam
+        :param hits: a triple of integer arrays (rows, cols, beams), the squares where the beams found an obstacle
         """
-        GROMask = [[0.5, 0.5, 0.5], [0.5, 1, 0.5], [0.5, 0.5, 0.5]]
-        for (x, y) in path:
-            realPos = self.getRealPosition((x, y))
-            distanceToRobot = getDistance(robotPosition, realPos)
-            # Do not update beyond the LASER_MAX distance
-            if distanceToRobot > self.LASER_MAX_DISTANCE:
-                break
-            if not self.isOutOfBound((x, y)):
-                if (x, y) == path[-1]:
-                    self.map[x][y] = min(self.MAXVALUE, self.map[x][y] + 3)
-                    # Computation of the growth operator
-                    sum = 0
-                    for i in range(-1, 2):
-                        for j in range(-1, 2):
-                            neighborRow, neighborCol = x + i, y + j
-                            if not self.isOutOfBound((neighborRow, neighborCol)):
-                                sum += self.map[neighborRow][neighborCol] * GROMask[1 + i][1 + j]
-                                # Increase thickness of obstacles
-                                # self.map[neighborRow][neighborCol] = min(self.MAXVALUE, self.map[neighborRow][neighborCol] + 3)
-                    self.map[x][y] = min(self.MAXVALUE, sum)
-                else:
-                    self.map[x][y] = max(self.MINVALUE, self.map[x][y] - 1)
+        # weights of the growth operator, doubled to stay in integers
+        GROMask = np.array([[1, 1, 1], [1, 2, 1], [1, 1, 1]])
+        allRows = np.concatenate((free[0], hits[0]))
+        allCols = np.concatenate((free[1], hits[1]))
+        if len(allRows) == 0:
+            return
+        # Work on the window covering the scan, with a one square margin for the growth operator
+        rowMin, rowMax = max(0, allRows.min() - 1), min(self.getWidth(), allRows.max() + 2)
+        colMin, colMax = max(0, allCols.min() - 1), min(self.getHeight(), allCols.max() + 2)
+        window = self.map[rowMin:rowMax, colMin:colMax]
+        shape = window.shape
+        freeSquares = np.ravel_multi_index((free[0] - rowMin, free[1] - colMin), shape)
+        hitSquares = np.ravel_multi_index((hits[0] - rowMin, hits[1] - colMin), shape)
+
+        # A beam crossing an obstacle found by a previous beam decrements it after the growth operator
+        lastHit = np.full(window.size, -1)
+        np.maximum.at(lastHit, hitSquares, hits[2])
+        late = (free[2] > lastHit[freeSquares]) & (lastHit[freeSquares] >= 0)
+        before = window.copy()
+        early = np.bincount(freeSquares[~late], minlength=window.size).reshape(shape)
+        saturatingSubtract(window, early, self.MINVALUE)
+
+        hitSquares = np.unique(hitSquares)
+        hitRows, hitCols = np.unravel_index(hitSquares, shape)
+        hitValues = window[hitRows, hitCols]
+        saturatingAdd(hitValues, 3, self.MAXVALUE)
+        window[hitRows, hitCols] = hitValues
+        # Computation of the growth operator (squares outside the grid count as 0)
+        # The free neighbors only count the decrements of the beams preceding the one which found the obstacle
+        beamCount = max(free[2].max(initial=0), hits[2].max(initial=0)) + 1
+        crossings = np.sort(freeSquares * beamCount + free[2])
+        padded = np.pad(window, 1)
+        paddedBefore = np.pad(before, 1)
+        growth = np.zeros(len(hitRows), dtype=np.int64)
+        for i in range(3):
+            for j in range(3):
+                neighbors = padded[hitRows + i, hitCols + j]
+                if (i, j) != (1, 1):
+                    neighborRows, neighborCols = hitRows + i - 1, hitCols + j - 1
+                    inside = (0 <= neighborRows) & (neighborRows < shape[0]) \
+                        & (0 <= neighborCols) & (neighborCols < shape[1])
+                    squares = np.ravel_multi_index((neighborRows.clip(0, shape[0] - 1),
+                                                    neighborCols.clip(0, shape[1] - 1)), shape)
+                    decrements = np.searchsorted(crossings, squares * beamCount + lastHit[hitSquares]) \
+                        - np.searchsorted(crossings, squares * beamCount)
+                    isFree = inside & (lastHit[squares] < 0)
+                    neighbors = np.where(isFree, np.maximum(paddedBefore[hitRows + i, hitCols + j] - decrements,
+                                                            self.MINVALUE), neighbors)
+                growth += neighbors * GROMask[i][j]
+        window[hitRows, hitCols] = np.minimum(self.MAXVALUE, growth // 2)
+
+        late = np.bincount(freeSquares[late], minlength=window.size).reshape(shape)
+        saturatingSubtract(window, late, self.MINVALUE)
+        # a window of a tiled map is a copy
+        self.map[rowMin:rowMax, colMin:colMax] = window
+        self.states[rowMin:rowMax, colMin:colMax] = self.STATES[window]
 
     def getMap(self):
         return self.map
@@ -171,56 +399,30 @@ class Cartographer:
         y = (square[1] * self.CELL_SIZE + self.yMin) + self.CELL_SIZE / 2
         return {'X': x, 'Y': y}
 
-    def getNextLayer(self, layer, inside):
-        """
-        Given a layer (depth d) and all the squares already visited,
-        computes the next layer (depth d+1) in the wave search
-        :param layer: a list of squares (all at the same depth in the wave search)
-        :param inside: a list of squares (that are part of a depth < d layer)
-        :return: the list of squares corresponding to the next layer
-        """
-        nextLayer = []
-        for square in layer:
-            for (i, j) in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                    neighbor = (square[0] + i, square[1] + j)
-                    if not self.isOutOfBound(neighbor) and neighbor not in inside and not self.getState(neighbor) == self.OCCUPIED:
-                        nextLayer.append(neighbor)
-        return nextLayer
 
-    def isOnBorder(self, square):
-        """
-        Decides whether a given square belongs to the border between known/unknown or not
-        :param square: a pair
-        :return: True iff square belongs to the border
-        """
-        if self.isOutOfBound(square) or self.getState(square) == self.UNKNOWN:
-            return False
-        for (i, j) in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                neighbor = (square[0] + i, square[1] + j)
-                if not self.isOutOfBound(neighbor) and self.getState(neighbor) == self.UNKNOWN:
-                    return True
-        return False
+def uniteWindows(first, second):
+    """
+    :param first, second: windows (rowMin, rowMax, colMin, colMax), max excluded
+    :return: the smallest window containing both
+    """
+    return min(first[0], second[0]), max(first[1], second[1]), min(first[2], second[2]), max(first[3], second[3])
 
-    def findBorder(self, square):
-        """
-        Given a square, finds all the squares that belongs to the same 1 state border (either all empty or all occupied)
-        :param square: a pair
-        :return: the border (list of squares) associated to square, and squares belonging to the neighboring borders
-        """
-        border = []
-        ends = []
-        stack = [square]
-        while len(stack) != 0:
-            square = stack.pop()
-            if square not in border:
-                border.append(square)
-                for i in range(-1, 2):
-                    for j in range(-1, 2):
-                        neighbor = (square[0] + i, square[1] + j)
-                        if self.isOnBorder(neighbor) and neighbor not in border:
-                            if self.getState(neighbor) == self.getState(square):
-                                stack.append(neighbor)
-                            else:
-                                ends.append(neighbor)
-        ends = list(set(ends))
-        return border, ends
+
+def saturatingSubtract(values, decrements, minimum):
+    """
+    Subtracts in place without going below minimum
+    :param values: an unsigned integer array, whose values are at least minimum
+    :param decrements: non negative integers (array of the same shape or scalar)
+    :param minimum: the lowest value
+    """
+    np.subtract(values, np.minimum(values - minimum, decrements).astype(values.dtype), out=values)
+
+
+def saturatingAdd(values, increments, maximum):
+    """
+    Adds in place without going above maximum
+    :param values: an unsigned integer array, whose values are at most maximum
+    :param increments: non negative integers (array of the same shape or scalar)
+    :param maximum: the highest value
+    """
+    np.add(values, np.minimum(maximum - values, increments).astype(values.dtype), out=values)
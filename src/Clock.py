@@ -0,0 +1,76 @@
+"""
+Clocks used to wait between commands. Controller uses a WallClock by default; a VirtualClock makes the waits
+instantaneous, so that a simulated exploration (see SimRobot) runs as fast as the CPU allows.
+A Scheduler paces a control loop at a fixed rate on either clock.
+"""
+
+import time
+
+
+class WallClock:
+    def now(self):
+        """Returns the current time in seconds"""
+        return time.monotonic()
+
+    def sleep(self, duration):
+        time.sleep(duration)
+
+
+class VirtualClock:
+    def __init__(self, start=0):
+        self.time = start
+
+    def now(self):
+        """Returns the current time in seconds"""
+        return self.time
+
+    def sleep(self, duration):
+        """Advances the time without waiting"""
+        self.time += max(0, duration)
+
+
+class Scheduler:
+    """
+    Wakes up at a fixed rate on a clock. When a deadline is already over at the time of waiting, the tick is missed :
+    the next deadline is the first one still ahead, late ticks are not run in a burst
+    """
+    def __init__(self, clock, period):
+        """
+        :param clock: WallClock or VirtualClock
+        :param period: time between two ticks (seconds)
+        """
+        self.clock = clock
+        self.period = period
+        self.deadline = None
+        self.ticks = 0
+        self.missed = 0
+        # delay between the deadlines and the wake-ups
+        self.jitterSum = 0
+        self.jitterMax = 0
+
+    def start(self):
+        """The first deadline is one period from now"""
+        self.deadline = self.clock.now() + self.period
+
+    def wait(self):
+        """Sleeps until the next deadline"""
+        if self.deadline is None:
+            self.start()
+        now = self.clock.now()
+        if now > self.deadline:
+            missed = int((now - self.deadline) // self.period) + 1
+            self.missed += missed
+            self.deadline += missed * self.period
+        self.clock.sleep(self.deadline - now)
+        jitter = max(0, self.clock.now() - self.deadline)
+        self.ticks += 1
+        self.jitterSum += jitter
+        self.jitterMax = max(self.jitterMax, jitter)
+        self.deadline += self.period
+
+    def getStatistics(self):
+        """
+        :return: the number of ticks and of missed deadlines, the mean and max jitter (seconds)
+        """
+        return {'ticks': self.ticks, 'missed': self.missed,
+                'meanJitter': self.jitterSum / self.ticks if self.ticks else 0, 'maxJitter': self.jitterMax}
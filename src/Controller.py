@@ -1,9 +1,10 @@
-from robot import Robot
 from Computations import *
-from math import pi, atan2
+from math import pi, atan2, sin, cos
 from numpy import sign
 from random import random
-import time
+from Clock import WallClock, VirtualClock, Scheduler
+from Path import Path
+from MappingWorker import MappingWorker
 
 
 class Controller:
@@ -11,121 +12,213 @@ class Controller:
     This class is able to move the robot, given a path to a destination
     """
 
-    def __init__(self, cartographer):
-        # a new destination is computed every time sec
-        self.time = 1
+    def __init__(self, cartographer, clock=None, mapper=None):
+        """
+        :param cartographer: Cartographer object
+        :param clock: WallClock (default) or VirtualClock
+        :param mapper: the MappingWorker integrating the scans read by the controller. By default, a worker started
+        in a background thread, or integrating the scans right away on a VirtualClock (deterministic simulations)
+        """
+        # the progress of the robot is checked every time sec : the simulation stops the robot against an obstacle,
+        # but each command sent keeps pushing it until the check
+        self.time = 0.3
+        # the command is computed again from a fresh pose every PERIOD sec
+        self.PERIOD = 0.1
         self.alpha = 0
         self.v = 1
-        # lookahead distance
-        self.L = 2
+        self.MAX_TURN_RATE = pi
+        # the robot faces a point if the angle between them is smaller than this
+        self.HEADING_TOLERANCE = 0.05
+        # a move is over when the end of the path is closer than this
+        self.END_DISTANCE = 1
+        # lookahead distance : the arcs toward a point further along the path cut the corners of the obstacles
+        self.L = 1
         self.offset = 0
-        self.DISTANCE_UPDATE = 6
-        self.distanceTravelled = 0
         self.LASER_ANGLE = 8
         self.OBSTACLE_MAX_DIST = 2
         self.WANDERING_DISTANCE = 8
+        # the robot is considered stuck if it moved less than this during a step
+        self.STUCK_DISTANCE = 0.1
 
         self.cartographer = cartographer
+        # waits between commands go through the clock (a VirtualClock for fast-forward simulations)
+        self.clock = clock if clock is not None else WallClock()
+        self.scheduler = Scheduler(self.clock, self.PERIOD)
+        if mapper is None:
+            mapper = MappingWorker(cartographer, background=not isinstance(self.clock, VirtualClock))
+            mapper.start()
+        self.mapper = mapper
 
-    def checkObstacle(self, robot):
+    def sense(self, robot):
+        """
+        Reads the pose and the laser scan at once, and hands them to the mapper
+        :param robot: Robot object
+        :return: the Snapshot
+        """
+        snapshot = robot.getSnapshot()
+        self.mapper.submit(snapshot)
+        return snapshot
+
+    def checkObstacle(self, robot, snapshot):
         """
         If an obstacle is encountered, the robot is stopped
+        :param robot: Robot object
+        :param snapshot: the last Snapshot
         :return:
         """
-        lasers = robot.getLaser()
+        if self.isObstacleAhead(snapshot.getLaser()):
+            robot.setMotion(0, 0)
+            return True
+        return False
+
+    def isObstacleAhead(self, lasers):
+        """
+        :param lasers: a laser scan
+        :return: True iff one of the central lasers sees an obstacle closer than OBSTACLE_MAX_DIST
+        """
         for i in range(len(lasers['Echoes']) // 2 - self.LASER_ANGLE,
                        len(lasers['Echoes']) // 2 + self.LASER_ANGLE):
             if lasers['Echoes'][i] < self.OBSTACLE_MAX_DIST:
-                robot.setMotion(0, 0)
                 return True
         return False
         
-    def moveOnce(self, robot, destination):
+    def steer(self, robot, position, heading, destination):
         """
-        Move the robot to a new destination
+        Sends the pure pursuit command : the arc of circle tangent to the heading reaching the destination,
+        or a turn on the spot if the destination is behind the robot
         :param robot: Robot object
+        :param position: quaternion
+        :param heading: the heading of the robot
         :param destination: quaternion
+        :return: the linear speed sent
         """
-        r = getRadius(robot.getPosition(), destination, robot.getHeading())
-        robot.setMotion(self.v, sign(self.alpha) * self.v / r)
-        time.sleep(self.time)
-        robot.setMotion(0, 0)
+        speed, turnRate, self.alpha = getSteering(position, heading, destination, self.v, self.MAX_TURN_RATE)
+        robot.setMotion(speed, turnRate)
+        return speed
 
     def getNextPoint(self, robot, path):
         """
-        Computes the next destination in the path
+        Computes the next destination in the path : the point L further along the path than the point closest to
+        the robot (the robot never goes back before the segment of offset)
         :param robot: Robot object
-        :param path: list of quaternions
+        :param path: Path object, or list of quaternions
         :return: the destination (quaternion)
         """
-        A, B = {}, {}
-        for i in range(self.offset, len(path)):
-            d = getDistance(robot.getPosition(), path[i])
-            if (d >= self.L) and i > self.offset:
-                self.offset = i - 1
-                A, B = getLineCircleIntersection(robot.getPosition(), self.L, path[i], path[i - 1])
-            elif (d >= self.L) and i == self.offset:
-                A, B = getLineCircleIntersection(robot.getPosition(), self.L, path[i], robot.getPosition())
-            if (A, B) != ({}, {}):
-                if getDistance(A, path[i]) < getDistance(B, path[i]):
-                    return A
-                else:
-                    return B
-        return path[-1]
+        if not isinstance(path, Path):
+            path = Path(path)
+        nextPoint, self.offset = path.getLookaheadPoint(robot.getPosition(), self.L, self.offset)
+        return nextPoint
 
     def orientToward(self, robot, pos):
-        angle = getAlpha(robot.getPosition(), pos, robot.getHeading()) / 2
-        robot.setMotion(0, angle)
-        time.sleep(1)
+        """
+        Turns on the spot until the robot faces pos, then stops turning : the move does not start on a heading that
+        is still changing
+        :param robot: Robot object
+        :param pos: quaternion
+        """
+        self.scheduler.start()
+        for _ in range(int(2 * pi / self.MAX_TURN_RATE / self.PERIOD)):
+            snapshot = self.sense(robot)
+            angle = getAlpha(snapshot.getPosition(), pos, snapshot.getHeading()) / 2
+            if abs(angle) < self.HEADING_TOLERANCE:
+                robot.setMotion(0, 0)
+                return
+            # half of the remaining angle at each tick
+            robot.setMotion(0, sign(angle) * min(self.MAX_TURN_RATE, abs(angle) / (2 * self.PERIOD)))
+            self.scheduler.wait()
 
     def move(self, robot, path):
         """
-        Moves the robot following a given path
+        Moves the robot following a given path : every PERIOD, the command is computed again (pure pursuit) from a
+        fresh pose, the robot only stops at the end of the path or in front of an obstacle
         :param robot: Robot object
-        :param path: list of quaternion
+        :param path: Path object, or list of quaternions
         :return False iff something went wrong (an obstacle was on the way)
         """
-        self.orientToward(robot, path[0])
+        if not isinstance(path, Path):
+            path = Path(path)
         self.offset = 0
-        nextPoint = self.getNextPoint(robot, path)
-        while (nextPoint != path[-1]):
-            nextPoint = self.getNextPoint(robot, path)
-            self.alpha = getAlpha(robot.getPosition(), nextPoint, robot.getHeading())
-            self.moveOnce(robot, nextPoint)
-            if self.checkObstacle(robot):
+        if getDistance(robot.getPosition(), path[-1]) < self.END_DISTANCE:
+            return True
+        self.orientToward(robot, self.getNextPoint(robot, path))
+        self.scheduler.start()
+        # distance the robot was asked to travel since checkpoint
+        checkpoint, commanded = robot.getPosition(), 0
+        while True:
+            snapshot = self.sense(robot)
+            position = snapshot.getPosition()
+            if getDistance(position, path[-1]) < self.END_DISTANCE:
+                robot.setMotion(0, 0)
+                return True
+            if self.checkObstacle(robot, snapshot):
                 return False
-            self.checkDistanceTravelled(robot, self.time * self.v)
-        self.moveOnce(robot, nextPoint)
-        return True
+            if commanded >= self.v * self.time:
+                if self.isStuck(snapshot, checkpoint):
+                    robot.setMotion(0, 0)
+                    return False
+                checkpoint, commanded = position, 0
+            speed = self.steer(robot, position, snapshot.getHeading(), self.getNextPoint(snapshot, path))
+            self.scheduler.wait()
+            commanded += speed * self.PERIOD
 
-    def checkDistanceTravelled(self, robot, dist):
+    def isStuck(self, robot, position):
         """
-        Called each time a new destination is computed, this function updates the map if the robot has moved enough
-        :param robot: Robot object
+        :param robot: Robot object, or Snapshot
+        :param position: the position of the robot time sec ago
+        :return: True iff the robot barely moved (blocked by an obstacle the central lasers did not see)
         """
-        self.distanceTravelled += dist
-        if self.distanceTravelled >= self.DISTANCE_UPDATE:
-            self.cartographer.update(robot)
-            self.distanceTravelled = 0
+        return getDistance(position, robot.getPosition()) < self.STUCK_DISTANCE
 
     def wander(self, robot):
         """
         Random behaviour, avoiding obstacles
         :param robot: Robot object
         """
-        self.cartographer.update(robot)
         run = True
         while run:
             robot.setMotion(0, 2 * pi * random())
-            time.sleep(1)
+            self.scheduler.start()
+            for _ in range(int(1 / self.PERIOD)):
+                self.sense(robot)
+                self.scheduler.wait()
             robot.setMotion(0, 0)
-            self.cartographer.update(robot)
-            if not self.checkObstacle(robot):
+            if not self.checkObstacle(robot, self.sense(robot)):
                 run = False
-                for _ in range(self.WANDERING_DISTANCE):
-                    robot.setMotion(self.OBSTACLE_MAX_DIST * 2, 0)
-                    time.sleep(0.5)
-                    robot.setMotion(0, 0)
-                    self.checkDistanceTravelled(robot, self.OBSTACLE_MAX_DIST)
-                    if self.checkObstacle(robot):
-                        break
+        speed = self.OBSTACLE_MAX_DIST * 2
+        robot.setMotion(speed, 0)
+        self.scheduler.start()
+        checkpoint, checkTime = robot.getPosition(), self.clock.now()
+        # the robot goes straight for WANDERING_DISTANCE half-seconds
+        for _ in range(int(self.WANDERING_DISTANCE * 0.5 / self.PERIOD)):
+            self.scheduler.wait()
+            snapshot = self.sense(robot)
+            if self.checkObstacle(robot, snapshot):
+                return
+            if self.clock.now() - checkTime >= self.time:
+                if self.isStuck(snapshot, checkpoint):
+                    break
+                checkpoint, checkTime = snapshot.getPosition(), self.clock.now()
+        robot.setMotion(0, 0)
+
+
+def getSteering(position, heading, destination, speed, turnRate):
+    """
+    Pure pursuit : the arc of circle tangent to the heading reaching the destination, or a turn on the spot if the
+    destination is behind the robot. The robot turns as fast as on the arc at full speed, but slows down as the
+    heading error grows : it faces the destination before driving the wide arcs that cut the corners
+    :param position: quaternion
+    :param heading: the heading of the robot
+    :param destination: quaternion
+    :param speed: the linear speed along the arc when the robot faces the destination
+    :param turnRate: the maximum turn rate (radians/s), the one of a turn on the spot
+    :return: the linear speed and the turn rate to send, and the angle toward the destination
+    """
+    distance = getDistance(position, destination)
+    alpha = getAlpha(position, destination, heading) if distance > 0 else 0
+    if abs(alpha) > pi:
+        return 0, sign(alpha) * turnRate, alpha
+    if distance == 0:
+        return speed, 0, alpha
+    arcTurnRate = 2 * speed * sin(alpha / 2) / distance
+    # alpha is twice the heading error
+    return speed * cos(alpha / 2), sign(arcTurnRate) * min(turnRate, abs(arcTurnRate)), alpha
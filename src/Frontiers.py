@@ -0,0 +1,206 @@
+import numpy as np
+from scipy import ndimage
+from TiledGrid import TiledGrid
+
+
+class Frontiers:
+    """
+    This class stores the frontiers of a map : groups of empty squares having at least 1 unknown neighbor (Von Neumann),
+    connected to each other (Moore)
+    """
+
+    def __init__(self, labels, ids, sizes, medians, centroids, squares=None):
+        """
+        :param labels: integer array (or TiledGrid) of the grid's shape, id of the frontier of each square
+        (0 if not on a frontier)
+        :param ids: integer array, id of each frontier
+        :param sizes: integer array, number of squares of each frontier
+        :param medians: integer array of shape (n, 2), median row and median column of each frontier
+        :param centroids: float array of shape (n, 2), mean row and mean column of each frontier
+        :param squares: dictionary id -> (rows, cols) of the frontier's squares, grouped from labels if not given
+        """
+        self.labels = labels
+        self.ids = ids
+        self.sizes = sizes
+        self.medians = medians
+        self.centroids = centroids
+        self.squares = squares
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def getSquares(self, index):
+        """
+        :param index: a frontier number (between 0 and len(self) - 1)
+        :return: the list of squares (pairs) of the frontier
+        """
+        if self.squares is None:
+            self.squares = groupSquares(self.labels)
+        rows, cols = self.squares[int(self.ids[index])]
+        return list(zip(rows.tolist(), cols.tolist()))
+
+
+class FrontierIndex:
+    """
+    This class keeps the frontiers of the cartographer's map up to date : only the region of the map changed since
+    the last refresh is processed, the frontiers crossing it are merged or split as needed
+    """
+
+    def __init__(self, cartographer):
+        self.cartographer = cartographer
+        self.version = None
+        self.labels = None
+        # id -> (rows, cols) of the frontier's squares
+        self.squares = {}
+        # id -> (size, median, centroid) of the frontier
+        self.statistics = {}
+        self.nextId = 1
+        self.frontiers = None
+
+    def refresh(self):
+        """
+        Brings the frontiers up to date with the cartographer's map
+        """
+        carto = self.cartographer
+        if self.version is None or self.labels.shape != carto.map.shape:
+            # the labels of a tiled map are tiled too : only the tiles with frontiers are allocated
+            if carto.tiled:
+                self.labels = TiledGrid(carto.map.shape, np.int32, 0, carto.map.TILE_SIZE)
+            else:
+                self.labels = np.zeros(carto.map.shape, dtype=np.int32)
+            self.squares = {}
+            self.statistics = {}
+            self.updateWindow((0, self.labels.shape[0], 0, self.labels.shape[1]))
+        else:
+            window = carto.getChangesSince(self.version)
+            if window is not None:
+                self.updateWindow(window)
+        self.version = carto.version
+
+    def updateWindow(self, window):
+        """
+        Recomputes the frontiers around a window where the state of some squares changed
+        :param window: (rowMin, rowMax, colMin, colMax), max excluded
+        """
+        carto = self.cartographer
+        width, height = self.labels.shape
+        # A square's membership depends on its neighbors : the mask changes at most 1 square around the window
+        rowMin, rowMax = max(0, window[0] - 1), min(width, window[1] + 1)
+        colMin, colMax = max(0, window[2] - 1), min(height, window[3] + 1)
+        statesWindow = (max(0, rowMin - 1), min(width, rowMax + 1), max(0, colMin - 1), min(height, colMax + 1))
+        mask = getFrontierMask(carto.getStates(statesWindow), carto.EMPTY, carto.UNKNOWN)
+        mask = mask[rowMin - statesWindow[0]:rowMax - statesWindow[0], colMin - statesWindow[2]:colMax - statesWindow[2]]
+
+        # The frontiers touching the mask's window (or next to it) may be merged or split
+        touching = self.labels[statesWindow[0]:statesWindow[1], statesWindow[2]:statesWindow[3]]
+        rows, cols = [], []
+        for id in np.unique(touching[touching > 0]).tolist():
+            oldRows, oldCols = self.squares.pop(id)
+            del self.statistics[id]
+            self.labels[oldRows, oldCols] = 0
+            outside = (oldRows < rowMin) | (oldRows >= rowMax) | (oldCols < colMin) | (oldCols >= colMax)
+            rows.append(oldRows[outside])
+            cols.append(oldCols[outside])
+        newRows, newCols = np.nonzero(mask)
+        rows = np.concatenate(rows + [newRows + rowMin])
+        cols = np.concatenate(cols + [newCols + colMin])
+        self.frontiers = None
+        if len(rows) == 0:
+            return
+
+        # Label the squares to process in the smallest box containing them
+        top, left = rows.min(), cols.min()
+        box = np.zeros((rows.max() - top + 1, cols.max() - left + 1), dtype=bool)
+        box[rows - top, cols - left] = True
+        boxLabels, count = ndimage.label(box, structure=np.ones((3, 3)))
+        ids = boxLabels[rows - top, cols - left] - 1
+        sizes, medians, centroids = getStatistics(rows, cols, ids, count)
+        order = np.argsort(ids, kind='stable')
+        starts = np.cumsum(sizes) - sizes
+        for i in range(count):
+            group = order[starts[i]:starts[i] + sizes[i]]
+            self.labels[rows[group], cols[group]] = self.nextId
+            self.squares[self.nextId] = (rows[group], cols[group])
+            self.statistics[self.nextId] = (sizes[i], medians[i], centroids[i])
+            self.nextId += 1
+
+    def getFrontiers(self):
+        """
+        The cost of this query only depends on the number of frontiers (refresh needs to be called first)
+        :return: Frontiers object
+        """
+        if self.frontiers is None:
+            ids = np.array(list(self.statistics.keys()), dtype=np.int64)
+            statistics = list(self.statistics.values())
+            self.frontiers = Frontiers(self.labels, ids,
+                                       np.array([s[0] for s in statistics], dtype=np.int64),
+                                       np.array([s[1] for s in statistics], dtype=np.int64).reshape(-1, 2),
+                                       np.array([s[2] for s in statistics], dtype=float).reshape(-1, 2),
+                                       dict(self.squares))
+        return self.frontiers
+
+
+def getFrontierMask(states, empty, unknown):
+    """
+    Classifies the whole grid at once
+    :param states: integer array, the state of every square
+    :param empty: the value of the EMPTY state
+    :param unknown: the value of the UNKNOWN state
+    :return: a boolean array, True for the empty squares having at least 1 unknown neighbor (Von Neumann)
+    """
+    isUnknown = states == unknown
+    unknownNeighbor = np.zeros_like(isUnknown)
+    unknownNeighbor[1:, :] |= isUnknown[:-1, :]
+    unknownNeighbor[:-1, :] |= isUnknown[1:, :]
+    unknownNeighbor[:, 1:] |= isUnknown[:, :-1]
+    unknownNeighbor[:, :-1] |= isUnknown[:, 1:]
+    return (states == empty) & unknownNeighbor
+
+
+def getStatistics(rows, cols, ids, count):
+    """
+    Computes the size, median and centroid of groups of squares
+    :param rows: integer array, row of each square
+    :param cols: integer array, column of each square
+    :param ids: integer array, group (between 0 and count - 1) of each square
+    :param count: the number of groups
+    :return: sizes, medians and centroids arrays (see Frontiers)
+    """
+    sizes = np.bincount(ids, minlength=count)
+    centroids = np.stack((np.bincount(ids, rows, count), np.bincount(ids, cols, count)), axis=1) \
+        / np.maximum(sizes, 1)[:, np.newaxis]
+    # The rows and the columns are sorted separately and the middle ones are picked
+    middles = np.cumsum(sizes) - sizes + sizes // 2
+    middles = middles[sizes > 0]
+    medians = np.zeros((count, 2), dtype=np.int64)
+    medians[sizes > 0, 0] = rows[np.lexsort((rows, ids))][middles]
+    medians[sizes > 0, 1] = cols[np.lexsort((cols, ids))][middles]
+    return sizes, medians, centroids
+
+
+def groupSquares(labels):
+    """
+    Groups the squares of every frontier in a single pass over the grid
+    :param labels: integer array, id of the frontier of each square (0 if not on a frontier)
+    :return: dictionary id -> (rows, cols) of the frontier's squares
+    """
+    rows, cols = np.nonzero(labels)
+    ids = labels[rows, cols]
+    order = np.argsort(ids, kind='stable')
+    ids, starts = np.unique(ids[order], return_index=True)
+    groups = np.split(order, starts[1:])
+    return {id: (rows[group], cols[group]) for id, group in zip(ids.tolist(), groups)}
+
+
+def extractFrontiers(states, empty, unknown):
+    """
+    Finds all the frontiers of a map, using connected components labeling
+    :param states: integer array, the state of every square
+    :param empty: the value of the EMPTY state
+    :param unknown: the value of the UNKNOWN state
+    :return: Frontiers object
+    """
+    labels, count = ndimage.label(getFrontierMask(states, empty, unknown), structure=np.ones((3, 3)))
+    rows, cols = np.nonzero(labels)
+    sizes, medians, centroids = getStatistics(rows, cols, labels[rows, cols] - 1, count)
+    return Frontiers(labels, np.arange(1, count + 1), sizes, medians, centroids)
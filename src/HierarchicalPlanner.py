@@ -0,0 +1,297 @@
+import heapq
+import numpy as np
+from math import inf
+from scipy.sparse.csgraph import dijkstra
+from PathPlanner import MOVES, getGridGraph, octileDistance
+
+
+class Cluster:
+    """
+    A square block of the grid : the graph of its squares and the shortest paths (inside the cluster) between its
+    entrances, the squares of its borders through which the robot can go to the neighboring clusters
+    """
+
+    def __init__(self, window, blocked, entrances):
+        """
+        :param window: (rowMin, rowMax, colMin, colMax) of the cluster in the grid, max excluded
+        :param blocked: boolean array of the cluster's shape, True for the squares the robot cannot go through
+        :param entrances: dictionary entrance (square) -> list of the squares of the neighboring clusters
+        it leads to
+        """
+        self.window = window
+        self.height = window[3] - window[2]
+        self.entrances = entrances
+        self.graph = getGridGraph(blocked)
+        # entrance -> list of (other entrance, cost)
+        self.edges = {entrance: [] for entrance in entrances}
+        if entrances:
+            squares = list(entrances)
+            self.costs, self.predecessors = dijkstra(self.graph, indices=[self.getIndex(s) for s in squares],
+                                                     return_predecessors=True)
+            for i, entrance in enumerate(squares):
+                for j, other in enumerate(squares):
+                    cost = self.costs[i, self.getIndex(other)]
+                    if i != j and cost < inf:
+                        self.edges[entrance].append((other, cost))
+            self.rows = {entrance: i for i, entrance in enumerate(squares)}
+
+    def getIndex(self, square):
+        return (square[0] - self.window[0]) * self.height + square[1] - self.window[2]
+
+    def getSquare(self, index):
+        row, col = divmod(int(index), self.height)
+        return row + self.window[0], col + self.window[2]
+
+    def search(self, square, reverse=False):
+        """
+        Shortest paths inside the cluster from a square (or toward it if reverse)
+        :return: the costs and the predecessors (successors if reverse) of every square of the cluster
+        """
+        graph = self.graph.T.tocsr() if reverse else self.graph
+        return dijkstra(graph, indices=self.getIndex(square), return_predecessors=True)
+
+    def getPath(self, predecessors, source, target, reverse=False):
+        """
+        :param predecessors: predecessors found by a search from source (toward target if reverse)
+        :return: the list of squares from source (not included) to target
+        """
+        path = []
+        if reverse:
+            index = self.getIndex(source)
+            while index != self.getIndex(target):
+                index = predecessors[index]
+                path.append(self.getSquare(index))
+            return path
+        index = self.getIndex(target)
+        while index != self.getIndex(source):
+            path.append(self.getSquare(index))
+            index = predecessors[index]
+        path.reverse()
+        return path
+
+
+class HierarchicalPlanner:
+    """
+    Plans on an abstraction of the configuration space : the grid is divided in square clusters, linked by
+    entrances on their borders. A path is searched between entrances first, then refined inside each cluster
+    it goes through. Clusters and borders are computed when first needed and forgotten where the map changed
+    """
+
+    def __init__(self, cartographer, clusterSize=16):
+        """
+        :param cartographer: Cartographer object
+        :param clusterSize: number of squares per side of a cluster
+        """
+        self.cartographer = cartographer
+        self.CLUSTER_SIZE = clusterSize
+        self.version = None
+        self.shape = None
+        # (cluster row, cluster col) -> Cluster
+        self.clusters = {}
+        # (cluster, neighboring cluster below or on the right) -> list of (square, square) entrance pairs
+        self.borders = {}
+
+    def refresh(self):
+        """
+        Forgets the clusters and the borders where the configuration space changed since the last refresh
+        """
+        carto = self.cartographer
+        if self.version is None or self.shape != carto.map.shape:
+            self.shape = carto.map.shape
+            self.clusters = {}
+            self.borders = {}
+        else:
+            window = carto.getChangesSince(self.version)
+            if window is not None:
+                self.invalidate(window)
+        self.version = carto.version
+
+    def invalidate(self, window):
+        """
+        :param window: (rowMin, rowMax, colMin, colMax), max excluded, where the configuration space changed
+        """
+        size = self.CLUSTER_SIZE
+        # A border depends on the squares on each side of it
+        rows = range(max(0, window[0] - 1) // size, (window[1] + 1) // size + 1)
+        cols = range(max(0, window[2] - 1) // size, (window[3] + 1) // size + 1)
+        for row in rows:
+            for col in cols:
+                for neighbor in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)):
+                    self.borders.pop((min((row, col), neighbor), max((row, col), neighbor)), None)
+                    # the entrances of the neighbors may have changed
+                    self.clusters.pop(neighbor, None)
+                self.clusters.pop((row, col), None)
+
+    def getWindow(self, cluster):
+        """
+        :param cluster: (cluster row, cluster col)
+        :return: the window (rowMin, rowMax, colMin, colMax) of the cluster, max excluded
+        """
+        size = self.CLUSTER_SIZE
+        return cluster[0] * size, min(self.shape[0], (cluster[0] + 1) * size), \
+            cluster[1] * size, min(self.shape[1], (cluster[1] + 1) * size)
+
+    def getClusterOf(self, square):
+        return square[0] // self.CLUSTER_SIZE, square[1] // self.CLUSTER_SIZE
+
+    def getBorder(self, first, second):
+        """
+        Finds the entrances between two neighboring clusters : one in the middle of every passage
+        :param first: a cluster
+        :param second: the cluster below or on the right of first
+        :return: list of (square of first, square of second)
+        """
+        key = (first, second)
+        if key not in self.borders:
+            window = self.getWindow(first)
+            entrances = []
+            if first[0] != second[0]:
+                # horizontal border : last row of first, first row of second
+                if window[1] < self.shape[0]:
+                    blocked = self.cartographer.getBlocked((window[1] - 1, window[1] + 1, window[2], window[3]))
+                    for middle in getPassages(~blocked[0] & ~blocked[1]):
+                        col = window[2] + middle
+                        entrances.append(((window[1] - 1, col), (window[1], col)))
+            elif window[3] < self.shape[1]:
+                # vertical border : last column of first, first column of second
+                blocked = self.cartographer.getBlocked((window[0], window[1], window[3] - 1, window[3] + 1))
+                for middle in getPassages(~blocked[:, 0] & ~blocked[:, 1]):
+                    row = window[0] + middle
+                    entrances.append(((row, window[3] - 1), (row, window[3])))
+            self.borders[key] = entrances
+        return self.borders[key]
+
+    def getCluster(self, cluster):
+        """
+        :param cluster: (cluster row, cluster col)
+        :return: the Cluster, computed if needed
+        """
+        if cluster not in self.clusters:
+            row, col = cluster
+            entrances = {}
+            for neighbor in ((row - 1, col), (row, col - 1), (row + 1, col), (row, col + 1)):
+                if neighbor[0] < 0 or neighbor[1] < 0:
+                    continue
+                isFirst = neighbor > cluster
+                for pair in self.getBorder(*((cluster, neighbor) if isFirst else (neighbor, cluster))):
+                    entrance, other = pair if isFirst else pair[::-1]
+                    entrances.setdefault(entrance, []).append(other)
+            window = self.getWindow(cluster)
+            self.clusters[cluster] = Cluster(window, self.cartographer.getBlocked(window), entrances)
+        return self.clusters[cluster]
+
+    def getFirstMoves(self, start):
+        """
+        :param start: a square (pair)
+        :return: list of (neighbor, cost of the move), for the moves allowed by findPath from start
+        """
+        window = self.cartographer.expandWindow((start[0], start[0] + 1, start[1], start[1] + 1), 1)
+        blocked = self.cartographer.getBlocked(window)
+        row, col = start[0] - window[0], start[1] - window[2]
+        moves = []
+        for (i, j, moveCost) in MOVES:
+            if not (0 <= row + i < blocked.shape[0] and 0 <= col + j < blocked.shape[1]) or blocked[row + i, col + j]:
+                continue
+            # Diagonal moves are only allowed if both squares next to the corner are free
+            if i != 0 and j != 0 and (blocked[row, col + j] or blocked[row + i, col]):
+                continue
+            moves.append(((start[0] + i, start[1] + j), moveCost))
+        return moves
+
+    def findPath(self, start, goal):
+        """
+        Same contract as PathPlanner.findPath on the cartographer's configuration space, the path is close
+        to the shortest one
+        :param start: a square (pair)
+        :param goal: a square (pair)
+        :return: a list of neighboring squares from start (not included) to goal, None if there is no path
+        """
+        self.refresh()
+        width, height = self.shape
+        start, goal = tuple(start), tuple(goal)
+        if not (0 <= start[0] < width and 0 <= start[1] < height and 0 <= goal[0] < width and 0 <= goal[1] < height):
+            return None
+        if self.cartographer.isBlocked(goal):
+            return None
+        if start == goal:
+            return [goal]
+        goalCluster = self.getCluster(self.getClusterOf(goal))
+        goalCosts, goalSuccessors = goalCluster.search(goal, reverse=True)
+        # Like findPath, the robot may leave a blocked square : its first moves (which may leave its cluster)
+        # are made on their own, and the squares they lead to are searched from instead
+        firstMoves = self.getFirstMoves(start) if self.cartographer.isBlocked(start) else None
+        sources = {start} if firstMoves is None else {square for (square, _) in firstMoves}
+        # source -> (costs, predecessors) of the search from it inside its cluster
+        searches = {}
+
+        def getNeighbors(node):
+            """:return: list of (neighbor, cost, how to refine the move)"""
+            if node == start and firstMoves is not None:
+                return [(square, moveCost, 'first') for (square, moveCost) in firstMoves]
+            cluster = self.getCluster(self.getClusterOf(node))
+            neighbors = [(other, 1, 'border') for other in cluster.entrances.get(node, [])]
+            if node in sources:
+                if node not in searches:
+                    searches[node] = cluster.search(node)
+                sourceCosts = searches[node][0]
+                neighbors += [(entrance, sourceCosts[cluster.getIndex(entrance)], 'start')
+                              for entrance in cluster.entrances if sourceCosts[cluster.getIndex(entrance)] < inf]
+                if cluster is goalCluster and sourceCosts[cluster.getIndex(goal)] < inf:
+                    neighbors.append((goal, sourceCosts[cluster.getIndex(goal)], 'start'))
+            else:
+                neighbors += [(other, cost, 'cluster') for (other, cost) in cluster.edges.get(node, [])]
+                if cluster is goalCluster and goalCosts[cluster.getIndex(node)] < inf:
+                    neighbors.append((goal, goalCosts[cluster.getIndex(node)], 'goal'))
+            return neighbors
+
+        # A* on the entrances
+        costs = {start: 0}
+        parents = {start: None}
+        heap = [(0, 0, start)]
+        while heap:
+            _, nodeCost, node = heapq.heappop(heap)
+            nodeCost = -nodeCost
+            if node == goal:
+                break
+            if nodeCost > costs[node]:
+                continue
+            for neighbor, moveCost, move in getNeighbors(node):
+                neighborCost = nodeCost + moveCost
+                if neighborCost < costs.get(neighbor, inf):
+                    costs[neighbor] = neighborCost
+                    parents[neighbor] = (node, move)
+                    priority = neighborCost + octileDistance(abs(goal[0] - neighbor[0]), abs(goal[1] - neighbor[1]))
+                    heapq.heappush(heap, (round(priority, 6), -neighborCost, neighbor))
+        if goal not in parents:
+            return None
+
+        # Refine every move of the abstract path into squares
+        moves = []
+        node = goal
+        while parents[node] is not None:
+            parent, move = parents[node]
+            moves.append((parent, node, move))
+            node = parent
+        path = []
+        for (source, target, move) in reversed(moves):
+            if move in ('border', 'first'):
+                path.append(target)
+            elif move == 'start':
+                path += self.getCluster(self.getClusterOf(source)).getPath(searches[source][1], source, target)
+            elif move == 'goal':
+                path += goalCluster.getPath(goalSuccessors, source, target, reverse=True)
+            else:
+                cluster = self.getCluster(self.getClusterOf(source))
+                path += cluster.getPath(cluster.predecessors[cluster.rows[source]], source, target)
+        return path
+
+
+def getPassages(free):
+    """
+    :param free: boolean array, the squares of a border the robot can go through (on both sides)
+    :return: list of the indices of the middle of each run of free squares
+    """
+    edges = np.diff(np.concatenate(([0], free.astype(np.int8), [0])))
+    starts = np.nonzero(edges == 1)[0]
+    ends = np.nonzero(edges == -1)[0]
+    return ((starts + ends - 1) // 2).tolist()
@@ -0,0 +1,276 @@
+import heapq
+import numpy as np
+from math import inf, hypot
+from PathPlanner import MOVES, octileDistance
+
+
+class Costs(dict):
+    """
+    Costs of the squares reached by the search, the others cost inf
+    """
+
+    def __missing__(self, index):
+        return inf
+
+
+class BlockedSquares(dict):
+    """
+    Copy of the squares of the configuration space read by the search, made when they are first read
+    """
+
+    def __init__(self, cartographer, height):
+        super().__init__()
+        self.cartographer = cartographer
+        self.height = height
+
+    def __missing__(self, index):
+        value = self[index] = bool(self.cartographer.isBlocked(divmod(index, self.height)))
+        return value
+
+
+class IncrementalPlanner:
+    """
+    Plans with D* Lite on the cartographer's configuration space : the search starts from the destination and stops
+    as soon as the cost of the robot's square is known. It is kept between the calls for the same destination : when
+    the robot moves or squares of the configuration space change, only the part of the search they affect is repaired
+    """
+
+    def __init__(self, cartographer):
+        """
+        :param cartographer: Cartographer object
+        """
+        self.cartographer = cartographer
+        # costs differing by less are equal : the moves are not always added in the same order
+        self.TOLERANCE = 1e-9
+        self.goal = None
+        self.goalIndex = None
+        self.version = None
+        self.shape = None
+        self.width = self.height = 0
+        # the search does not leave this window (see Cartographer.getKnownWindow), fixed when it starts
+        self.window = None
+        self.isBlocked = None
+        self.g = self.rhs = None
+        # key of each square in the heap, the squares not in it are missing
+        self.keys = None
+        self.heap = []
+        self.start = None
+        self.lastStart = None
+        # sum of the heuristic values between the successive starts, added to the keys instead of computing them again
+        self.km = 0
+
+    def reset(self, start, goal):
+        """
+        Starts a new search toward goal, from the goal only : the costs of the other squares are found when needed
+        :param start: a square (pair)
+        :param goal: a square (pair)
+        """
+        carto = self.cartographer
+        self.shape = carto.map.shape
+        self.width, self.height = self.shape
+        self.window = carto.getKnownWindow([start, goal])
+        self.isBlocked = BlockedSquares(carto, self.height)
+        self.version = carto.version
+        self.goal = goal
+        self.goalIndex = goal[0] * self.height + goal[1]
+        self.g = Costs()
+        self.rhs = Costs()
+        self.rhs[self.goalIndex] = 0
+        self.keys = {}
+        self.heap = []
+        self.start = start
+        self.lastStart = None
+        self.km = 0
+        self.push(self.goalIndex)
+
+    def refresh(self):
+        """
+        Finds the squares read by the search whose state changed since the last refresh, and repairs the search
+        around them
+        :return: the number of squares changed
+        """
+        carto = self.cartographer
+        window = carto.getChangesSince(self.version)
+        self.version = carto.version
+        if window is None or not self.isBlocked:
+            return 0
+        indices = np.fromiter(self.isBlocked.keys(), dtype=np.int64, count=len(self.isBlocked))
+        before = np.fromiter(self.isBlocked.values(), dtype=bool, count=len(self.isBlocked))
+        rows, cols = np.divmod(indices, self.height)
+        inWindow = (rows >= window[0]) & (rows < window[1]) & (cols >= window[2]) & (cols < window[3])
+        current = np.asarray(carto.getBlocked(window), dtype=bool)
+        now = current[np.where(inWindow, rows - window[0], 0), np.where(inWindow, cols - window[2], 0)]
+        changedIndices = indices[inWindow & (now != before)]
+        changed = set()
+        for index in changedIndices.tolist():
+            self.isBlocked[index] = not self.isBlocked[index]
+            row, col = divmod(index, self.height)
+            # The moves toward the square, and the diagonal moves around it, depend on it
+            for (i, j, _) in MOVES:
+                neighborRow, neighborCol = row + i, col + j
+                if self.isInside(neighborRow, neighborCol):
+                    changed.add(neighborRow * self.height + neighborCol)
+        for index in changed:
+            self.updateVertex(index)
+        return len(changedIndices)
+
+    def isInside(self, row, col):
+        """
+        :return: True iff the square is in the window of the search
+        """
+        return self.window[0] <= row < self.window[1] and self.window[2] <= col < self.window[3]
+
+    def getKey(self, index):
+        g, rhs = self.g[index], self.rhs[index]
+        value = min(g, rhs)
+        row, col = divmod(index, self.height)
+        heuristic = octileDistance(abs(row - self.start[0]), abs(col - self.start[1]))
+        # Rounding makes equivalent keys tie, instead of differing by floating point errors
+        priority = round(value + heuristic + self.km, 6)
+        # Among squares of equal priority, the ones whose cost increased come first, the shallowest first, as in
+        # D* Lite. The others come next, the deepest first like in findPath : the shallowest first goes through every
+        # square of every shortest path on an open grid
+        if g < rhs:
+            return priority, 0, round(value, 6)
+        return priority, 1, -round(value, 6)
+
+    def push(self, index):
+        key = self.getKey(index)
+        self.keys[index] = key
+        heapq.heappush(self.heap, (key, index))
+
+    def getSuccessors(self, index):
+        """
+        :return: generator of (neighbor, cost of the move), for the moves allowed by findPath from the square
+        """
+        row, col = divmod(index, self.height)
+        isBlocked = self.isBlocked
+        for (i, j, moveCost) in MOVES:
+            neighborRow, neighborCol = row + i, col + j
+            if not self.isInside(neighborRow, neighborCol):
+                continue
+            neighbor = neighborRow * self.height + neighborCol
+            if isBlocked[neighbor]:
+                continue
+            # Diagonal moves are only allowed if both squares next to the corner are free
+            if i != 0 and j != 0 and (isBlocked[row * self.height + neighborCol]
+                                      or isBlocked[neighborRow * self.height + col]):
+                continue
+            yield neighbor, moveCost
+
+    def getPredecessors(self, index):
+        """
+        :return: generator of (neighbor, cost of the move), for the moves allowed by findPath toward the square
+        """
+        isBlocked = self.isBlocked
+        if isBlocked[index]:
+            return
+        row, col = divmod(index, self.height)
+        for (i, j, moveCost) in MOVES:
+            neighborRow, neighborCol = row + i, col + j
+            if not self.isInside(neighborRow, neighborCol):
+                continue
+            if i != 0 and j != 0 and (isBlocked[row * self.height + neighborCol]
+                                      or isBlocked[neighborRow * self.height + col]):
+                continue
+            yield neighborRow * self.height + neighborCol, moveCost
+
+    def updateVertex(self, index, computeCost=True):
+        """
+        Puts the square in the heap if it is inconsistent
+        :param computeCost: True to compute again the cost of the square from its successors
+        """
+        if computeCost and index != self.goalIndex:
+            g = self.g
+            cost = min((moveCost + g[neighbor] for (neighbor, moveCost) in self.getSuccessors(index)), default=inf)
+            if cost < inf or index in self.rhs:
+                self.rhs[index] = cost
+        # the entries left in the heap are skipped when their key is not the square's one anymore
+        self.keys.pop(index, None)
+        if abs(self.g[index] - self.rhs[index]) > self.TOLERANCE:
+            self.push(index)
+
+    def computeShortestPath(self):
+        """
+        Expands the squares until the cost of the start is known
+        """
+        startIndex = self.start[0] * self.height + self.start[1]
+        heap, keys, g, rhs = self.heap, self.keys, self.g, self.rhs
+        tolerance = self.TOLERANCE
+        while heap:
+            key, index = heap[0]
+            if keys.get(index) != key:
+                heapq.heappop(heap)
+                continue
+            if not (key < self.getKey(startIndex) or abs(rhs[startIndex] - g[startIndex]) > tolerance):
+                break
+            heapq.heappop(heap)
+            del keys[index]
+            if key < self.getKey(index):
+                self.push(index)
+            elif g[index] > rhs[index]:
+                # the square's cost decreased : so may the cost of the squares leading to it
+                g[index] = rhs[index]
+                for (neighbor, moveCost) in self.getPredecessors(index):
+                    if moveCost + g[index] < rhs[neighbor] - tolerance and neighbor != self.goalIndex:
+                        rhs[neighbor] = moveCost + g[index]
+                        self.updateVertex(neighbor, False)
+            else:
+                # the square's cost increased : the squares whose cost may have come from it are computed again
+                g[index] = inf
+                self.updateVertex(index)
+                for (neighbor, _) in self.getPredecessors(index):
+                    self.updateVertex(neighbor)
+
+    def findPath(self, start, goal):
+        """
+        Same contract as PathPlanner.findPath on the cartographer's configuration space, limited to the known part
+        of the map when the search started (see Cartographer.getKnownWindow)
+        The search is kept if goal is the destination of the previous call (and the map did not grow)
+        :param start: a square (pair)
+        :param goal: a square (pair)
+        :return: a list of neighboring squares from start (not included) to goal, None if there is no path
+        """
+        carto = self.cartographer
+        start, goal = tuple(start), tuple(goal)
+        width, height = carto.map.shape
+        if not (0 <= start[0] < width and 0 <= start[1] < height and 0 <= goal[0] < width and 0 <= goal[1] < height):
+            return None
+        if goal != self.goal or carto.map.shape != self.shape or not self.isInside(*start):
+            self.reset(start, goal)
+        else:
+            self.km += octileDistance(abs(start[0] - self.lastStart[0]), abs(start[1] - self.lastStart[1]))
+            self.start = start
+            self.refresh()
+        self.lastStart = start
+        if self.isBlocked[self.goalIndex]:
+            return None
+        if start == goal:
+            return [goal]
+        self.computeShortestPath()
+        return self.getPath()
+
+    def getPath(self):
+        """
+        Follows the cheapest moves from the start
+        :return: a list of neighboring squares from start (not included) to goal, None if there is no path
+        """
+        index = self.start[0] * self.height + self.start[1]
+        goalIndex = self.goalIndex
+        if self.rhs[index] == inf:
+            return None
+        goalRow, goalCol = self.goal
+        g, height = self.g, self.height
+
+        def getPriority(successor):
+            # among the moves of equal cost, the one toward the goal is taken, like the deepest squares in findPath
+            row, col = divmod(successor[0], height)
+            return round(successor[1] + g[successor[0]], 6), hypot(goalRow - row, goalCol - col)
+
+        path = []
+        while index != goalIndex:
+            index = min(self.getSuccessors(index), key=getPriority)[0]
+            if g[index] == inf or len(path) > self.width * self.height:
+                return None
+            path.append(divmod(index, self.height))
+        return path
@@ -3,20 +3,52 @@ from PlanningModule import PlanningModule
 from Navigator import Navigator
 from Controller import Controller
 from robot import Robot
+from SimRobot import SimRobot
+from SimWorld import SimWorld
+from Clock import VirtualClock
 from sys import argv
 
 
-def main():
-    _, url, x1, y1, x2, y2, showGUI = argv
-    robot = Robot(url)
-    cartographer = Cartographer(int(x1), int(x2), int(y1), int(y2), int(showGUI))
+def buildModules(robot, cartographer, clock=None):
+    """
+    Makes the first map update and builds the modules driving the exploration. The controller integrates the scans
+    in the map by a background thread, except on a VirtualClock where the simulation must not depend on the threads'
+    timing
+    :return: the controller, the navigator and the planning module
+    """
     cartographer.update(robot)
-    controller = Controller(cartographer)
+    controller = Controller(cartographer, clock)
     navigator = Navigator(controller, cartographer)
     planningModule = PlanningModule(cartographer, navigator, controller)
+    return controller, navigator, planningModule
+
+
+def explore(robot, planningModule):
+    """
+    Moves toward new destinations until there is nothing left to explore
+    """
     while True:
         if not planningModule.move(robot):
             break
+
+
+def main():
+    _, url, x1, y1, x2, y2, showGUI = argv[:7]
+    # optional : size of the tiles of a map growing beyond the given bounds
+    tileSize = int(argv[7]) if len(argv) > 7 else None
+    clock = None
+    if url == "sim":
+        # in-process simulated warehouse, running as fast as possible
+        clock = VirtualClock()
+        robot = SimRobot(SimWorld.warehouse(), clock)
+    else:
+        # position and heading are read many times per control step, one pose request is enough for them
+        robot = Robot(url, poseMaxAge=0.05)
+    # showGUI : 1 shows the map, 0 saves it to map.png every 5 s, -1 (headless) only saves it at the end
+    cartographer = Cartographer(int(x1), int(x2), int(y1), int(y2), int(showGUI), tileSize)
+    controller, navigator, planningModule = buildModules(robot, cartographer, clock)
+    explore(robot, planningModule)
+    controller.mapper.stop()
     cartographer.showMap.close()
 
 if __name__ == "__main__":
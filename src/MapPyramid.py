@@ -0,0 +1,107 @@
+import numpy as np
+from math import ceil
+
+
+class MapLevel:
+    """
+    A coarse version of the map : each square covers FACTOR x FACTOR squares of the map
+    """
+
+    def __init__(self, factor, occupied, unknown, blocked):
+        """
+        :param factor: number of map squares per side of a square of this level
+        :param occupied: boolean array, True for the squares containing at least one occupied square
+        :param unknown: boolean array, True for the squares containing at least one unknown square
+        :param blocked: boolean array, True for the squares containing at least one square of the configuration space
+        """
+        self.FACTOR = factor
+        self.occupied = occupied
+        self.unknown = unknown
+        self.blocked = blocked
+
+    def getSquare(self, square):
+        """
+        :param square: a pair (square of the map)
+        :return: the square of this level containing it
+        """
+        return square[0] // self.FACTOR, square[1] // self.FACTOR
+
+    def getWindow(self, square):
+        """
+        :param square: a pair (square of this level)
+        :return: the window (rowMin, rowMax, colMin, colMax) of the map covered by the square, max excluded
+        (not clipped to the map)
+        """
+        return square[0] * self.FACTOR, (square[0] + 1) * self.FACTOR, \
+            square[1] * self.FACTOR, (square[1] + 1) * self.FACTOR
+
+
+class MapPyramid:
+    """
+    This class keeps coarser versions of the cartographer's map up to date : each level halves the resolution of
+    the previous one. The cartographer hands it the window of every change (see Cartographer.recordChange), only the
+    squares of the levels covering it are reduced again
+    """
+
+    def __init__(self, cartographer, levelCount=3):
+        """
+        :param cartographer: Cartographer object, whose map, states and configuration space exist
+        :param levelCount: number of levels, their factors are 2, 4, 8...
+        """
+        self.cartographer = cartographer
+        self.FACTORS = [2 ** (i + 1) for i in range(levelCount)]
+        self.shape = None
+        self.levels = {}
+        self.reset()
+
+    def reset(self):
+        """
+        Reduces the whole map again, when its shape changed
+        """
+        self.shape = self.cartographer.map.shape
+        self.levels = {}
+        size = self.shape
+        for factor in self.FACTORS:
+            size = (ceil(size[0] / 2), ceil(size[1] / 2))
+            self.levels[factor] = MapLevel(factor, np.zeros(size, dtype=bool), np.zeros(size, dtype=bool),
+                                           np.zeros(size, dtype=bool))
+        self.updateWindow((0, self.shape[0], 0, self.shape[1]))
+
+    def updateWindow(self, window):
+        """
+        Reduces again the squares of every level covering a window of the map
+        :param window: (rowMin, rowMax, colMin, colMax), max excluded
+        """
+        carto = self.cartographer
+        # Align the window on the squares of the coarsest level, so that every level is reduced from whole blocks
+        factor = self.FACTORS[-1]
+        window = (window[0] // factor * factor, min(self.shape[0], ceil(window[1] / factor) * factor),
+                  window[2] // factor * factor, min(self.shape[1], ceil(window[3] / factor) * factor))
+        states = carto.getStates(window)
+        layers = (states == carto.OCCUPIED, states == carto.UNKNOWN, carto.getBlocked(window))
+        for factor in self.FACTORS:
+            layers = tuple(reduceBlocks(layer) for layer in layers)
+            level = self.levels[factor]
+            rows = slice(window[0] // factor, window[0] // factor + layers[0].shape[0])
+            cols = slice(window[2] // factor, window[2] // factor + layers[0].shape[1])
+            level.occupied[rows, cols] = layers[0]
+            level.unknown[rows, cols] = layers[1]
+            level.blocked[rows, cols] = layers[2]
+
+    def getLevel(self, factor):
+        """
+        :param factor: one of FACTORS
+        :return: the MapLevel, up to date with the map (its readers should hold the cartographer's lock)
+        """
+        return self.levels[factor]
+
+
+def reduceBlocks(layer):
+    """
+    :param layer: boolean array
+    :return: boolean array of half the size (rounded up), True where one of the 2 x 2 squares of layer is True
+    """
+    rows, cols = layer.shape
+    padded = np.zeros((rows + rows % 2, cols + cols % 2), dtype=bool)
+    padded[:rows, :cols] = layer
+    return padded.reshape(padded.shape[0] // 2, 2, padded.shape[1] // 2, 2).any(axis=(1, 3))
@@ -0,0 +1,216 @@
+"""
+Renders the map in a separate process, so that mapping and control never wait on matplotlib.
+The map is converted to gray levels into one of two shared buffers and handed to the renderer through a
+bounded queue : while the renderer draws one buffer, the next map is written into the other one, and a frame
+still waiting in the queue when a newer one is ready is replaced by it.
+
+In headless mode, the map is neither drawn nor saved until asked, and matplotlib is never imported.
+"""
+
+import atexit
+import multiprocessing
+import queue
+import time
+import numpy as np
+from multiprocessing import shared_memory
+from show_map import getPixels, saveMap
+
+# values of showGUI
+HEADLESS = -1
+SAVE_ONLY = 0
+WINDOW = 1
+
+
+def createRenderer(gridHeight, gridWidth, showGUI):
+    """
+    :param showGUI: WINDOW to show the map, SAVE_ONLY to save it to map.png every 5 seconds,
+    HEADLESS to save it only when closing
+    :return: the renderer of the map
+    """
+    if showGUI == HEADLESS:
+        return HeadlessRenderer()
+    return MapRenderer(gridHeight, gridWidth, showGUI == WINDOW)
+
+
+def render(bufferNames, shape, showGUI, mapName, frames, released):
+    """
+    Main function of the renderer process : shows the frames until it receives None
+    :param bufferNames: names of the shared memory buffers
+    :param shape: shape of the map
+    :param frames: queue of the frames to show, as (buffer index, robot row, robot col)
+    :param released: queue of the indices of the buffers that can be written again
+    """
+    from show_map import ShowMap
+    buffers = [shared_memory.SharedMemory(name) for name in bufferNames]
+    pixels = [np.ndarray(shape, dtype=np.uint8, buffer=buffer.buf) for buffer in buffers]
+    showMap = ShowMap(shape[0], shape[1], showGUI, maxFrameRate=None, mapName=mapName)
+    while True:
+        try:
+            frame = frames.get(timeout=0.05)
+        except queue.Empty:
+            showMap.processEvents()
+            continue
+        if frame is None:
+            break
+        index, row, col = frame
+        # the map is copied so that the buffer can be released before the (slow) drawing
+        showMap.showPixels(pixels[index].copy(), row, col)
+        released.put(index)
+    showMap.close()
+    del pixels
+    for buffer in buffers:
+        buffer.close()
+
+
+class MapRenderer:
+    """
+    Stands for ShowMap in the mapping process : same updateMap and close methods, the drawing and the saving of
+    the map happen in the renderer process. The process is started by the first update
+    """
+    def __init__(self, gridHeight, gridWidth, showGUI, maxFrameRate=10):
+        """
+        :param gridHeight: the number of rows of the map
+        :param gridWidth: the number of columns of the map
+        :param showGUI: True to show the map in a window
+        :param maxFrameRate: the maximum number of frames per second sent to the renderer
+        """
+        # maximum time to wait for the renderer when closing (seconds)
+        self.TIMEOUT = 5
+        self.mapName = 'map.png'
+        self.shape = (gridHeight, gridWidth)
+        self.showGUI = showGUI
+        self.maxFrameRate = maxFrameRate
+        self.process = None
+        self.lastFrame = None
+        # last update, not sent yet because of the frame rate limit
+        self.pending = None
+        self.grid = None
+        self.maxValue = None
+
+    def start(self):
+        context = multiprocessing.get_context('spawn')
+        size = self.shape[0] * self.shape[1]
+        self.buffers = [shared_memory.SharedMemory(create=True, size=size) for _ in range(2)]
+        self.pixels = [np.ndarray(self.shape, dtype=np.uint8, buffer=buffer.buf) for buffer in self.buffers]
+        self.free = [0, 1]
+        # one frame at most waits for the renderer
+        self.frames = context.Queue(maxsize=1)
+        self.released = context.Queue()
+        self.process = context.Process(target=render, daemon=True,
+                                       args=([buffer.name for buffer in self.buffers], self.shape, self.showGUI,
+                                             self.mapName, self.frames, self.released))
+        self.process.start()
+        # the last map is saved and the shared buffers are freed even if close is never called
+        atexit.register(self.close)
+
+    def updateMap(self, grid, maxValue, robot_row, robot_col):
+        """
+        Sends the map to the renderer, never waits for it
+        :param grid: the map
+        :param maxValue: the max value that is used in the grid
+        :param robot_row: the current position of the robot in grid row
+        :param robot_col: the current position of the robot in grid column
+        """
+        if tuple(grid.shape) != self.shape:
+            # the map grew : the renderer starts over with the new size
+            self.pending = None
+            self.close()
+            self.shape = tuple(grid.shape)
+        self.grid = grid
+        self.maxValue = maxValue
+        now = time.monotonic()
+        if self.maxFrameRate and self.lastFrame is not None and now - self.lastFrame < 1.0 / self.maxFrameRate:
+            self.pending = (robot_row, robot_col)
+            return
+        if self.process is None:
+            self.start()
+        if self.sendFrame(robot_row, robot_col):
+            self.lastFrame = now
+            self.pending = None
+        else:
+            self.pending = (robot_row, robot_col)
+
+    def sendFrame(self, robot_row, robot_col, block=False):
+        """
+        Writes the map in a free buffer and queues it
+        :return: False iff the frame was dropped because the renderer still holds both buffers
+        """
+        self.reclaimBuffers()
+        try:
+            # a frame still waiting for the renderer is stale : its buffer is reused for the new one
+            self.free.append(self.frames.get_nowait()[0])
+        except queue.Empty:
+            pass
+        if not self.free:
+            if not block:
+                return False
+            try:
+                self.free.append(self.released.get(timeout=self.TIMEOUT))
+            except queue.Empty:
+                return False
+        index = self.free.pop()
+        getPixels(self.grid, self.maxValue, out=self.pixels[index])
+        self.frames.put((index, int(robot_row), int(robot_col)))
+        return True
+
+    def reclaimBuffers(self):
+        """Takes back the buffers the renderer is done with"""
+        while True:
+            try:
+                self.free.append(self.released.get_nowait())
+            except queue.Empty:
+                return
+
+    def getImage(self):
+        """
+        :return: the last map received, as a grayscale PIL Image
+        """
+        from PIL import Image
+        return Image.fromarray(getPixels(self.grid, self.maxValue))
+
+    def close(self):
+        """Shows and saves the last map, then stops the renderer"""
+        if self.process is None:
+            return
+        if self.process.is_alive():
+            if self.pending is not None:
+                self.sendFrame(*self.pending, block=True)
+            self.frames.put(None)
+        self.process.join(self.TIMEOUT)
+        del self.pixels
+        for buffer in self.buffers:
+            buffer.close()
+            buffer.unlink()
+        self.process = None
+
+
+class HeadlessRenderer:
+    """
+    Stands for ShowMap without drawing anything : keeps a reference to the last map, which is only converted and
+    written to map.png by saveMap or close
+    """
+    def __init__(self):
+        self.mapName = 'map.png'
+        self.grid = None
+        self.maxValue = None
+        self.robotPosition = None
+
+    def updateMap(self, grid, maxValue, robot_row, robot_col):
+        self.grid = grid
+        self.maxValue = maxValue
+        self.robotPosition = (int(robot_row), int(robot_col))
+
+    def saveMap(self):
+        """Writes the last map to map.png"""
+        if self.grid is not None:
+            saveMap(getPixels(self.grid, self.maxValue), self.mapName, self.robotPosition)
+
+    def getImage(self):
+        """
+        :return: the last map received, as a grayscale PIL Image
+        """
+        from PIL import Image
+        return Image.fromarray(getPixels(self.grid, self.maxValue))
+
+    def close(self):
+        self.saveMap()
@@ -0,0 +1,78 @@
+"""
+Integrates the scans in the map in a background thread, so that mapping never slows the control loop down.
+Every scan handed to the worker is integrated, in the order they were read. The cartographer's lock is held
+during each integration : code reading the map through several calls holds it too, to see a consistent map.
+"""
+
+import queue
+import threading
+
+
+class MappingWorker:
+    def __init__(self, cartographer, background=True):
+        """
+        :param cartographer: Cartographer object
+        :param background: False to integrate the scans right away in the calling thread (deterministic, used by the
+        simulations on a VirtualClock)
+        """
+        self.cartographer = cartographer
+        self.background = background
+        self.scans = queue.Queue()
+        self.thread = None
+        # exception raised by the last failed integration, raised again in the thread submitting the scans
+        self.error = None
+        self.integrated = 0
+        self.maxBacklog = 0
+
+    def start(self):
+        """Starts the background thread, until then the scans are integrated right away"""
+        if self.background and self.thread is None:
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+
+    def submit(self, snapshot):
+        """
+        :param snapshot: a Snapshot (pose and scan read at the same moment)
+        """
+        self.checkError()
+        if self.thread is None:
+            self.integrate(snapshot)
+            return
+        self.scans.put(snapshot)
+        self.maxBacklog = max(self.maxBacklog, self.scans.qsize())
+
+    def integrate(self, snapshot):
+        self.cartographer.update(snapshot)
+        self.integrated += 1
+
+    def run(self):
+        """Main function of the background thread : integrates the scans until it receives None"""
+        while True:
+            snapshot = self.scans.get()
+            try:
+                if snapshot is None:
+                    return
+                self.integrate(snapshot)
+            except Exception as error:
+                self.error = error
+            finally:
+                self.scans.task_done()
+
+    def checkError(self):
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def flush(self):
+        """Waits until every scan submitted is integrated"""
+        if self.thread is not None:
+            self.scans.join()
+        self.checkError()
+
+    def stop(self):
+        """Integrates the scans still queued, then stops the background thread"""
+        if self.thread is not None:
+            self.scans.put(None)
+            self.thread.join()
+            self.thread = None
+        self.checkError()
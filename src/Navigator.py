@@ -1,4 +1,8 @@
 from Computations import getDistance
+from PathPlanner import findPath, simplifyPath, isPathFree, ASTAR
+from Path import Path
+from HierarchicalPlanner import HierarchicalPlanner
+from IncrementalPlanner import IncrementalPlanner
 
 class Navigator:
     """
@@ -9,93 +13,106 @@ class Navigator:
         self.cartographer = cartographer
         self.controller = controller
         self.TOLERANCE = 2
+        # length (in squares) of the parts of the path given to the controller
         self.SEGMENT_LENGTH = 40
         self.MAX_ATTEMPT = 2
+        # ASTAR or DIJKSTRA
+        self.HEURISTIC = ASTAR
+        # destinations further than this number of squares are planned with the hierarchical planner
+        # (None to always search the whole grid)
+        self.HIERARCHICAL_DISTANCE = 32
+        self.hierarchicalPlanner = HierarchicalPlanner(cartographer)
+        # True to follow straight lines between the squares where the path turns, instead of every square
+        self.SIMPLIFY_PATH = True
+        # True to repair the path (D* Lite) when the configuration space now blocks the rest of it, and after
+        # an obstacle, instead of following it anyway and searching again from scratch
+        self.REPAIR_PATH = True
+        self.incrementalPlanner = IncrementalPlanner(cartographer)
 
     def computePath(self, robot, dest):
         """
-        Find a path from the robot to the given destination using the front wave algorithm
+        Find a shortest path from the robot to the given destination (A* or Dijkstra on the grid, Moore neighborhood)
+        Far destinations are planned on clusters of squares first, which gives a path close to the shortest one
         :param robot: Robot object
         :param dest: a square given by the mission planner
-        :return: a list of neighboring squares (Von Neumann), robot position not included
+        :return: a list of neighboring squares (Moore), robot position not included
         """
-        wave = self.wave(robot, dest)
-        if not wave:
-            return None
-        path = self.findPath(len(wave), wave, [dest])
-        # If no path is found
-        if not path:
-            return None
-        path.reverse()
-        return path
+        with self.cartographer.lock:
+            start = self.cartographer.getGridPosition(robot.getPosition())
+            if self.isFar(start, dest):
+                return self.hierarchicalPlanner.findPath(start, dest)
+            window = self.cartographer.getKnownWindow([start, dest])
+            path = findPath(self.cartographer.getBlocked(window), toWindow(start, window), toWindow(dest, window),
+                            self.HEURISTIC)
+            return None if path is None else [fromWindow(square, window) for square in path]
 
-    def findPath(self, depth, wave, path):
+    def repairPath(self, robot, dest):
         """
-        Given a depth "depth" in the wave search, find an relevant neighbor at "deth - 1" to complete the path
-        :param depth: a depth in the wave search (distance in squares from the robot)
-        :param wave: a list of layers (each layer is a list of empty neighboring squares all at the same depth)
-        :param path: the current path from the destination to the given depth
-        :return: a list of neighboring squares
+        Same as computePath, the search toward the destination is kept between the calls and only repaired where
+        the configuration space changed and around the robot's new position
+        :param robot: Robot object
+        :param dest: a square given by the mission planner
+        :return: a list of neighboring squares (Moore), robot position not included
         """
-        if depth == 0:
-            return path
-        goal = path[-1]
-        neighbors = self.findNeighbors(goal, wave[depth - 1])
-        if len(neighbors) == 0:
-            path.pop()
-            return None
-        for neighbor in neighbors:
-            path.append(neighbor)
-            pathTmp = self.findPath(depth - 1, wave, path)
-            if pathTmp:
-                return pathTmp
-        return None
-
-    def findNeighbors(self, goal, layer):
-        """
-        Finds the given square's neighbors which belong to the given layer
-        :param goal: a square
-        :param layer: a list of empty neighboring squares (all at the same depth in the wave search)
-        :return: the list of goal's neighbors which belong to layer
-        """
-        neighbors = set()
-        for i in range(-1, 2):
-            for j in range(-1, 2):
-                if abs(i) + abs(j) != 0:
-                    neighbors.add((goal[0] + i, goal[1] + j))
-        neighborSet = neighbors.intersection(set(layer))
-        return list(neighborSet)
-
-    def wave(self, robot, dest):
-        """
-        Find all the layers (lists of empty neighboring squares) from the robot to the destination
+        with self.cartographer.lock:
+            start = self.cartographer.getGridPosition(robot.getPosition())
+            return self.incrementalPlanner.findPath(start, dest)
+
+    def planAgain(self, robot, dest):
+        """
+        Plans toward the destination again, after an obstacle or when the configuration space blocks the path :
+        far destinations are planned on clusters (see computePath), the others repaired (see repairPath) unless
+        REPAIR_PATH is False
         :param robot: Robot object
-        :param dest: square to reach
-        :return: a list of the layers
-        """
-        wave = []
-        inside = [self.cartographer.getGridPosition(robot.getPosition())]
-        nextLayer = self.cartographer.getNextLayer(inside, [])
-        while dest not in nextLayer and nextLayer != []:
-            wave.append(nextLayer)
-            inside += nextLayer
-            nextLayer = self.cartographer.getNextLayer(nextLayer, inside)
-            # remove redundant elements
-            nextLayer = list(set(nextLayer))
-        if not nextLayer:
-            return None
-        return wave
+        :param dest: a square given by the mission planner
+        :return: a list of neighboring squares (Moore), robot position not included
+        """
+        with self.cartographer.lock:
+            start = self.cartographer.getGridPosition(robot.getPosition())
+            if not self.REPAIR_PATH or self.isFar(start, dest):
+                return self.computePath(robot, dest)
+            return self.repairPath(robot, dest)
+
+    def isFar(self, start, dest):
+        """
+        :return: True iff the destination is planned with the hierarchical planner (see HIERARCHICAL_DISTANCE)
+        """
+        return self.HIERARCHICAL_DISTANCE is not None \
+            and max(abs(start[0] - dest[0]), abs(start[1] - dest[1])) > self.HIERARCHICAL_DISTANCE
+
+    def simplifyPath(self, robot, path):
+        """
+        :param robot: Robot object
+        :param path: list of neighboring squares, robot position not included (see computePath)
+        :return: the squares where the path turns, from the robot's square to the last square of path, joined by
+        straight lines avoiding the configuration space. The squares of path if SIMPLIFY_PATH is False
+        """
+        if not self.SIMPLIFY_PATH:
+            return path
+        with self.cartographer.lock:
+            start = self.cartographer.getGridPosition(robot.getPosition())
+            # the lines between the squares stay in the smallest window containing them
+            window = self.cartographer.getBoundingWindow([start] + list(path))
+            squares = simplifyPath(self.cartographer.getBlocked(window), toWindow(start, window),
+                                   [toWindow(square, window) for square in path])
+            return [fromWindow(square, window) for square in squares]
 
     def convertPath(self, path):
         """
         Convert a grid square path to real positions path
         :param path: list of squares
-        :return: list of quaternions
+        :return: Path object
         """
-        newPath = []
-        for square in path:
-            newPath.append(self.cartographer.getRealPosition(square))
-        return newPath
+        return Path([self.cartographer.getRealPosition(square) for square in path])
+
+    def isPathFree(self, path):
+        """
+        :param path: Path object
+        :return: True iff the path does not cross the configuration space (its first point is not checked)
+        """
+        squares = [self.cartographer.getGridPosition(path[i]) for i in range(len(path))]
+        window = self.cartographer.getBoundingWindow(squares)
+        return isPathFree(self.cartographer.getBlocked(window), [toWindow(square, window) for square in squares])
 
     def reachedDestination(self, robot, dest):
         """
@@ -106,37 +123,95 @@ class Navigator:
         """
         return getDistance(robot.getPosition(), self.cartographer.getRealPosition(dest)) < self.TOLERANCE
 
-    def followThePath(self, robot, dest, attempt=0):
+    def isDestinationOver(self, robot, target):
+        """
+        :param robot: Robot object
+        :param target: real position of the destination
+        :return: True iff the robot reached the destination, or the destination turned out to be an obstacle
+        """
+        carto = self.cartographer
+        with carto.lock:
+            dest = carto.getGridPosition(target)
+            return self.reachedDestination(robot, dest) or carto.getState(dest) == carto.OCCUPIED
+
+    def followThePath(self, robot, target, attempt=0, route=None):
         """
         Compute a path between the robot and the destination and make sure the robot reach it
         :param robot: Robot object
-        :param dest: square to reach
+        :param target: real position of the destination : unlike its square, it does not change when a tiled map grows
+        :param route: path to the destination (real positions, see PlanningModule.route) already found from the
+        robot's position, searched again if None
         """
+        carto = self.cartographer
         if attempt >= self.MAX_ATTEMPT:
-            self.cartographer.map[dest[0]][dest[1]] = self.cartographer.MAXVALUE
+            with carto.lock:
+                carto.setOccupied(carto.getGridPosition(target))
             return
         # If the robot has already reached the destination, a new destination needs to be computed
-        if self.reachedDestination(robot, dest):
+        with carto.lock:
+            isReached = self.reachedDestination(robot, carto.getGridPosition(target))
+        if isReached:
             self.controller.wander(robot)
             return
 
-        path = self.computePath(robot, dest)
+        # the map cannot change (nor its squares be renumbered) between the search and the conversion of the path
+        with carto.lock:
+            dest = carto.getGridPosition(target)
+            if route is not None:
+                path = [carto.getGridPosition(position) for position in route]
+            elif attempt > 0:
+                path = self.planAgain(robot, dest)
+            else:
+                path = self.computePath(robot, dest)
+            if path:
+                path = self.convertPath(self.simplifyPath(robot, path))
+            else:
+                carto.setOccupied(dest)
         if not path:
-            self.cartographer.map[dest[0]][dest[1]] = self.cartographer.MAXVALUE
             self.controller.wander(robot)
             return
-        path = self.convertPath(path)
 
         offset = 0
-        while not self.reachedDestination(robot, dest) \
-                and self.cartographer.getState(dest) != self.cartographer.OCCUPIED \
-                and offset < len(path):
+        segmentLength = self.SEGMENT_LENGTH * carto.CELL_SIZE
+        while not self.isDestinationOver(robot, target) and offset < path.getLength():
             # Divide the path in segments
-            if offset + self.SEGMENT_LENGTH <= len(path):
-                path = path[offset:offset + self.SEGMENT_LENGTH]
-            else:
-                path = path[offset:]
-            offset += self.SEGMENT_LENGTH
-            if not self.controller.move(robot, path):
+            segment = path.getSection(offset, offset + segmentLength)
+            offset += segmentLength
+            if not self.controller.move(robot, segment):
                 self.controller.wander(robot)
-                self.followThePath(robot, dest, attempt + 1)
+                self.followThePath(robot, target, attempt + 1)
+                return
+            if not self.REPAIR_PATH or offset >= path.getLength():
+                continue
+            # the rest of the path is planned again if the obstacles seen meanwhile block it
+            with carto.lock:
+                if self.isPathFree(path.getSection(offset, path.getLength())):
+                    continue
+                dest = carto.getGridPosition(target)
+                path = self.planAgain(robot, dest)
+                if path:
+                    path = self.convertPath(self.simplifyPath(robot, path))
+                else:
+                    carto.setOccupied(dest)
+            if not path:
+                self.controller.wander(robot)
+                return
+            offset = 0
+
+
+def toWindow(square, window):
+    """
+    :param square: a square (pair) of the grid
+    :param window: (rowMin, rowMax, colMin, colMax), max excluded
+    :return: the square numbered from the corner of the window
+    """
+    return square[0] - window[0], square[1] - window[2]
+
+
+def fromWindow(square, window):
+    """
+    :param square: a square (pair) numbered from the corner of the window
+    :param window: (rowMin, rowMax, colMin, colMax), max excluded
+    :return: the square of the grid
+    """
+    return square[0] + window[0], square[1] + window[2]
@@ -0,0 +1,102 @@
+import numpy as np
+
+
+class Path:
+    """
+    A path made of straight segments between waypoints, stored in arrays with the distance travelled along the path
+    at each waypoint, so that a point a given distance ahead is found by binary search
+    """
+
+    def __init__(self, waypoints):
+        """
+        :param waypoints: list of quaternions, or array of shape (n, 2) of (X, Y) positions
+        """
+        if len(waypoints) and isinstance(waypoints[0], dict):
+            waypoints = [(point['X'], point['Y']) for point in waypoints]
+        self.points = np.array(waypoints, dtype=float).reshape(-1, 2)
+        segments = np.hypot(*np.diff(self.points, axis=0).T)
+        # arc length from the first waypoint to each waypoint
+        self.lengths = np.concatenate(([0.], np.cumsum(segments)))
+
+    def __len__(self):
+        return len(self.points)
+
+    def __getitem__(self, index):
+        """
+        :return: the waypoint (quaternion)
+        """
+        return {'X': float(self.points[index, 0]), 'Y': float(self.points[index, 1])}
+
+    def getLength(self):
+        return float(self.lengths[-1]) if len(self) else 0.
+
+    def getPointAt(self, length):
+        """
+        :param length: arc length from the first waypoint
+        :return: the point (quaternion) of the path at this arc length, the last waypoint if the path is shorter
+        """
+        if length >= self.lengths[-1]:
+            return self[-1]
+        i = max(0, int(np.searchsorted(self.lengths, length, side='right')) - 1)
+        t = (length - self.lengths[i]) / (self.lengths[i + 1] - self.lengths[i])
+        point = self.points[i] + t * (self.points[i + 1] - self.points[i])
+        return {'X': float(point[0]), 'Y': float(point[1])}
+
+    def getSection(self, start, end):
+        """
+        :param start: arc length from the first waypoint
+        :param end: arc length from the first waypoint
+        :return: the part of the path between the two arc lengths, as a Path
+        """
+        inside = (self.lengths > start) & (self.lengths < end)
+        points = [self.getPointAt(start)] + [self[i] for i in np.nonzero(inside)[0]] + [self.getPointAt(end)]
+        return Path(points)
+
+    def project(self, position, first=0):
+        """
+        Finds the point of the path closest to a position
+        :param position: quaternion
+        :param first: index of the first segment considered (the robot does not go back)
+        :return: the index of the segment containing the point, and the point as an array
+        """
+        if len(self) < 2:
+            return 0, self.points[0]
+        first = min(first, len(self) - 2)
+        A = self.points[first:-1]
+        AB = self.points[first + 1:] - A
+        AP = np.array([position['X'], position['Y']]) - A
+        t = np.clip((AP * AB).sum(axis=1) / np.maximum((AB ** 2).sum(axis=1), 1e-12), 0, 1)
+        closest = A + t[:, np.newaxis] * AB
+        segment = int(np.argmin(np.hypot(*(closest - A - AP).T)))
+        return first + segment, closest[segment]
+
+    def getLookaheadPoint(self, position, distance, first=0):
+        """
+        Finds where the path leaves the circle of radius distance around position, after the point of the path
+        closest to position
+        :param position: quaternion
+        :param distance: lookahead distance
+        :param first: index of the first segment considered (the robot does not go back)
+        :return: the point (quaternion), the last waypoint if the rest of the path is inside the circle, and the
+        index of the segment of the closest point
+        """
+        segment, closest = self.project(position, first)
+        P = np.array([position['X'], position['Y']])
+        if np.hypot(*(closest - P)) >= distance:
+            # the robot is away from the path : it goes back to it
+            point = P + distance * (closest - P) / np.hypot(*(closest - P))
+            return {'X': float(point[0]), 'Y': float(point[1])}, segment
+        outside = np.nonzero(np.hypot(*(self.points[segment + 1:] - P).T) >= distance)[0]
+        if not len(outside):
+            return self[-1], segment
+        i = segment + 1 + int(outside[0])
+        A = self.points[i - 1]
+        AB = self.points[i] - A
+        AP = P - A
+        # |A + t AB - P| = distance, the largest root is where the segment leaves the circle (the part of the
+        # segment before it, from the closest point or from A, is inside the circle)
+        a = max((AB ** 2).sum(), 1e-12)
+        b = (AB * AP).sum()
+        t = (b + np.sqrt(max(0, b * b - a * ((AP ** 2).sum() - distance ** 2)))) / a
+        point = A + min(1, t) * AB
+        return {'X': float(point[0]), 'Y': float(point[1])}, segment
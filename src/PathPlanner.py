@@ -0,0 +1,334 @@
+import heapq
+import numpy as np
+from array import array
+from math import sqrt, inf
+
+DIJKSTRA = 'dijkstra'
+ASTAR = 'astar'
+
+# Moore neighborhood : (row offset, col offset, cost)
+MOVES = [(-1, 0, 1), (1, 0, 1), (0, -1, 1), (0, 1, 1),
+         (-1, -1, sqrt(2)), (-1, 1, sqrt(2)), (1, -1, sqrt(2)), (1, 1, sqrt(2))]
+
+
+def octileDistance(rowDistance, colDistance):
+    """
+    :return: the length of the shortest Moore path between two squares in an empty grid
+    """
+    return max(rowDistance, colDistance) + (sqrt(2) - 1) * min(rowDistance, colDistance)
+
+
+def findPath(blocked, start, goal, heuristic=ASTAR):
+    """
+    Finds the shortest path between two squares, moving to the 8 neighbors (diagonal moves cannot cut corners)
+    :param blocked: boolean array, True for the squares the robot cannot go through
+    :param start: a square (pair)
+    :param goal: a square (pair)
+    :param heuristic: ASTAR (octile distance to the goal) or DIJKSTRA (no heuristic)
+    :return: a list of neighboring squares from start (not included) to goal, None if there is no path
+    """
+    width, height = blocked.shape
+    if not (0 <= start[0] < width and 0 <= start[1] < height and 0 <= goal[0] < width and 0 <= goal[1] < height):
+        return None
+    if blocked[goal[0], goal[1]]:
+        return None
+    isBlocked = np.ascontiguousarray(blocked, dtype=bool).ravel().tolist()
+    cost = array('d', [inf]) * (width * height)
+    parent = array('l', [-1]) * (width * height)
+    startIndex = start[0] * height + start[1]
+    goalIndex = goal[0] * height + goal[1]
+    goalRow, goalCol = goal
+    useHeuristic = heuristic == ASTAR
+
+    cost[startIndex] = 0
+    # Among squares of equal priority, the deepest ones are expanded first
+    heap = [(0, 0, startIndex)]
+    while heap:
+        _, squareCost, index = heapq.heappop(heap)
+        squareCost = -squareCost
+        if index == goalIndex:
+            break
+        if squareCost > cost[index]:
+            continue
+        row, col = divmod(index, height)
+        for (i, j, moveCost) in MOVES:
+            neighborRow, neighborCol = row + i, col + j
+            if not (0 <= neighborRow < width and 0 <= neighborCol < height):
+                continue
+            neighbor = neighborRow * height + neighborCol
+            if isBlocked[neighbor]:
+                continue
+            # Diagonal moves are only allowed if both squares next to the corner are free
+            if i != 0 and j != 0 and (isBlocked[row * height + neighborCol] or isBlocked[neighborRow * height + col]):
+                continue
+            neighborCost = squareCost + moveCost
+            if neighborCost < cost[neighbor]:
+                cost[neighbor] = neighborCost
+                parent[neighbor] = index
+                priority = neighborCost
+                if useHeuristic:
+                    priority += octileDistance(abs(goalRow - neighborRow), abs(goalCol - neighborCol))
+                # Rounding makes equivalent paths tie, instead of differing by floating point errors
+                heapq.heappush(heap, (round(priority, 6), -neighborCost, neighbor))
+
+    if parent[goalIndex] == -1:
+        return [goal] if goalIndex == startIndex else None
+    path = []
+    index = goalIndex
+    while index != startIndex:
+        path.append(divmod(index, height))
+        index = parent[index]
+    path.reverse()
+    return path
+
+
+def getAllowedMoves(blocked):
+    """
+    :param blocked: boolean array, True for the squares the robot cannot go through
+    :return: boolean array of shape blocked.shape + (len(MOVES),), True for the moves allowed by findPath from each
+    square (none from the blocked squares, none leaving the grid)
+    """
+    width, height = blocked.shape
+    # a border of blocked squares around the grid : the moves leaving it are never allowed
+    free = np.zeros((width + 2, height + 2), dtype=bool)
+    free[1:-1, 1:-1] = ~np.asarray(blocked, dtype=bool)
+    allowed = np.empty((width, height, len(MOVES)), dtype=bool)
+    for k, (i, j, _) in enumerate(MOVES):
+        allowed[:, :, k] = free[1 + i:1 + i + width, 1 + j:1 + j + height]
+        if i != 0 and j != 0:
+            # Diagonal moves are only allowed if both squares next to the corner are free
+            allowed[:, :, k] &= free[1:1 + width, 1 + j:1 + j + height] & free[1 + i:1 + i + width, 1:1 + height]
+    allowed &= free[1:-1, 1:-1, np.newaxis]
+    return allowed
+
+
+def getGridGraph(blocked):
+    """
+    Builds the graph of the moves allowed by findPath, for the shortest path algorithms of scipy
+    :param blocked: boolean array, True for the squares the robot cannot go through
+    :return: sparse matrix (squares are numbered row by row), entry [a, b] is the cost of the move from a to b
+    """
+    from scipy.sparse import csr_matrix
+    width, height = blocked.shape
+    allowed = getAllowedMoves(blocked).reshape(width * height, len(MOVES))
+    # the moves of each square are consecutive, in the order of the squares : the matrix is built as it is stored
+    sources, moves = np.nonzero(allowed)
+    offsets = np.array([i * height + j for (i, j, _) in MOVES])
+    costs = np.array([moveCost for (_, _, moveCost) in MOVES])
+    pointers = np.concatenate(([0], np.cumsum(allowed.sum(axis=1))))
+    return csr_matrix((costs[moves], sources + offsets[moves], pointers), shape=(width * height, width * height))
+
+
+class GridGraph:
+    """
+    Graph of the moves allowed by findPath inside a window of the grid, for the shortest path algorithms of scipy.
+    Every square has an entry for each move, whose cost is inf when the move is not allowed : the graph is updated in
+    place when squares change
+    """
+
+    def __init__(self, blocked, window=None):
+        """
+        :param blocked: boolean array, True for the squares of the window the robot cannot go through
+        :param window: (rowMin, rowMax, colMin, colMax) of the graph in the grid, max excluded. The whole grid if None
+        """
+        from scipy.sparse import csr_matrix
+        width, height = blocked.shape
+        self.window = (0, width, 0, height) if window is None else tuple(int(bound) for bound in window)
+        self.height = height
+        self.blocked = np.array(blocked, dtype=bool)
+        self.MOVE_COSTS = np.array([moveCost for (_, _, moveCost) in MOVES])
+        count = width * height
+        offsets = np.array([i * height + j for (i, j, _) in MOVES])
+        # the moves leaving the window wrap around to other squares, which is harmless as they are never allowed
+        neighbors = (np.arange(count, dtype=np.int32)[:, np.newaxis] + offsets.astype(np.int32)) % count
+        pointers = np.arange(0, count * len(MOVES) + 1, len(MOVES), dtype=np.int32)
+        costs = np.where(getAllowedMoves(self.blocked), self.MOVE_COSTS, inf).ravel()
+        self.matrix = csr_matrix((costs, neighbors.ravel(), pointers), shape=(count, count))
+        # view of the costs : (row, col, move) in the window
+        self.costs = self.matrix.data.reshape(width, height, len(MOVES))
+
+    def update(self, window, blocked):
+        """
+        Changes the squares of the given window, and the moves depending on them
+        :param window: (rowMin, rowMax, colMin, colMax) in the grid, max excluded, inside the graph's window
+        :param blocked: boolean array of the window's shape, True for the squares the robot cannot go through
+        """
+        rowMin, colMin = window[0] - self.window[0], window[2] - self.window[2]
+        self.blocked[rowMin:rowMin + blocked.shape[0], colMin:colMin + blocked.shape[1]] = blocked
+        width, height = self.blocked.shape
+        # the moves from the squares next to the window change too, they depend on the squares around them
+        inner = (max(0, rowMin - 1), min(width, rowMin + blocked.shape[0] + 1),
+                 max(0, colMin - 1), min(height, colMin + blocked.shape[1] + 1))
+        outer = (max(0, inner[0] - 1), min(width, inner[1] + 1), max(0, inner[2] - 1), min(height, inner[3] + 1))
+        allowed = getAllowedMoves(self.blocked[outer[0]:outer[1], outer[2]:outer[3]])
+        allowed = allowed[inner[0] - outer[0]:inner[1] - outer[0], inner[2] - outer[2]:inner[3] - outer[2]]
+        self.costs[inner[0]:inner[1], inner[2]:inner[3]] = np.where(allowed, self.MOVE_COSTS, inf)
+
+    def getIndices(self, squares):
+        """
+        :param squares: integer array of shape (n, 2), squares of the grid
+        :return: integer array, the index of each square in the graph (-1 outside the window)
+        """
+        rows, cols = squares[:, 0] - self.window[0], squares[:, 1] - self.window[2]
+        inside = (rows >= 0) & (rows < self.blocked.shape[0]) & (cols >= 0) & (cols < self.height)
+        return np.where(inside, rows * self.height + cols, -1)
+
+    def getSquare(self, index):
+        row, col = divmod(int(index), self.height)
+        return row + self.window[0], col + self.window[2]
+
+    def isFree(self, squares):
+        """
+        :param squares: integer array of shape (n, 2), squares of the grid
+        :return: boolean array, True for the squares of the window the robot can go through
+        """
+        indices = self.getIndices(squares)
+        return (indices != -1) & ~self.blocked.flat[indices]
+
+    def search(self, start, limit=inf):
+        """
+        Shortest paths from a square, leaving it even if it is blocked like findPath
+        :param start: the index of a square
+        :param limit: the squares farther than limit are not reached
+        :return: the costs and the predecessors of every square of the window, as returned by scipy's dijkstra
+        """
+        from scipy.sparse.csgraph import dijkstra
+        row, col = divmod(start, self.height)
+        if not self.blocked[row, col]:
+            return dijkstra(self.matrix, indices=start, limit=limit, return_predecessors=True)
+        # the moves from the start are allowed as if it was free, for this search only
+        around = np.ones((3, 3), dtype=bool)
+        rowMin, colMin = max(0, row - 1), max(0, col - 1)
+        rowMax, colMax = min(self.blocked.shape[0], row + 2), min(self.height, col + 2)
+        around[rowMin - row + 1:rowMax - row + 1, colMin - col + 1:colMax - col + 1] = \
+            self.blocked[rowMin:rowMax, colMin:colMax]
+        around[1, 1] = False
+        self.costs[row, col] = np.where(getAllowedMoves(around)[1, 1], self.MOVE_COSTS, inf)
+        try:
+            return dijkstra(self.matrix, indices=start, limit=limit, return_predecessors=True)
+        finally:
+            self.costs[row, col] = inf
+
+
+def isInSight(blocked, origin, ends):
+    """
+    :param blocked: boolean array, True for the squares the robot cannot go through
+    :param origin: a square (pair)
+    :param ends: an integer array of shape (n, 2)
+    :return: boolean array, True for the ends joined to origin by a Bresenham line through free squares. The origin
+    is not checked : the robot may already be too close to an obstacle
+    """
+    from RayCasting import traceRays
+    rows, cols, valid = traceRays(origin, ends)
+    valid[:, 0] = False
+    hidden = (valid & blocked[rows * valid, cols * valid]).any(axis=1)
+    # like findPath, diagonal steps cannot cut corners. The squares next to the corner of a straight step are the
+    # step's own squares, the origin among them
+    diagonal = valid[:, 1:] & (rows[:, 1:] != rows[:, :-1]) & (cols[:, 1:] != cols[:, :-1])
+    corner = diagonal & (blocked[rows[:, :-1] * diagonal, cols[:, 1:] * diagonal]
+                         | blocked[rows[:, 1:] * diagonal, cols[:, :-1] * diagonal])
+    return ~(hidden | corner.any(axis=1))
+
+
+def simplifyPath(blocked, start, path, lookahead=64):
+    """
+    Keeps only the squares where the path has to turn : each kept square is the furthest one of the path in line of
+    sight (a Bresenham line through free squares) from the previous one
+    :param blocked: boolean array, True for the squares the robot cannot go through
+    :param start: a square (pair), the robot's square
+    :param path: a list of neighboring squares from start (not included), as returned by findPath
+    :param lookahead: maximum number of squares of the path replaced by a single line
+    :return: a list of squares from start (included) to the last square of the path
+    """
+    squares = np.array([start] + list(path), dtype=np.int64).reshape(-1, 2)
+    kept = [0]
+    while kept[-1] < len(squares) - 1:
+        anchor = kept[-1]
+        candidates = squares[anchor + 1:anchor + 1 + lookahead]
+        hidden = ~isInSight(blocked, squares[anchor], candidates)
+        # the next square of the path is always in sight, it is a neighbor
+        hidden[0] = False
+        visible = np.argmax(hidden) if hidden.any() else len(candidates)
+        kept.append(anchor + visible)
+    return [tuple(square) for square in squares[kept].tolist()]
+
+
+def isPathFree(blocked, squares):
+    """
+    :param blocked: boolean array, True for the squares the robot cannot go through
+    :param squares: a list of squares joined by straight lines, as returned by simplifyPath
+    :return: True iff every line goes through free squares (the first square of the path is not checked)
+    """
+    squares = np.array(squares, dtype=np.int64).reshape(-1, 2)
+    return all(isInSight(blocked, squares[i], squares[i + 1:i + 2])[0] for i in range(len(squares) - 1))
+
+
+class DistanceField:
+    """
+    Costs of the shortest paths (same moves as findPath) from one square to the squares of a GridGraph, and the
+    paths themselves. The search can stop once enough targets are reached
+    """
+
+    def __init__(self, graph, start, targets=None, count=None):
+        """
+        :param graph: GridGraph object
+        :param start: a square (pair)
+        :param targets: integer array of shape (n, 2) : the search stops once count of them are reached, with the
+        squares closer than them. Every square of the graph is reached if None
+        :param count: a number of targets, all of them if None
+        """
+        self.graph = graph
+        self.start = (int(start[0]), int(start[1]))
+        self.startIndex = int(graph.getIndices(np.array([self.start]))[0])
+        self.costs = np.full(graph.blocked.size, inf)
+        self.predecessors = None
+        if self.startIndex == -1:
+            return
+        if targets is None:
+            self.costs, self.predecessors = graph.search(self.startIndex)
+            return
+        targets = np.asarray(targets, dtype=int).reshape(-1, 2)
+        targets = targets[graph.getIndices(targets) != -1]
+        count = len(targets) if count is None else min(count, len(targets))
+        if count == 0:
+            return
+        # the cost of a path is at least the octile distance : the first limit could reach the count closest targets
+        rowDistances, colDistances = np.abs(targets[:, 0] - self.start[0]), np.abs(targets[:, 1] - self.start[1])
+        distances = np.sort(np.maximum(rowDistances, colDistances)
+                            + (sqrt(2) - 1) * np.minimum(rowDistances, colDistances))
+        limit = 2 * distances[count - 1] + 2
+        while True:
+            self.costs, self.predecessors = graph.search(self.startIndex, limit)
+            reached = self.costs[self.costs < inf]
+            # every square is reached once a step from the farthest one would still be within the limit
+            if (self.getCosts(targets) < inf).sum() >= count or reached.max() + sqrt(2) <= limit:
+                return
+            limit *= 2
+
+    def getCosts(self, squares):
+        """
+        :param squares: integer array of shape (n, 2)
+        :return: float array, cost of the shortest path to each square (inf if it cannot be reached, or was not)
+        """
+        squares = np.asarray(squares, dtype=int).reshape(-1, 2)
+        indices = self.graph.getIndices(squares)
+        return np.where(indices == -1, inf, self.costs[indices])
+
+    def getPath(self, goal):
+        """
+        Same contract as findPath from the start of the field
+        :param goal: a square (pair)
+        :return: a list of neighboring squares from start (not included) to goal, None if there is no path
+        """
+        goal = (int(goal[0]), int(goal[1]))
+        index = int(self.graph.getIndices(np.array([goal]))[0])
+        if index == -1 or self.costs[index] == inf or self.graph.blocked.flat[index]:
+            return None
+        if goal == self.start:
+            return [goal]
+        path = []
+        while index != self.startIndex:
+            path.append(self.graph.getSquare(index))
+            index = self.predecessors[index]
+        path.reverse()
+        return path
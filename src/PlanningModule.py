@@ -1,4 +1,8 @@
-from math import sqrt
+from math import ceil
+from Frontiers import FrontierIndex
+from PathPlanner import DistanceField, GridGraph
+from RayCasting import countVisible
+import numpy as np
 
 
 class PlanningModule:
@@ -12,96 +16,171 @@ class PlanningModule:
         self.navigator = navigator
         self.controller = controller
         self.MIN_BORDER_SIZE = 3
+        # utility of a frontier : unknown squares seen from its median * exp(-COST_WEIGHT * path length in meters)
+        self.COST_WEIGHT = 0.5
+        # number of rays cast from each median to estimate the unknown squares seen from it
+        self.GAIN_RAYS = 64
+        # number of unknown squares a ray goes through before stopping : the unknown squares far behind a frontier
+        # are often inside obstacles
+        self.GAIN_DEPTH = 6
+        # number of medians whose unknown squares seen are estimated, the closest ones first : the others are only
+        # picked if none of these has any
+        self.SCORING_COUNT = 64
+        # number of medians estimated at once
+        self.SCORING_BATCH = 16
+        # time (sec, on the clock of the controller) after which no more batch is estimated. The clock of a
+        # VirtualClock does not advance while computing : the estimates then do not depend on the speed of the CPU
+        self.SCORING_TIME = 0.05
+        # the graph of the moves covers the known part of the map, rounded up to blocks of this many squares : it is
+        # only built again when the known part leaves it
+        self.GRAPH_BLOCK = 64
+        self.frontierIndex = FrontierIndex(cartographer)
+        self.graph = None
+        # version and shape of the map the graph is up to date with
+        self.graphVersion = None
+        self.graphShape = None
+        # path (list of real positions of squares, robot position not included) to the last destination picked, None
+        # if unknown. Unlike squares, the positions do not change when a tiled map grows
+        self.route = None
     
-    @staticmethod
-    def getDistanceSquares(s, t):
-        return sqrt((s[0] - t[0]) ** 2 + (s[1] - t[1]) ** 2)
-
-    @staticmethod
-    def getMedian(border):
-        rows = [square[0] for square in border]
-        cols = [square[1] for square in border]
-        rows.sort()
-        cols.sort()
-        middle = int(len(border) / 2)
-        return (rows[middle], cols[middle])
-
-    def getNonObstacle(self, squares):
-        for square in squares:
-            if self.cartographer.getState(square) != self.cartographer.OCCUPIED:
-                return square
-        return None
-
     def pickDestination(self, robot):
         """
-        Choose a new destination, using the frontier based exploration algorithm
+        Choose a new destination, using the frontier based exploration algorithm, on a map not changing meanwhile
         Here a border is composed of empty squares having at least 1 unknown neighbor (Von Neumann)
+        The frontiers the robot cannot reach are dropped, the others are ranked by the unknown area seen from them
+        and by the length of the shortest path to them. The path to the destination is kept in route
         :param robot: Robot object
         :return: the new destination
         """
-        borders = self.getBorders(robot)
-        if not borders:
-            return None
-        robotPosition = self.cartographer.getGridPosition(robot.getPosition())
-        medians = []
-        for border in borders:
-            if len(border) > self.MIN_BORDER_SIZE:
-                medians.append(self.getMedian(border))
-        # Pick the closest median to the robot that is not an obstacle
-        closestMedian = self.getNonObstacle(medians)
-        if not closestMedian:
-            return None
-        for median in medians:
-            dist = self.getDistanceSquares(median, robotPosition)
-            if dist < self.getDistanceSquares(closestMedian, robotPosition) \
-                    and self.cartographer.getState(median) != self.cartographer.OCCUPIED:
-                    closestMedian = median
-        return closestMedian
+        with self.cartographer.lock:
+            self.route = None
+            frontiers = self.getFrontiers(robot)
+            if len(frontiers) == 0:
+                return None
+            robotPosition = self.cartographer.getGridPosition(robot.getPosition())
+            kept = np.nonzero(frontiers.sizes > self.MIN_BORDER_SIZE)[0]
+            if len(kept) == 0:
+                return None
+            medians = frontiers.medians[kept]
+            graph = self.getGraph(robotPosition)
+            # Squares that are obstacles (in the configuration space) cannot be destinations : the median of a curved
+            # frontier close to the walls is replaced by the free square of the frontier closest to it
+            isFree = graph.isFree(medians)
+            for k in np.nonzero(~isFree)[0]:
+                squares = np.array(frontiers.getSquares(kept[k]))
+                squares = squares[graph.isFree(squares)]
+                if len(squares) > 0:
+                    medians[k] = squares[np.argmin(np.hypot(*(squares - medians[k]).T))]
+                    isFree[k] = True
+            if not isFree.any():
+                return None
+            # only the closest medians are scored (see getInformationGains) : the search stops once they are reached
+            field = DistanceField(graph, robotPosition, medians[isFree], self.SCORING_COUNT)
+            distances = np.where(isFree, field.getCosts(medians), np.inf)
+            isReachable = not np.isinf(distances.min())
+            if not isReachable:
+                # the robot is walled in by the configuration space : the closest median is picked, the navigator
+                # gets the robot out on its own
+                distances = np.where(isFree, np.hypot(medians[:, 0] - robotPosition[0],
+                                                      medians[:, 1] - robotPosition[1]), np.inf)
+                destination = medians[np.argmin(distances)]
+            else:
+                candidates = np.nonzero(~np.isinf(distances))[0]
+                candidates = candidates[np.argsort(distances[candidates], kind='stable')]
+                gains = self.getInformationGains(medians[candidates])
+                utilities = gains * np.exp(-self.COST_WEIGHT * self.cartographer.CELL_SIZE * distances[candidates])
+                # without any gain, the closest median is picked
+                destination = medians[candidates[np.argmax(utilities)]]
+                path = field.getPath(destination)
+                if path is not None:
+                    self.route = [self.cartographer.getRealPosition(square) for square in path]
+            return int(destination[0]), int(destination[1])
 
-    def EndInBorders(self, end, borders):
+    def getGraph(self, square):
         """
-        :param end: a square
-        :param borders: a list of borders
-        :return: True iff end is in one of the borders
+        The graph of the moves in the known part of the map, kept between the calls : only the squares changed since
+        the previous call are updated
+        :param square: a square (pair) the graph must contain
+        :return: GridGraph object
         """
-        for border in borders:
-            if end in border:
-                return True
-        return False
+        carto = self.cartographer
+        window = carto.getKnownWindow([square])
+        block = self.GRAPH_BLOCK
+        window = carto.expandWindow((window[0] // block * block, -(-window[1] // block) * block,
+                                     window[2] // block * block, -(-window[3] // block) * block), 0)
+        graph = self.graph
+        if graph is None or carto.map.shape != self.graphShape or not (
+                graph.window[0] <= window[0] and window[1] <= graph.window[1]
+                and graph.window[2] <= window[2] and window[3] <= graph.window[3]):
+            self.graph = GridGraph(carto.getBlocked(window), window)
+        else:
+            changes = carto.getChangesSince(self.graphVersion)
+            if changes is not None:
+                changes = (max(changes[0], graph.window[0]), min(changes[1], graph.window[1]),
+                           max(changes[2], graph.window[2]), min(changes[3], graph.window[3]))
+                if changes[0] < changes[1] and changes[2] < changes[3]:
+                    graph.update(changes, np.asarray(carto.getBlocked(changes), dtype=bool))
+        self.graphVersion = carto.version
+        self.graphShape = carto.map.shape
+        return self.graph
 
-    def getBorders(self, robot):
+    def getInformationGains(self, squares):
         """
-        Retrieves all the borders
-        Here a border may be composed of either empty squares or occupied squares
-        :param robot: Robot object
-        :return: the list of all the borders composed of empty squares
+        Estimates the number of unknown squares the lasers would see from each square, within LASER_MAX_DISTANCE.
+        Only the first SCORING_COUNT squares are estimated, by batches, until SCORING_TIME is over
+        :param squares: integer array of shape (n, 2), sorted by priority
+        :return: integer array, the estimate for each square (0 for the ones left)
         """
-        emptyBorders = []
-        occupiedBorders = []
-        toVisit = []
-        alreadyVisited = []
+        carto = self.cartographer
+        gains = np.zeros(len(squares), dtype=np.int64)
+        squares = squares[:self.SCORING_COUNT]
+        if len(squares) == 0:
+            return gains
+        radius = carto.LASER_MAX_DISTANCE / carto.CELL_SIZE
+        # the rays do not leave the window (unless they leave the grid, which stops them too)
+        window = carto.getBoundingWindow(squares.tolist(), ceil(radius) + 1)
+        squares = squares - (window[0], window[2])
+        states = carto.getStates(window)
+        opaque = states == carto.OCCUPIED
+        unknown = states == carto.UNKNOWN
+        clock = self.controller.clock if self.controller is not None else None
+        end = clock.now() + self.SCORING_TIME if clock is not None else None
+        for first in range(0, len(squares), self.SCORING_BATCH):
+            # the first batch is always estimated
+            if first > 0 and end is not None and clock.now() > end:
+                break
+            batch = squares[first:first + self.SCORING_BATCH]
+            gains[first:first + len(batch)] = countVisible(opaque, unknown, batch, radius, self.GAIN_RAYS,
+                                                           self.GAIN_DEPTH)
+        return gains
 
-        for row in range(self.cartographer.getWidth()):
-            for col in range(self.cartographer.getHeight()):
-                if self.cartographer.isOnBorder((row, col)) and not (row, col) in alreadyVisited \
-                        and self.cartographer.getState((row, col)) != self.cartographer.OCCUPIED:
-                    toVisit.append((row, col))
+    def getFrontiers(self, robot):
+        """
+        Retrieves all the borders composed of empty squares, with their size, median and centroid
+        Only the part of the map changed since the previous call is processed
+        :param robot: Robot object
+        :return: Frontiers object
+        """
+        self.frontierIndex.refresh()
+        return self.frontierIndex.getFrontiers()
 
-                while len(toVisit) != 0:
-                    square = toVisit.pop()
-                    if not self.EndInBorders(square, emptyBorders + occupiedBorders):
-                        border, ends = self.cartographer.findBorder(square)
-                        toVisit += ends
-                        if self.cartographer.getState(square) == self.cartographer.EMPTY:
-                            emptyBorders.append(border)
-                            alreadyVisited += border
-                        else:
-                            occupiedBorders.append(border)
-        return emptyBorders
+    def getBorders(self, robot):
+        """
+        Retrieves all the borders composed of empty squares
+        :param robot: Robot object
+        :return: the list of all the borders (lists of squares)
+        """
+        frontiers = self.getFrontiers(robot)
+        return [frontiers.getSquares(index) for index in range(len(frontiers))]
 
     def move(self, robot):
-        destination = self.pickDestination(robot)
-        if not destination:
-            return False
-        self.navigator.followThePath(robot, destination)
+        # the destination is picked on a map including every scan read so far
+        self.controller.mapper.flush()
+        with self.cartographer.lock:
+            destination = self.pickDestination(robot)
+            if not destination:
+                return False
+            # the squares are renumbered when a tiled map grows, the real position of the destination does not change
+            target = self.cartographer.getRealPosition(destination)
+        self.navigator.followThePath(robot, target, route=self.route)
         return True
@@ -0,0 +1,90 @@
+import numpy as np
+
+
+def traceRays(origin, ends):
+    """
+    Computes the Bresenham traversal of many rays at once.
+    Step k of a ray is the same square as the k-th square yielded by bresenham(origin, end)
+    :param origin: a pair (grid's square), start of every ray
+    :param ends: an integer array of shape (n, 2), the last square of each ray
+    :return: rows, cols (integer arrays of shape (n, L)) and a boolean mask (n, L) telling which steps exist
+    """
+    ends = np.asarray(ends, dtype=np.int64).reshape(-1, 2)
+    dRow = ends[:, 0] - origin[0]
+    dCol = ends[:, 1] - origin[1]
+    rowSign = np.where(dRow > 0, 1, -1)
+    colSign = np.where(dCol > 0, 1, -1)
+    dRow, dCol = np.abs(dRow), np.abs(dCol)
+    # Number of steps along the major axis
+    major = np.maximum(dRow, dCol)
+    length = int(major.max()) + 1 if len(ends) > 0 else 1
+    steps = np.arange(length)[np.newaxis, :]
+    valid = steps <= major[:, np.newaxis]
+    # The minor axis advances by round-half-up(k * minor / major), which is what Bresenham's error term does
+    divisor = np.maximum(2 * major, 1)[:, np.newaxis]
+    rowMajor = (dRow > dCol)[:, np.newaxis]
+    rowSteps = np.where(rowMajor, steps, (2 * steps * dRow[:, np.newaxis] + major[:, np.newaxis]) // divisor)
+    colSteps = np.where(rowMajor, (2 * steps * dCol[:, np.newaxis] + major[:, np.newaxis]) // divisor, steps)
+    rows = origin[0] + rowSign[:, np.newaxis] * rowSteps
+    cols = origin[1] + colSign[:, np.newaxis] * colSteps
+    return rows, cols, valid
+
+
+def castRays(occupied, cellSize, origin, angles, maxRange):
+    """
+    Measures the distance to the first occupied square along many rays at once
+    :param occupied: boolean array, True for the occupied squares. Square (i, j) covers
+    [i * cellSize, (i + 1) * cellSize[ x [j * cellSize, (j + 1) * cellSize[
+    :param cellSize: size of a square
+    :param origin: a pair (x, y), start of every ray, in the frame of the grid
+    :param angles: array of the rays' angles (radians, counterclockwise from the x-axis)
+    :param maxRange: distance returned by the rays hitting nothing
+    :return: array of distances
+    """
+    angles = np.asarray(angles, dtype=float)
+    # Each ray is sampled every half square
+    step = cellSize / 2
+    distances = np.arange(1, int(maxRange / step) + 1) * step
+    rows = np.floor((origin[0] + np.cos(angles)[:, np.newaxis] * distances) / cellSize).astype(np.int64)
+    cols = np.floor((origin[1] + np.sin(angles)[:, np.newaxis] * distances) / cellSize).astype(np.int64)
+    inside = (rows >= 0) & (rows < occupied.shape[0]) & (cols >= 0) & (cols < occupied.shape[1])
+    hits = np.zeros(rows.shape, dtype=bool)
+    hits[inside] = occupied[rows[inside], cols[inside]]
+    first = np.argmax(hits, axis=1)
+    return np.where(hits.any(axis=1), distances[first], maxRange)
+
+
+def countVisible(opaque, counted, origins, radius, rayCount=64, maxCounted=None):
+    """
+    Counts the squares seen from many origins at once, along rays going all around each origin
+    :param opaque: boolean array, True for the squares stopping the rays (the squares out of the grid do too)
+    :param counted: boolean array of the same shape, True for the squares to count
+    :param origins: an integer array of shape (n, 2), squares of the grid
+    :param radius: length of the rays (squares)
+    :param rayCount: number of rays per origin
+    :param maxCounted: if given, a ray stops after going through this number of counted squares
+    :return: integer array, number of distinct counted squares reached by the rays of each origin
+    """
+    origins = np.asarray(origins, dtype=np.int64).reshape(-1, 2)
+    angles = np.linspace(0, 2 * np.pi, rayCount, endpoint=False)
+    ends = np.rint(np.stack((np.cos(angles), np.sin(angles)), axis=1) * radius).astype(np.int64)
+    # The rays have the same shape from every origin
+    rowOffsets, colOffsets, valid = traceRays((0, 0), ends)
+    rows = origins[:, 0, np.newaxis, np.newaxis] + rowOffsets
+    cols = origins[:, 1, np.newaxis, np.newaxis] + colOffsets
+    inBound = (rows >= 0) & (rows < opaque.shape[0]) & (cols >= 0) & (cols < opaque.shape[1])
+    rows, cols = np.where(inBound, rows, 0), np.where(inBound, cols, 0)
+    isCounted = inBound & counted[rows, cols]
+    # A ray stops at the first opaque square, which is still seen
+    stops = ~inBound | opaque[rows, cols]
+    if maxCounted is not None:
+        stops |= np.cumsum(isCounted, axis=2) >= maxCounted
+    hidden = np.zeros_like(stops)
+    hidden[:, :, 1:] = np.logical_or.accumulate(stops, axis=2)[:, :, :-1]
+    seen = valid & ~hidden & isCounted
+    # Squares crossed by several rays are counted once
+    indices = np.where(seen, rows * opaque.shape[1] + cols, -1).reshape(len(origins), -1)
+    indices.sort(axis=1)
+    isNew = np.concatenate((indices[:, :1] >= 0, (indices[:, 1:] != indices[:, :-1]) & (indices[:, 1:] >= 0)),
+                           axis=1)
+    return isNew.sum(axis=1)
@@ -0,0 +1,47 @@
+from Clock import VirtualClock
+from robot import Snapshot
+import quaternion
+
+
+class SimRobot:
+    """
+    In-process simulated robot with the same interface as robot.Robot, driving a SimWorld.
+    The world is brought to the clock's time before each call, so with a VirtualClock the simulation
+    only advances when the controller sleeps.
+    """
+    def __init__(self, world, clock=None):
+        self.world = world
+        self.clock = clock if clock is not None else VirtualClock()
+        self.laser_angles = world.laserAngles.tolist()
+
+    def getAngles(self):
+        return self.laser_angles
+
+    def getHeading(self):
+        """Returns the heading as a unit vector (see robot.Robot.getHeading)"""
+        return quaternion.heading(self._getPose()['Pose']['Orientation'])
+
+    def getPosition(self):
+        return self._getPose()['Pose']['Position']
+
+    def getPose(self):
+        """Returns the position and the heading, read from the same pose"""
+        pose = self._getPose()['Pose']
+        return pose['Position'], quaternion.heading(pose['Orientation'])
+
+    def getSnapshot(self):
+        """Returns a Snapshot: the pose and the laser scan at the clock's time"""
+        self.world.advance(self.clock.now())
+        return Snapshot(self.world.time, self.world.getPose(), self.world.getLaser(), self.laser_angles)
+
+    def setMotion(self, linearSpeed, turnrate):
+        self.world.advance(self.clock.now())
+        self.world.setMotion(linearSpeed, turnrate)
+
+    def getLaser(self):
+        self.world.advance(self.clock.now())
+        return self.world.getLaser()
+
+    def _getPose(self):
+        self.world.advance(self.clock.now())
+        return self.world.getPose()
@@ -0,0 +1,120 @@
+"""
+Local simulator serving the Lokarria endpoints used by robot.Robot, so that Main.py and the tests can run
+without MRDS :
+    GET  /lokarria/localization
+    GET  /lokarria/laser/echoes
+    GET  /lokarria/laser/properties
+    POST /lokarria/differentialdrive
+
+The simulated time follows the wall clock, multiplied by the time scale.
+
+Usage: python3 SimServer.py [--image world.png --resolution 0.1 --origin x y] [--pose x y heading]
+                            [--port 50000] [--time-scale 1]
+Without an image, a generated warehouse (SimWorld.warehouse) is used.
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from SimWorld import SimWorld
+
+
+class SimHandler(BaseHTTPRequestHandler):
+    # keep-alive connections, answered without waiting for Nagle's algorithm
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def sendJson(self, content):
+        body = json.dumps(content).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.advance()
+            world = self.server.world
+            if self.path == '/lokarria/localization':
+                content = world.getPose()
+            elif self.path == '/lokarria/laser/echoes':
+                content = world.getLaser()
+            elif self.path == '/lokarria/laser/properties':
+                content = world.getLaserProperties()
+            else:
+                content = None
+        if content is None:
+            self.send_error(404)
+        else:
+            self.sendJson(content)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.path != '/lokarria/differentialdrive':
+            self.send_error(404)
+            return
+        try:
+            command = json.loads(body.decode())
+            linearSpeed = float(command['TargetLinearSpeed'])
+            angularSpeed = float(command['TargetAngularSpeed'])
+        except (ValueError, KeyError):
+            self.send_error(400)
+            return
+        with self.server.lock:
+            self.server.advance()
+            self.server.world.setMotion(linearSpeed, angularSpeed)
+        self.send_response(204)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+
+class SimServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, world, port=50000, timeScale=1):
+        super().__init__(('localhost', port), SimHandler)
+        self.world = world
+        self.timeScale = timeScale
+        self.lock = threading.Lock()
+        self.startTime = time.monotonic()
+
+    def advance(self):
+        """Brings the world to the current simulated time"""
+        self.world.advance((time.monotonic() - self.startTime) * self.timeScale)
+
+    def start(self):
+        """Serves in a background thread, returns the server"""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local Lokarria-compatible simulator')
+    parser.add_argument('--image', help='ground truth occupancy image (dark pixels are obstacles)')
+    parser.add_argument('--resolution', type=float, default=0.1, help='meters per pixel')
+    parser.add_argument('--origin', type=float, nargs=2, default=(0, 0), help='position of the bottom left corner')
+    parser.add_argument('--pose', type=float, nargs=3, default=(0, 0, 0), help='initial x y heading of the robot')
+    parser.add_argument('--port', type=int, default=50000)
+    parser.add_argument('--time-scale', type=float, default=1, help='simulated seconds per wall clock second')
+    args = parser.parse_args()
+
+    if args.image:
+        world = SimWorld.fromImage(args.image, args.resolution, tuple(args.origin), tuple(args.pose))
+    else:
+        world = SimWorld.warehouse(resolution=args.resolution, pose=tuple(args.pose))
+    server = SimServer(world, args.port, args.time_scale)
+    print("Simulator listening on http://localhost:%d" % args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Ground truth world of the simulator : an occupancy grid, a differential drive robot and a laser range finder
+behaving like the ones of the Lokarria interface
+"""
+
+import numpy as np
+from math import pi, cos, sin, floor, ceil
+from RayCasting import castRays
+
+
+class SimWorld:
+    def __init__(self, occupied, resolution, origin=(0, 0), pose=(0, 0, 0)):
+        """
+        :param occupied: boolean array, occupied[i][j] is True iff the square at
+        x = origin[0] + i * resolution, y = origin[1] + j * resolution is an obstacle
+        :param resolution: size of a square (meters)
+        :param origin: real position (x, y) of the corner of square (0, 0)
+        :param pose: initial (x, y, heading) of the robot
+        """
+        self.LASER_START_ANGLE = -3 * pi / 4
+        self.LASER_END_ANGLE = 3 * pi / 4
+        self.LASER_INCREMENT = pi / 180
+        self.LASER_MAX_RANGE = 40
+        self.ROBOT_RADIUS = 0.35
+        # integration step of the kinematics (seconds)
+        self.TIME_STEP = 0.05
+
+        self.occupied = np.asarray(occupied, dtype=bool)
+        self.resolution = resolution
+        self.origin = origin
+        self.x, self.y, self.heading = pose
+        self.linearSpeed = 0
+        self.angularSpeed = 0
+        self.time = 0
+        self.distanceTravelled = 0
+        self.collisions = 0
+        beamCount = int(round((self.LASER_END_ANGLE - self.LASER_START_ANGLE) / self.LASER_INCREMENT)) + 1
+        self.laserAngles = self.LASER_START_ANGLE + np.arange(beamCount) * self.LASER_INCREMENT
+        # squares covered by the robot, relative to the square of its center
+        radius = ceil(self.ROBOT_RADIUS / resolution)
+        offsets = np.mgrid[-radius:radius + 1, -radius:radius + 1].reshape(2, -1)
+        self.footprint = offsets[:, np.hypot(offsets[0], offsets[1]) * resolution <= self.ROBOT_RADIUS]
+
+    @staticmethod
+    def fromImage(path, resolution, origin=(0, 0), pose=(0, 0, 0)):
+        """
+        Loads the world from an image : dark pixels are obstacles, the top of the image is the largest y
+        """
+        from PIL import Image
+        image = np.asarray(Image.open(path).convert('L'))
+        return SimWorld((image < 128).T[:, ::-1], resolution, origin, pose)
+
+    @staticmethod
+    def warehouse(width=40, height=30, resolution=0.1, pose=(0, 0, 0)):
+        """
+        Builds a warehouse centered on (0, 0) : outer walls, an inner wall with doors and rows of racks
+        """
+        occupied = np.zeros((int(width / resolution), int(height / resolution)), dtype=bool)
+        wall = max(1, int(0.3 / resolution))
+        occupied[:wall, :] = occupied[-wall:, :] = True
+        occupied[:, :wall] = occupied[:, -wall:] = True
+        # inner wall at x = width / 4 with two doors
+        column = int(0.75 * occupied.shape[0])
+        occupied[column:column + wall, :] = True
+        for door in (0.25, 0.75):
+            center = int(door * occupied.shape[1])
+            occupied[column:column + wall, center - int(1 / resolution):center + int(1 / resolution)] = False
+        # racks : 1 m thick, separated by 3 m aisles, in the left part of the warehouse
+        for x in np.arange(3, 0.75 * width - 3, 4):
+            rows = slice(int(x / resolution), int((x + 1) / resolution))
+            occupied[rows, int(4 / resolution):int((height / 2 - 2) / resolution)] = True
+            occupied[rows, int((height / 2 + 2) / resolution):int((height - 4) / resolution)] = True
+        x, y, heading = pose
+        return SimWorld(occupied, resolution, (-width / 2, -height / 2), (x, y, heading))
+
+    def isColliding(self, x, y):
+        """
+        :return: True iff the robot would overlap an obstacle (or leave the world) at position (x, y)
+        """
+        row = floor((x - self.origin[0]) / self.resolution)
+        col = floor((y - self.origin[1]) / self.resolution)
+        rows, cols = self.footprint[0] + row, self.footprint[1] + col
+        if rows.min() < 0 or cols.min() < 0 or rows.max() >= self.occupied.shape[0] \
+                or cols.max() >= self.occupied.shape[1]:
+            return True
+        return self.occupied[rows, cols].any()
+
+    def setMotion(self, linearSpeed, angularSpeed):
+        self.linearSpeed = linearSpeed
+        self.angularSpeed = angularSpeed
+
+    def advance(self, time):
+        """
+        Integrates the differential drive kinematics up to the given time. The robot stops against obstacles
+        :param time: simulated time (seconds)
+        """
+        while self.time < time:
+            dt = min(self.TIME_STEP, time - self.time)
+            self.time += dt
+            heading = self.heading + self.angularSpeed * dt
+            if abs(self.angularSpeed) > 1e-9:
+                # exact arc of circle
+                radius = self.linearSpeed / self.angularSpeed
+                x = self.x + radius * (sin(heading) - sin(self.heading))
+                y = self.y - radius * (cos(heading) - cos(self.heading))
+            else:
+                x = self.x + self.linearSpeed * dt * cos(self.heading)
+                y = self.y + self.linearSpeed * dt * sin(self.heading)
+            self.heading = (heading + pi) % (2 * pi) - pi
+            if (x, y) != (self.x, self.y):
+                if self.isColliding(x, y):
+                    self.collisions += 1
+                    self.linearSpeed = 0
+                else:
+                    self.distanceTravelled += abs(self.linearSpeed) * dt
+                    self.x, self.y = x, y
+
+    def getEchoes(self):
+        """
+        :return: array of the distances measured by each laser beam
+        """
+        return castRays(self.occupied, self.resolution, (self.x - self.origin[0], self.y - self.origin[1]),
+                        self.laserAngles + self.heading, self.LASER_MAX_RANGE)
+
+    def getPose(self):
+        """
+        :return: the pose in the format of /lokarria/localization
+        """
+        return {'Pose': {'Position': {'X': self.x, 'Y': self.y, 'Z': 0.0},
+                         'Orientation': {'W': cos(self.heading / 2), 'X': 0.0, 'Y': 0.0, 'Z': sin(self.heading / 2)}},
+                'Status': 4, 'Timestamp': int(self.time * 1000)}
+
+    def getLaser(self):
+        """
+        :return: the scan in the format of /lokarria/laser/echoes
+        """
+        return {'Echoes': self.getEchoes().tolist(), 'Timestamp': int(self.time * 1000)}
+
+    def getLaserProperties(self):
+        """
+        :return: the properties in the format of /lokarria/laser/properties
+        """
+        return {'StartAngle': self.LASER_START_ANGLE, 'EndAngle': self.LASER_END_ANGLE,
+                'AngleIncrement': self.LASER_INCREMENT, 'Pose': self.getPose()['Pose']}
@@ -0,0 +1,188 @@
+"""
+Two-dimensional array stored as square tiles, allocated the first time something different from the fill value
+is written in them. The tiles can be memory-mapped files, so that a map much larger than the memory can be built.
+"""
+
+import os
+import numpy as np
+
+
+class TiledGrid:
+    """
+    Behaves like a 2D numpy array for indexing by a pair of integers, of slices (step 1) or of integer arrays,
+    and for np.asarray. Reading a rectangle (or squares) returns a new dense array, writing copies into the tiles
+    """
+    def __init__(self, shape, dtype, fill=0, tileSize=64, directory=None):
+        """
+        :param shape: (rows, cols)
+        :param dtype: type of the values
+        :param fill: value of the squares never written
+        :param tileSize: number of rows (and columns) of a tile
+        :param directory: if given, the tiles are memory-mapped files in this directory
+        """
+        self.TILE_SIZE = tileSize
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.fill = fill
+        self.directory = directory
+        self.ndim = 2
+        # (tile row, tile col) -> array of shape (TILE_SIZE, TILE_SIZE)
+        self.tiles = {}
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    @property
+    def size(self):
+        return self.shape[0] * self.shape[1]
+
+    def getAllocatedBytes(self):
+        """
+        :return: the memory (or file space) used by the allocated tiles
+        """
+        return len(self.tiles) * self.TILE_SIZE ** 2 * self.dtype.itemsize
+
+    def allocate(self, key):
+        """
+        :param key: (tile row, tile col)
+        :return: the tile, created (filled with the fill value) if needed
+        """
+        tile = self.tiles.get(key)
+        if tile is None:
+            shape = (self.TILE_SIZE, self.TILE_SIZE)
+            if self.directory is None:
+                tile = np.full(shape, self.fill, dtype=self.dtype)
+            else:
+                # the file name does not depend on the key, which changes when the grid grows
+                path = os.path.join(self.directory, '%d.tile' % len(self.tiles))
+                tile = np.memmap(path, dtype=self.dtype, mode='w+', shape=shape)
+                tile[:] = self.fill
+            self.tiles[key] = tile
+        return tile
+
+    def getRectangle(self, key):
+        """
+        Converts an index to a rectangle of the grid, like numpy does
+        :param key: a pair of integers or of slices
+        :return: (rowMin, rowMax, colMin, colMax), max excluded, and whether the index is a single square
+        """
+        if not isinstance(key, tuple) or len(key) != 2:
+            raise IndexError("a TiledGrid is indexed by a pair of integers or of slices")
+        bounds = []
+        for index, length in zip(key, self.shape):
+            if isinstance(index, slice):
+                start, stop, step = index.indices(length)
+                if step != 1:
+                    raise IndexError("slices of a TiledGrid must have a step of 1")
+                bounds += [start, max(start, stop)]
+            else:
+                index = int(index)
+                if not -length <= index < length:
+                    raise IndexError("index %d is out of bounds for size %d" % (index, length))
+                index %= length
+                bounds += [index, index + 1]
+        return tuple(bounds), not any(isinstance(index, slice) for index in key)
+
+    def getTiles(self, rectangle):
+        """
+        Iterates over the parts of the tiles covering a rectangle
+        :param rectangle: (rowMin, rowMax, colMin, colMax), max excluded
+        :return: generator of (key, slices in the tile, slices in the rectangle)
+        """
+        rowMin, rowMax, colMin, colMax = rectangle
+        size = self.TILE_SIZE
+        for tileRow in range(rowMin // size, (rowMax - 1) // size + 1):
+            rows = slice(max(rowMin, tileRow * size), min(rowMax, (tileRow + 1) * size))
+            for tileCol in range(colMin // size, (colMax - 1) // size + 1):
+                cols = slice(max(colMin, tileCol * size), min(colMax, (tileCol + 1) * size))
+                yield (tileRow, tileCol), \
+                    (slice(rows.start - tileRow * size, rows.stop - tileRow * size),
+                     slice(cols.start - tileCol * size, cols.stop - tileCol * size)), \
+                    (slice(rows.start - rowMin, rows.stop - rowMin), slice(cols.start - colMin, cols.stop - colMin))
+
+    def getPoints(self, key):
+        """
+        Groups scattered squares by tile
+        :param key: a pair of integer arrays (rows and columns of the squares)
+        :return: the rows and the columns (broadcast together, non negative), and a generator of
+        (key, rows in the tile, columns in the tile, indices of the squares in the flattened rows)
+        """
+        rows, cols = np.broadcast_arrays(*(np.asarray(index, dtype=np.int64) for index in key))
+        for index, length in zip((rows, cols), self.shape):
+            if index.size > 0 and (index.min() < -length or index.max() >= length):
+                raise IndexError("index is out of bounds for size %d" % length)
+        rows, cols = rows % self.shape[0], cols % self.shape[1]
+
+        def getGroups():
+            size = self.TILE_SIZE
+            tileRows, tileCols = rows.ravel() // size, cols.ravel() // size
+            tileIds = tileRows * (self.shape[1] // size + 1) + tileCols
+            order = np.argsort(tileIds, kind='stable')
+            starts = np.flatnonzero(np.diff(tileIds[order], prepend=-1))
+            for group in np.split(order, starts[1:]):
+                if len(group) > 0:
+                    yield (int(tileRows[group[0]]), int(tileCols[group[0]])), \
+                        rows.ravel()[group] % size, cols.ravel()[group] % size, group
+
+        return rows, cols, getGroups()
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple) and len(key) == 2 and all(isinstance(index, np.ndarray) for index in key):
+            rows, cols, groups = self.getPoints(key)
+            values = np.full(rows.size, self.fill, dtype=self.dtype)
+            for key, tileRows, tileCols, group in groups:
+                tile = self.tiles.get(key)
+                if tile is not None:
+                    values[group] = tile[tileRows, tileCols]
+            return values.reshape(rows.shape)
+        rectangle, isSquare = self.getRectangle(key)
+        if isSquare:
+            tile = self.tiles.get((rectangle[0] // self.TILE_SIZE, rectangle[2] // self.TILE_SIZE))
+            if tile is None:
+                return self.dtype.type(self.fill)
+            return tile[rectangle[0] % self.TILE_SIZE, rectangle[2] % self.TILE_SIZE]
+        values = np.full((rectangle[1] - rectangle[0], rectangle[3] - rectangle[2]), self.fill, dtype=self.dtype)
+        if values.size > 0:
+            for key, inTile, inRectangle in self.getTiles(rectangle):
+                tile = self.tiles.get(key)
+                if tile is not None:
+                    values[inRectangle] = tile[inTile]
+        return values
+
+    def __setitem__(self, key, values):
+        if isinstance(key, tuple) and len(key) == 2 and all(isinstance(index, np.ndarray) for index in key):
+            rows, cols, groups = self.getPoints(key)
+            values = np.broadcast_to(np.asarray(values, dtype=self.dtype), rows.shape).ravel()
+            for key, tileRows, tileCols, group in groups:
+                part = values[group]
+                if key not in self.tiles and (part == self.fill).all():
+                    continue
+                self.allocate(key)[tileRows, tileCols] = part
+            return
+        rectangle, isSquare = self.getRectangle(key)
+        shape = (rectangle[1] - rectangle[0], rectangle[3] - rectangle[2])
+        values = np.broadcast_to(np.asarray(values, dtype=self.dtype), shape)
+        if values.size == 0:
+            return
+        for key, inTile, inRectangle in self.getTiles(rectangle):
+            part = values[inRectangle]
+            if key not in self.tiles and (part == self.fill).all():
+                continue
+            self.allocate(key)[inTile] = part
+
+    def __array__(self, dtype=None, copy=None):
+        values = self[:, :]
+        return values if dtype is None else values.astype(dtype)
+
+    def grow(self, rowsBefore, rowsAfter, colsBefore, colsAfter):
+        """
+        Adds rows and columns around the grid, the squares are renumbered accordingly
+        :param rowsBefore: number of rows added before the first one, a multiple of TILE_SIZE
+        :param rowsAfter: number of rows added after the last one
+        :param colsBefore: number of columns added before the first one, a multiple of TILE_SIZE
+        :param colsAfter: number of columns added after the last one
+        """
+        if rowsBefore % self.TILE_SIZE or colsBefore % self.TILE_SIZE:
+            raise ValueError("a TiledGrid can only grow toward the negative indices by whole tiles")
+        shift = (rowsBefore // self.TILE_SIZE, colsBefore // self.TILE_SIZE)
+        self.tiles = {(row + shift[0], col + shift[1]): tile for (row, col), tile in self.tiles.items()}
+        self.shape = (self.shape[0] + rowsBefore + rowsAfter, self.shape[1] + colsBefore + colsAfter)
@@ -15,9 +15,10 @@ Updated by Ola Ringdahl 2019-11-21 Fixed some stuff for AI2
 
 
 import http.client, json, time
+import threading
+from collections import deque
 from math import sin, cos, pi, atan2
 import quaternion
-import sys
 
 HEADERS = {"Content-type": "application/json", "Accept": "text/json"}
 
@@ -25,16 +26,150 @@ HEADERS = {"Content-type": "application/json", "Accept": "text/json"}
 class UnexpectedResponse(Exception): pass
 
 
+class ConnectionFailed(Exception): pass
+
+
+class Session:
+    """
+    Keeps one persistent (keep-alive) connection per endpoint of the MRDS server.
+    A broken connection is reopened and the request sent again, instead of exiting.
+    The latency of the requests is measured for each endpoint.
+    """
+    def __init__(self, url, timeout=1, retries=1):
+        self.url = url
+        self.timeout = timeout
+        self.retries = retries
+        self.connections = {}
+        # endpoint -> [number of requests, total time, max time] (in seconds)
+        self.latencies = {}
+
+    def request(self, method, path, body=None, headers=None):
+        """Sends a request and reads the whole response, returns the status and the body"""
+        headers = {} if headers is None else dict(headers)
+        error = None
+        for _ in range(self.retries + 1):
+            connection = self.connections.get(path)
+            if connection is None:
+                connection = http.client.HTTPConnection(self.url, timeout=self.timeout)
+                self.connections[path] = connection
+            start = time.perf_counter()
+            try:
+                connection.request(method, path, body, headers)
+                response = connection.getresponse()
+                data = response.read()
+            except (http.client.HTTPException, OSError) as e:
+                error = e
+                connection.close()
+                del self.connections[path]
+                continue
+            self._recordLatency(path, time.perf_counter() - start)
+            return response.status, data
+        raise ConnectionFailed("%s %s failed: %s" % (method, path, error))
+
+    def _recordLatency(self, path, latency):
+        stats = self.latencies.setdefault(path, [0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += latency
+        stats[2] = max(stats[2], latency)
+
+    def getLatencies(self):
+        """Returns, for each endpoint, the number of requests and the mean and max latency in seconds"""
+        return {path: {'count': count, 'mean': total / count, 'max': maxLatency}
+                for path, (count, total, maxLatency) in self.latencies.items()}
+
+    def close(self):
+        for connection in self.connections.values():
+            connection.close()
+        self.connections = {}
+
+
+class Snapshot:
+    """
+    A pose and a laser scan read at the same moment, usable in place of a Robot by the code reading sensors
+    """
+    def __init__(self, timestamp, pose, laser, angles):
+        self.timestamp = timestamp
+        self.pose = pose
+        self.laser = laser
+        self.angles = angles
+
+    def getAngles(self):
+        return self.angles
+
+    def getHeading(self):
+        return quaternion.heading(self.pose['Pose']['Orientation'])
+
+    def getPosition(self):
+        return dict(self.pose['Pose']['Position'])
+
+    def getLaser(self):
+        return self.laser
+
+
 class Robot:
-    def __init__(self, url="http://localhost:50000"):
+    def __init__(self, url="http://localhost:50000", poseMaxAge=0):
+        """
+        poseMaxAge: a pose younger than this (in seconds) is reused instead of being requested again,
+        so that getPosition and getHeading can be served by a single request. 0 disables it.
+        """
         # HTTPConnection does not want to have http:// in the address apparently, so let's remove it:
         mrds_url = url[len("http://"):]
         self.url = mrds_url
+        self.session = Session(self.url)
+        self.poseMaxAge = poseMaxAge
+        self._pose = None
+        self._poseTime = 0
         self.laser_angles = self.getLaserAngles()
+        # background sampler, see startSampler
+        self.samples = None
+        self._sampler = None
+        self._stopSampling = threading.Event()
+        # last error met by the sampler thread (a failed or unexpected request), None if there was none
+        self.samplerError = None
 
     def getAngles(self):
         return self.laser_angles
 
+    def startSampler(self, rate=20, bufferSize=16, timeout=5):
+        """
+        Starts a thread polling the pose and the laser scan rate times per second into a ring buffer of
+        bufferSize timestamped samples. From then on getPosition, getHeading and getLaser return the latest
+        sample without waiting for the server. Blocks until the first sample is available (at most timeout seconds).
+        """
+        if self._sampler is not None:
+            return
+        self.samples = deque(maxlen=bufferSize)
+        self.samplerError = None
+        self._stopSampling.clear()
+        firstSample = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, args=(1 / rate, firstSample, self.samples),
+                                         daemon=True)
+        self._sampler.start()
+        if not firstSample.wait(timeout):
+            error = self.samplerError
+            self.stopSampler()
+            raise ConnectionFailed("no sample received in %s seconds: %s" % (timeout, error))
+
+    def stopSampler(self):
+        """Stops the sampler thread, sensors are read on demand again"""
+        if self._sampler is None:
+            return
+        # the thread is stopped before the buffer is dropped, it never writes to a buffer that is gone
+        self._stopSampling.set()
+        self._sampler.join()
+        self._sampler = None
+        self.samples = None
+
+    def getSnapshot(self):
+        """Returns a Snapshot: the latest sample if the sampler runs, else a pose and a scan requested now"""
+        if self._sampler is not None:
+            return self.samples[-1]
+        laser = self.getLaser()
+        status, poseData = self.session.request('GET', '/lokarria/localization')
+        if status != 200:
+            raise UnexpectedResponse(status)
+        return Snapshot(time.monotonic(), json.loads(poseData.decode()), laser, self.laser_angles)
+
     def getHeading(self):
         """Returns the heading angle, in radians, counterclockwise from the x-axis
         Note that the sign changes at pi radians, i.e. the heading goes from 0
@@ -47,7 +182,12 @@ class Robot:
     def getPosition(self):
         """Returns the XY position as a two-element list"""
         pose = self._getPose()
-        return pose['Pose']['Position']
+        return dict(pose['Pose']['Position'])
+
+    def getPose(self):
+        """Returns the position and the heading, read from the same pose"""
+        pose = self._getPose()
+        return dict(pose['Pose']['Position']), quaternion.heading(pose['Pose']['Orientation'])
 
     def setMotion(self, linearSpeed, turnrate):
         """ 
@@ -55,47 +195,25 @@ class Robot:
         command to the MRDS server
         speed is given in m/s, turn rate in radians/s
         """
-        mrds = http.client.HTTPConnection(self.url, timeout=1)
         params = json.dumps({'TargetLinearSpeed': linearSpeed, 'TargetAngularSpeed': turnrate})
-        try:
-            mrds.request('POST', '/lokarria/differentialdrive', params, HEADERS)            
-        except:
-            print("Connection refused")
-            sys.exit(-1)
-        response = mrds.getresponse()
-        status = response.status
-        # response.close()
-        if status == 204:
-            return response
-        else:
-            raise UnexpectedResponse(response)
-        pass
+        status, _ = self.session.request('POST', '/lokarria/differentialdrive', params, HEADERS)
+        if status != 204:
+            raise UnexpectedResponse(status)
 
     def getLaser(self):
         """Requests the current laser scan from the MRDS server and parses it into a dict"""
-        mrds = http.client.HTTPConnection(self.url, timeout=1)
-        try:
-            mrds.request('GET', '/lokarria/laser/echoes')
-        except:
-            print("Connection refused")
-            sys.exit(-1)        
-        response = mrds.getresponse()
-        if (response.status == 200):
-            laserData = response.read()
-            response.close()
+        if self._sampler is not None:
+            return self.samples[-1].laser
+        status, laserData = self.session.request('GET', '/lokarria/laser/echoes')
+        if status == 200:
             return json.loads(laserData.decode())
         else:
-            return response
-        pass
+            raise UnexpectedResponse(status)
 
     def getLaserAngles(self):
         """Requests the current laser properties from the MRDS server and parses it into a dict"""
-        mrds = http.client.HTTPConnection(self.url, timeout=1)
-        mrds.request('GET', '/lokarria/laser/properties')
-        response = mrds.getresponse()
-        if (response.status == 200):
-            laserData = response.read()
-            response.close()
+        status, laserData = self.session.request('GET', '/lokarria/laser/properties')
+        if status == 200:
             properties = json.loads(laserData.decode())
             beamCount = int((properties['EndAngle'] - properties['StartAngle']) / properties['AngleIncrement'])
             a = properties['StartAngle']  # +properties['AngleIncrement']
@@ -106,18 +224,45 @@ class Robot:
             # angles.append(properties['EndAngle']-properties['AngleIncrement']/2)
             return angles
         else:
-            raise UnexpectedResponse(response)
+            raise UnexpectedResponse(status)
+
+    def getLatencies(self):
+        """Returns the latency statistics of each endpoint (see Session.getLatencies)"""
+        return self.session.getLatencies()
 
     # Local methods, not usually used outside of this class    
     def _getPose(self):
         """Reads the current position and orientation from the MRDS"""
-        mrds = http.client.HTTPConnection(self.url, timeout=1)
-        mrds.request('GET', '/lokarria/localization')
-        response = mrds.getresponse()
-        if (response.status == 200):
-            poseData = response.read()
-            response.close()
-            return json.loads(poseData.decode())
+        if self._sampler is not None:
+            return self.samples[-1].pose
+        now = time.monotonic()
+        if self._pose is not None and now - self._poseTime < self.poseMaxAge:
+            return self._pose
+        status, poseData = self.session.request('GET', '/lokarria/localization')
+        if status == 200:
+            self._pose = json.loads(poseData.decode())
+            self._poseTime = now
+            return self._pose
         else:
-            return UnexpectedResponse(response)
-        pass
+            raise UnexpectedResponse(status)
+
+    def _sample(self, period, firstSample, samples):
+        """Body of the sampler thread, it uses its own connections and fills samples"""
+        session = Session(self.url)
+        while not self._stopSampling.is_set():
+            start = time.monotonic()
+            try:
+                laserStatus, laserData = session.request('GET', '/lokarria/laser/echoes')
+                poseStatus, poseData = session.request('GET', '/lokarria/localization')
+            except ConnectionFailed as e:
+                self.samplerError = e
+            else:
+                if laserStatus == 200 and poseStatus == 200:
+                    # the sample is dated between the two requests
+                    samples.append(Snapshot((start + time.monotonic()) / 2, json.loads(poseData.decode()),
+                                            json.loads(laserData.decode()), self.laser_angles))
+                    firstSample.set()
+                else:
+                    self.samplerError = UnexpectedResponse(laserStatus if laserStatus != 200 else poseStatus)
+            self._stopSampling.wait(max(0, period - (time.monotonic() - start)))
+        session.close()
@@ -1,7 +1,7 @@
-from PIL import Image
 import numpy as np
+import struct
 import time
-import threading
+import zlib
 
 """
 ShowMap creates a Gui for showing the progress of the created map and saves it to file every 5 second
@@ -11,7 +11,7 @@ Updated by Ola Ringdahl 2019-01-08 (fixed that the plot window hangs in Windows)
 """
 
 class ShowMap(object):
-    def __init__(self, gridHeight, gridWidth, showGUI):
+    def __init__(self, gridHeight, gridWidth, showGUI, maxFrameRate=10, mapName='map.png'):
         """
         Constructor for ShowMap
 
@@ -19,6 +19,9 @@ class ShowMap(object):
             param gridHeight the height of the grid (no. of rows)
             param gridWidth the width of the grid (no. of columns)
             param ShowGUI if true showing the map
+            param maxFrameRate the maximum number of renders per second, the updates arriving faster
+                  are skipped (None renders every update)
+            param mapName the name of the image file the map is saved to
         """
         import matplotlib
         if not showGUI:
@@ -26,14 +29,19 @@ class ShowMap(object):
         import matplotlib.pyplot as plt
 
         self.saveMapTime = 5.0
-        self.mapName = 'map.png'
+        self.mapName = mapName
         self.first = True
+        self.showGUI = showGUI
+        self.maxFrameRate = maxFrameRate
         self.__robot_size = 6
         self.__size = (gridHeight, gridWidth)
+        # last update, not rendered yet because of the frame rate limit
+        self.__pending = None
+        self.__last_render = None
+        self.__robot_position = None
 
         # create a grayscale image
-        data = np.ones(shape=self.__size)
-        self.__image = Image.fromarray(data * 0.5 * 255)
+        self.__pixels = np.full(self.__size, 127, dtype=np.uint8)
 
         # remove the toolbar from plot
         plt.rcParams['toolbar'] = 'None'
@@ -46,15 +54,29 @@ class ShowMap(object):
         self.__ax.set_xticks([])
         self.__ax.set_yticks([])
 
-        # Show image window
-        self.__implot = self.__ax.imshow(self.__image)
+        # Show image window. The image and the robot are animated : they are drawn over a saved background
+        # instead of redrawing the whole figure
+        self.__implot = self.__ax.imshow(self.__pixels, cmap='gray', vmin=0, vmax=255,
+                                         interpolation='nearest', animated=True)
+        self.__robot, = self.__ax.plot([], [], 'rs', markersize=self.__robot_size, animated=True)
+        self.__background = None
+        self.__fig.canvas.mpl_connect('draw_event', self.__onDraw)
 
         plt.show(block=False)
         self.__fig.canvas.draw()
 
-        saveMap(self.__fig, self.mapName)
+        saveMap(self.__pixels, self.mapName)
         self.start_time = time.time()
 
+    def __onDraw(self, event):
+        """ Saves the background (everything but the animated artists) after each full redraw """
+        self.__background = self.__fig.canvas.copy_from_bbox(self.__fig.bbox)
+        self.__drawAnimated()
+
+    def __drawAnimated(self):
+        self.__ax.draw_artist(self.__implot)
+        self.__ax.draw_artist(self.__robot)
+
     def updateMap(self, grid, maxValue, robot_row, robot_col):
         """
         Creates a new BufferedImage from a grid with integer values between 0 - maxVal,
@@ -67,55 +89,130 @@ class ShowMap(object):
             param robot_row is the current position of the robot in grid row
             param robot_col is the current position of the robot in grid column
         """
-        # convert grid to a numpy matrix
-        grid = np.matrix(grid)
-        # mapping the grid to an Image
-        for col in range(0, self.__size[1]):
-            for row in range(0, self.__size[0]):
-                value = grid[row, col]
-                # if value is <0 draw a gray pixel else mapping the value between 0 - 255
-                # where 0 is black and 255 is white
-                if value < 0:
-                    # set pixel value to gray
-                    self.__image.putpixel((col, row), 127)
-                else:
-                    # set pixel value
-                    self.__image.putpixel((col, row), abs(value * 255 / maxValue - 255))
-
-        # update the plot with new image
-        self.__ax.clear()
-        self.__implot = self.__ax.imshow(self.__image)
-
-        # remove the x and y tick in figure
-        self.__ax.set_xticks([])
-        self.__ax.set_yticks([])
-
-        # plot the robot pose
-        self.__ax.plot((robot_col), (robot_row), 'rs', markersize=self.__robot_size)
-
-        # draw new figure
-        self.__fig.canvas.draw()
+        now = time.time()
+        if self.maxFrameRate and self.__last_render is not None \
+                and now - self.__last_render < 1.0 / self.maxFrameRate:
+            # the display can't keep up : only the last update is rendered, by the next render or close()
+            self.__pending = (grid, maxValue, robot_row, robot_col)
+            return
+        self.__render(grid, maxValue, robot_row, robot_col)
+
+    def __render(self, grid, maxValue, robot_row, robot_col):
+        self.__pending = None
+        self.showPixels(getPixels(grid, maxValue), robot_row, robot_col)
+
+    def showPixels(self, pixels, robot_row, robot_col):
+        """
+        Shows a map already converted to gray levels (see getPixels), without frame rate limit
 
-        # Start a time that saves the image ever n seconds
+        Args:
+            param pixels is a uint8 array of the grid's shape
+            param robot_row is the current position of the robot in grid row
+            param robot_col is the current position of the robot in grid column
+        """
+        self.__last_render = time.time()
+        self.__pixels = pixels
+        self.__robot_position = (robot_row, robot_col)
+
+        # update the image and the robot pose in place
+        self.__implot.set_data(self.__pixels)
+        self.__robot.set_data([robot_col], [robot_row])
+
+        # draw them over the background
+        canvas = self.__fig.canvas
+        if self.__background is None:
+            canvas.draw()
+        else:
+            canvas.restore_region(self.__background)
+            self.__drawAnimated()
+            canvas.blit(self.__fig.bbox)
+
+        # Save the image ever n seconds
         elapsed_time = time.time() - self.start_time
         if elapsed_time >= self.saveMapTime:
-            self.t = threading.Thread(target=saveMap, args=(self.__fig, self.mapName,))
-            self.t.start()
+            saveMap(self.__pixels, self.mapName, self.__robot_position)
             self.start_time = time.time()
-        
-        # wait a bit while the figure is updated (avoids a freeze in Windows)
-        import matplotlib.pyplot as plt
-        plt.pause(0.01)
+
+        if self.showGUI:
+            # wait a bit while the figure is updated (avoids a freeze in Windows)
+            import matplotlib.pyplot as plt
+            plt.pause(0.01)
+
+    def processEvents(self):
+        """ Keeps the window responsive while there is nothing new to show """
+        if self.showGUI:
+            self.__fig.canvas.flush_events()
+
+    def getImage(self):
+        """ Returns the last rendered map as a grayscale PIL Image """
+        from PIL import Image
+        return Image.fromarray(self.__pixels)
 
     def close(self):
         """ Saves the last image before closing the application """
-        saveMap(self.__fig, self.mapName)
+        if self.__pending is not None:
+            self.__render(*self.__pending)
+        saveMap(self.__pixels, self.mapName, self.__robot_position)
         import matplotlib.pyplot as plt
-        plt.close()
-
-def saveMap(fig, mapName):
-    """ Saves the drawn Map to an Image """
-    data = np.fromstring(fig.canvas.tostring_rgb(), dtype=np.uint8, sep='')
-    data = data.reshape(fig.canvas.get_width_height()[::-1] + (3,))
-    img = Image.fromarray(data)
-    img.convert('RGB').save(mapName, 'PNG')
+        plt.close(self.__fig)
+
+
+def getPixels(grid, maxValue, out=None):
+    """
+    Maps the whole grid to gray levels : 0 is white, maxValue is black and negative values are gray
+
+    Args:
+        param grid is the grid (numpy matrix or a two-dimensional array)
+        param maxValue is the max value that is used in the grid
+        param out is an optional uint8 array of the grid's shape receiving the result
+    Returns:
+        a uint8 array of the grid's shape
+    """
+    grid = np.asarray(grid)
+    if out is None:
+        out = np.empty(grid.shape, dtype=np.uint8)
+    np.abs(grid * (255.0 / maxValue) - 255, out=out, casting='unsafe')
+    out[grid < 0] = 127
+    return out
+
+def saveMap(pixels, mapName, robotPosition=None):
+    """
+    Saves the map to a PNG image, straight from its gray levels
+
+    Args:
+        param pixels is a uint8 array of the grid's shape (see getPixels)
+        param mapName is the name of the image file
+        param robotPosition is the (row, col) of the robot, drawn as a red square
+    """
+    image = np.repeat(pixels[:, :, np.newaxis], 3, axis=2)
+    if robotPosition is not None:
+        row, col = robotPosition
+        image[max(0, row - 1):row + 2, max(0, col - 1):col + 2] = (255, 0, 0)
+    writePng(mapName, image)
+
+
+def writePng(path, pixels):
+    """
+    Writes an image to a PNG file, without PIL
+
+    Args:
+        param path is the name of the file
+        param pixels is a uint8 array, of shape (rows, cols) for a grayscale image or (rows, cols, 3) for RGB
+    """
+    pixels = np.ascontiguousarray(pixels, dtype=np.uint8)
+    height, width = pixels.shape[:2]
+    colorType = 2 if pixels.ndim == 3 else 0
+    # each row starts with its filter type, 0 (none)
+    rows = pixels.reshape(height, -1)
+    data = np.zeros((height, rows.shape[1] + 1), dtype=np.uint8)
+    data[:, 1:] = rows
+
+    def chunk(kind, content):
+        return struct.pack('>I', len(content)) + kind + content \
+            + struct.pack('>I', zlib.crc32(kind + content) & 0xffffffff)
+
+    with open(path, 'wb') as file:
+        file.write(b'\x89PNG\r\n\x1a\n')
+        file.write(chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, colorType, 0, 0, 0)))
+        file.write(chunk(b'IDAT', zlib.compress(data.tobytes(), 6)))
+        file.write(chunk(b'IEND', b''))
@@ -0,0 +1,94 @@
+import sys
+sys.path.append("../src/")
+import asyncio
+import numpy as np
+from AsyncRobot import AsyncRobot
+from AsyncExplorer import AsyncExplorer
+from Cartographer import Cartographer
+from Controller import Controller
+from MappingWorker import MappingWorker
+from Navigator import Navigator
+from Path import Path
+from PlanningModule import PlanningModule
+from SimServer import SimServer
+from SimWorld import SimWorld
+
+def startServer(world, timeScale=1):
+    """
+    :return: the server (on a free port) and its url
+    """
+    server = SimServer(world, 0, timeScale).start()
+    return server, "http://localhost:%d" % server.server_address[1]
+
+def buildExplorer(robot, xMin, xMax, yMin, yMax):
+    cartographer = Cartographer(xMin, xMax, yMin, yMax, -1)
+    controller = Controller(cartographer, mapper=MappingWorker(cartographer, background=False))
+    navigator = Navigator(controller, cartographer)
+    planningModule = PlanningModule(cartographer, navigator, controller)
+    return AsyncExplorer(robot, cartographer, planningModule, navigator, controller)
+
+async def checkAsyncRobot():
+    world = SimWorld(np.zeros((100, 100), dtype=bool), 0.1, (-5, -5), (1, 2, 0))
+    server, url = startServer(world)
+    robot = await AsyncRobot(url).connect()
+    try:
+        snapshot = await robot.getSnapshot()
+        assert abs(snapshot.getPosition()['X'] - 1) < 1e-6 and abs(snapshot.getPosition()['Y'] - 2) < 1e-6
+        assert len(snapshot.getLaser()['Echoes']) == len(robot.getAngles())
+        await robot.setMotion(1, 0)
+        await asyncio.sleep(0.3)
+        await robot.setMotion(0, 0)
+        assert (await robot.getPosition())['X'] > 1.1
+    finally:
+        await robot.close()
+        server.shutdown()
+
+async def checkStuck():
+    # the simulated time does not advance : the robot never moves, whatever the commands
+    world = SimWorld(np.zeros((200, 200), dtype=bool), 0.1, (-10, -10))
+    server, url = startServer(world, timeScale=0)
+    robot = await AsyncRobot(url).connect()
+    try:
+        explorer = buildExplorer(robot, -10, 10, -10, 10)
+        path = Path([{'X': 0, 'Y': 0}, {'X': 8, 'Y': 0}])
+        assert not await asyncio.wait_for(explorer.move(path, {'X': 8, 'Y': 0}), 10)
+        await explorer.waitForMap()
+    finally:
+        await robot.close()
+        server.shutdown()
+
+async def checkExplore():
+    world = SimWorld.warehouse(width=20, height=14)
+    server, url = startServer(world, timeScale=2)
+    robot = await AsyncRobot(url).connect()
+    try:
+        explorer = buildExplorer(robot, -10, 10, -7, 7)
+        try:
+            await asyncio.wait_for(explorer.run(), 15)
+        except asyncio.TimeoutError:
+            pass
+        await explorer.waitForMap()
+        carto = explorer.cartographer
+        assert world.distanceTravelled > 0
+        assert (carto.getStates() == carto.EMPTY).sum() > 1000
+    finally:
+        await robot.close()
+        server.shutdown()
+
+def testAsyncRobot():
+    asyncio.run(checkAsyncRobot())
+
+def testStuck():
+    asyncio.run(checkStuck())
+
+def testExplore():
+    asyncio.run(checkExplore())
+
+def passed():
+    print(__file__, '\x1b[6;30;42m' + 'Success!' + '\x1b[0m')
+
+if __name__ == "__main__":
+    testAsyncRobot()
+    testStuck()
+    testExplore()
+    passed()
@@ -0,0 +1,41 @@
+import sys
+sys.path.append("../src/")
+from Clock import VirtualClock, WallClock, Scheduler
+
+def testFixedRate():
+    clock = VirtualClock()
+    scheduler = Scheduler(clock, 0.1)
+    scheduler.start()
+    for i in range(10):
+        scheduler.wait()
+        assert abs(clock.now() - 0.1 * (i + 1)) < 1e-9
+    assert scheduler.getStatistics()['missed'] == 0
+
+def testMissedDeadlines():
+    clock = VirtualClock()
+    scheduler = Scheduler(clock, 0.1)
+    scheduler.start()
+    # a tick taking 0.25 sec misses the deadlines 0.1 and 0.2, the next tick is at 0.3
+    clock.sleep(0.25)
+    scheduler.wait()
+    assert abs(clock.now() - 0.3) < 1e-9
+    statistics = scheduler.getStatistics()
+    assert statistics['missed'] == 2 and statistics['ticks'] == 1
+
+def testJitter():
+    scheduler = Scheduler(WallClock(), 0.01)
+    scheduler.start()
+    for _ in range(20):
+        scheduler.wait()
+    statistics = scheduler.getStatistics()
+    assert statistics['ticks'] + statistics['missed'] >= 20
+    assert 0 <= statistics['meanJitter'] <= statistics['maxJitter']
+
+def passed():
+    print(__file__, '\x1b[6;30;42m' + 'Success!' + '\x1b[0m')
+
+if __name__ == "__main__":
+    testFixedRate()
+    testMissedDeadlines()
+    testJitter()
+    passed()
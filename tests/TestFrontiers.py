@@ -0,0 +1,44 @@
+import sys
+sys.path.append("../src/")
+from Cartographer import Cartographer
+from Frontiers import FrontierIndex, extractFrontiers
+from SimWorld import SimWorld
+from SimRobot import SimRobot
+import numpy as np
+
+def getFrontierSet(frontiers):
+    """
+    :return: a dictionary, squares of each frontier -> (size, median, centroid)
+    """
+    return {frozenset(frontiers.getSquares(index)):
+            (int(frontiers.sizes[index]), tuple(frontiers.medians[index].tolist()),
+             tuple(np.round(frontiers.centroids[index], 9).tolist()))
+            for index in range(len(frontiers))}
+
+def testIncrementalRefresh(tileSize=None):
+    np.random.seed(3)
+    world = SimWorld.warehouse(width=30, height=20)
+    robot = SimRobot(world)
+    cartographer = Cartographer(-15, 15, -10, 10, -1, tileSize)
+    frontierIndex = FrontierIndex(cartographer)
+    scans = 0
+    while scans < 15:
+        world.x, world.y = np.random.uniform(-13, 13), np.random.uniform(-8, 8)
+        world.heading = np.random.uniform(-np.pi, np.pi)
+        if world.isColliding(world.x, world.y):
+            continue
+        cartographer.update(robot)
+        scans += 1
+        frontierIndex.refresh()
+        expected = extractFrontiers(cartographer.getStates(), cartographer.EMPTY, cartographer.UNKNOWN)
+        assert getFrontierSet(frontierIndex.getFrontiers()) == getFrontierSet(expected)
+        labels = np.asarray(frontierIndex.getFrontiers().labels)
+        assert ((labels > 0) == (expected.labels > 0)).all()
+
+def passed():
+    print(__file__, '\x1b[6;30;42m' + 'Success!' + '\x1b[0m')
+
+if __name__ == "__main__":
+    testIncrementalRefresh()
+    testIncrementalRefresh(tileSize=16)
+    passed()
@@ -0,0 +1,66 @@
+import sys
+sys.path.append("../src/")
+from Cartographer import Cartographer
+from HierarchicalPlanner import HierarchicalPlanner
+from PathPlanner import findPath
+from math import hypot
+import numpy as np
+
+def getLength(start, path):
+    squares = [start] + path
+    return sum(hypot(s[0] - t[0], s[1] - t[1]) for s, t in zip(squares, squares[1:]))
+
+def testFindPath(seed):
+    np.random.seed(seed)
+    cartographer = Cartographer(-9, 9, -9, 9, -1)
+    cartographer.cspace[:, :] = np.random.random(cartographer.cspace.shape) < 0.2
+    planner = HierarchicalPlanner(cartographer, 8)
+    blocked = cartographer.getBlocked()
+    for _ in range(20):
+        start = tuple(np.random.randint(0, 60, 2))
+        goal = tuple(np.random.randint(0, 60, 2))
+        path = planner.findPath(start, goal)
+        shortest = findPath(blocked, start, goal)
+        assert (path is None) == (shortest is None)
+        if path is None:
+            continue
+        assert path[-1] == goal
+        squares = [start] + path
+        assert all(max(abs(s[0] - t[0]), abs(s[1] - t[1])) == 1 for s, t in zip(squares, squares[1:]))
+        assert not any(blocked[square] for square in path)
+        assert getLength(start, path) >= getLength(start, shortest) - 1e-6
+
+def testBlockedStart():
+    cartographer = Cartographer(-9, 9, -9, 9, -1)
+    planner = HierarchicalPlanner(cartographer, 8)
+    # the start is blocked, on the last row of its cluster, and walled in on its side of the border
+    cartographer.cspace[6:8, 11:14] = True
+    start, goal = (7, 12), (30, 40)
+    path = planner.findPath(start, goal)
+    # the only move allowed leaves the cluster
+    assert path is not None and path[0] == (8, 12)
+    assert path[-1] == goal and not any(cartographer.isBlocked(square) for square in path)
+    assert getLength(start, path) >= getLength(start, findPath(cartographer.getBlocked(), start, goal)) - 1e-6
+
+def testInvalidation():
+    cartographer = Cartographer(-9, 9, -9, 9, -1)
+    planner = HierarchicalPlanner(cartographer, 8)
+    assert len(planner.findPath((0, 30), (59, 30))) == 59
+    # a wall with a single door, in the middle of the map
+    for col in range(60):
+        if col != 5:
+            cartographer.setOccupied((30, col))
+    cartographer.cspace[:, :] = cartographer.getStates() == cartographer.OCCUPIED
+    path = planner.findPath((0, 30), (59, 30))
+    assert (30, 5) in path
+
+def passed():
+    print(__file__, '\x1b[6;30;42m' + 'Success!' + '\x1b[0m')
+
+if __name__ == "__main__":
+    # seeds where the start is blocked at the border of its cluster
+    for seed in (0, 45, 347):
+        testFindPath(seed)
+    testBlockedStart()
+    testInvalidation()
+    passed()
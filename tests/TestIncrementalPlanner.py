@@ -0,0 +1,57 @@
+import sys
+sys.path.append("../src/")
+from Cartographer import Cartographer
+from IncrementalPlanner import IncrementalPlanner
+from PathPlanner import findPath
+from math import hypot
+import numpy as np
+
+def getLength(start, path):
+    squares = [start] + path
+    return sum(hypot(s[0] - t[0], s[1] - t[1]) for s, t in zip(squares, squares[1:]))
+
+def checkPath(blocked, start, goal, path):
+    shortest = findPath(blocked, start, goal)
+    assert (path is None) == (shortest is None)
+    if path is None:
+        return
+    assert path[-1] == goal
+    squares = [start] + path
+    assert all(max(abs(s[0] - t[0]), abs(s[1] - t[1])) == 1 for s, t in zip(squares, squares[1:]))
+    assert not any(blocked[square] for square in path)
+    assert abs(getLength(start, path) - getLength(start, shortest)) < 1e-6
+
+def testRepair():
+    cartographer = Cartographer(-9, 9, -9, 9, -1)
+    cartographer.cspace[:, :] = np.random.random(cartographer.cspace.shape) < 0.2
+    planner = IncrementalPlanner(cartographer)
+    start, goal = (0, 0), (59, 59)
+    cartographer.cspace[start] = cartographer.cspace[goal] = False
+    checkPath(cartographer.getBlocked(), start, goal, planner.findPath(start, goal))
+    for _ in range(10):
+        # the robot moves along the path while obstacles appear and disappear
+        path = planner.findPath(start, goal)
+        if path is not None and len(path) > 5:
+            start = path[4]
+        window = tuple(np.sort(np.random.randint(0, 60, 2))) + tuple(np.sort(np.random.randint(0, 60, 2)))
+        rows, cols = slice(window[0], window[1] + 1), slice(window[2], window[3] + 1)
+        cartographer.cspace[rows, cols] = np.random.random(cartographer.cspace[rows, cols].shape) < 0.3
+        cartographer.cspace[start] = cartographer.cspace[goal] = False
+        cartographer.recordChange((window[0], window[1] + 1, window[2], window[3] + 1))
+        checkPath(cartographer.getBlocked(), start, goal, planner.findPath(start, goal))
+
+def testNewGoal():
+    cartographer = Cartographer(-9, 9, -9, 9, -1)
+    planner = IncrementalPlanner(cartographer)
+    assert len(planner.findPath((0, 30), (59, 30))) == 59
+    assert len(planner.findPath((0, 30), (0, 40))) == 10
+    assert planner.findPath((0, 30), (0, 30)) == [(0, 30)]
+
+def passed():
+    print(__file__, '\x1b[6;30;42m' + 'Success!' + '\x1b[0m')
+
+if __name__ == "__main__":
+    for _ in range(10):
+        testRepair()
+    testNewGoal()
+    passed()
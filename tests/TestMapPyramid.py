@@ -0,0 +1,43 @@
+import sys
+sys.path.append("../src/")
+from Cartographer import Cartographer
+from MapPyramid import MapPyramid
+from SimWorld import SimWorld
+from SimRobot import SimRobot
+import numpy as np
+
+def testIncrementalUpdate(tileSize=None):
+    world = SimWorld.warehouse(width=30, height=20)
+    robot = SimRobot(world)
+    # a tiled map starts smaller than the world and grows
+    cartographer = Cartographer(-15, 15, -10, 10, -1) if tileSize is None else \
+        Cartographer(-2, 2, -2, 2, -1, tileSize=tileSize)
+    for _ in range(10):
+        world.x, world.y = np.random.uniform(-13, 13), np.random.uniform(-8, 8)
+        world.heading = np.random.uniform(-np.pi, np.pi)
+        if world.isColliding(world.x, world.y):
+            continue
+        cartographer.update(robot)
+        for factor in cartographer.pyramid.FACTORS:
+            level = cartographer.pyramid.getLevel(factor)
+            expected = MapPyramid(cartographer).getLevel(factor)
+            assert (level.occupied == expected.occupied).all()
+            assert (level.unknown == expected.unknown).all()
+            assert (level.blocked == expected.blocked).all()
+
+def testReduction():
+    cartographer = Cartographer(-3, 3, -3, 3, -1)
+    cartographer.setOccupied((5, 6))
+    level = cartographer.pyramid.getLevel(4)
+    assert level.occupied.shape == (5, 5)
+    assert level.occupied[level.getSquare((5, 6))] and level.occupied.sum() == 1
+    assert level.unknown.all()
+
+def passed():
+    print(__file__, '\x1b[6;30;42m' + 'Success!' + '\x1b[0m')
+
+if __name__ == "__main__":
+    testIncrementalUpdate()
+    testIncrementalUpdate(tileSize=16)
+    testReduction()
+    passed()
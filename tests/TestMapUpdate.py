@@ -0,0 +1,70 @@
+import sys
+sys.path.append("../src/")
+from Cartographer import Cartographer
+from SimWorld import SimWorld
+from SimRobot import SimRobot
+from scipy import ndimage
+import numpy as np
+
+def scan(world, robot, cartographer, count):
+    """
+    Updates the cartographer from count random poses of the robot, yielding after each update
+    """
+    scans = 0
+    while scans < count:
+        world.x, world.y = np.random.uniform(-13, 13), np.random.uniform(-8, 8)
+        world.heading = np.random.uniform(-np.pi, np.pi)
+        if world.isColliding(world.x, world.y):
+            continue
+        cartographer.update(robot)
+        scans += 1
+        yield
+
+def testConfigurationSpace():
+    np.random.seed(5)
+    world = SimWorld.warehouse(width=30, height=20)
+    robot = SimRobot(world)
+    cartographer = Cartographer(-15, 15, -10, 10, -1)
+    for _ in scan(world, robot, cartographer, 15):
+        # an obstacle found by the navigator, next to the last scan
+        row, col = cartographer.getGridPosition(robot.getPosition())
+        cartographer.setOccupied((row + 3, col - 2))
+        # inflation of the whole map at once
+        free = cartographer.getStates() != cartographer.OCCUPIED
+        expected = ndimage.distance_transform_edt(free) * cartographer.CELL_SIZE < cartographer.INFLATION_RADIUS
+        assert (cartographer.getBlocked() == expected).all()
+
+def testStates():
+    np.random.seed(16)
+    world = SimWorld.warehouse(width=30, height=20)
+    robot = SimRobot(world)
+    dense = Cartographer(-15, 15, -10, 10, -1)
+    tiled = Cartographer(-15, 15, -10, 10, -1, tileSize=16)
+    for _ in scan(world, robot, dense, 15):
+        tiled.update(robot)
+        for cartographer in (dense, tiled):
+            values = np.asarray(cartographer.map)
+            assert values.dtype == np.uint8
+            assert values.min() >= cartographer.MINVALUE and values.max() <= cartographer.MAXVALUE
+            # thresholds applied to the whole map at once
+            expected = np.where(values < cartographer.EMPTY_THRESHOLD, cartographer.EMPTY,
+                                np.where(values > cartographer.OCCUPIED_THRESHOLD, cartographer.OCCUPIED,
+                                         cartographer.UNKNOWN))
+            assert (cartographer.getStates() == expected).all()
+            # every square seen is in the known window
+            rows, cols = np.nonzero(expected != cartographer.UNKNOWN)
+            window = cartographer.getKnownWindow([(rows[0], cols[0])], 0)
+            assert window[0] <= rows.min() and rows.max() < window[1]
+            assert window[2] <= cols.min() and cols.max() < window[3]
+        # the tiled map grew around the dense one
+        row = round((dense.xMin - tiled.xMin) / tiled.CELL_SIZE)
+        col = round((dense.yMin - tiled.yMin) / tiled.CELL_SIZE)
+        assert (tiled.map[row:row + dense.getWidth(), col:col + dense.getHeight()] == dense.map).all()
+
+def passed():
+    print(__file__, '\x1b[6;30;42m' + 'Success!' + '\x1b[0m')
+
+if __name__ == "__main__":
+    testConfigurationSpace()
+    testStates()
+    passed()
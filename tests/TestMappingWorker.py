@@ -0,0 +1,73 @@
+import sys
+sys.path.append("../src/")
+from Cartographer import Cartographer
+from Clock import VirtualClock
+from Controller import Controller
+from MappingWorker import MappingWorker
+from PlanningModule import PlanningModule
+from SimWorld import SimWorld
+from SimRobot import SimRobot
+import numpy as np
+
+def getSnapshots(count):
+    world = SimWorld.warehouse(width=30, height=20)
+    robot = SimRobot(world)
+    snapshots = []
+    while len(snapshots) < count:
+        world.x, world.y = np.random.uniform(-13, 13), np.random.uniform(-8, 8)
+        world.heading = np.random.uniform(-np.pi, np.pi)
+        if not world.isColliding(world.x, world.y):
+            snapshots.append(robot.getSnapshot())
+    return snapshots
+
+def testBackgroundMapping():
+    snapshots = getSnapshots(30)
+    expected = Cartographer(-15, 15, -10, 10, -1)
+    for snapshot in snapshots:
+        expected.update(snapshot)
+    cartographer = Cartographer(-15, 15, -10, 10, -1)
+    mapper = MappingWorker(cartographer)
+    mapper.start()
+    planningModule = PlanningModule(cartographer, None, None)
+    for snapshot in snapshots:
+        mapper.submit(snapshot)
+        # reading while the worker writes
+        planningModule.pickDestination(snapshot)
+    mapper.stop()
+    # every scan is integrated, in order
+    assert mapper.integrated == len(snapshots)
+    assert (cartographer.map == expected.map).all()
+    assert (cartographer.getBlocked() == expected.getBlocked()).all()
+
+def testError():
+    cartographer = Cartographer(-15, 15, -10, 10, -1)
+    mapper = MappingWorker(cartographer)
+    mapper.start()
+    # not a Snapshot
+    mapper.submit(object())
+    try:
+        mapper.flush()
+    except AttributeError:
+        pass
+    else:
+        assert False, "the error of the worker should be raised again"
+    mapper.stop()
+
+def testDefaultMapper():
+    cartographer = Cartographer(-15, 15, -10, 10, -1)
+    mapper = Controller(cartographer).mapper
+    # started in the background by default
+    assert mapper.background and mapper.thread is not None and mapper.thread.is_alive()
+    mapper.stop()
+    # scans integrated right away on a VirtualClock, the simulation stays deterministic
+    mapper = Controller(cartographer, VirtualClock()).mapper
+    assert not mapper.background and mapper.thread is None
+
+def passed():
+    print(__file__, '\x1b[6;30;42m' + 'Success!' + '\x1b[0m')
+
+if __name__ == "__main__":
+    testBackgroundMapping()
+    testError()
+    testDefaultMapper()
+    passed()
@@ -0,0 +1,54 @@
+import sys
+sys.path.append("../src/")
+from PathPlanner import findPath, simplifyPath
+from RayCasting import traceRays
+from Path import Path
+from math import hypot
+import numpy as np
+
+def testSimplifyPath():
+    blocked = np.random.random((60, 60)) < 0.2
+    start, goal = (0, 0), (59, 59)
+    blocked[start] = blocked[goal] = False
+    path = findPath(blocked, start, goal)
+    if path is None:
+        return
+    corners = simplifyPath(blocked, start, path)
+    assert corners[0] == start and corners[-1] == goal
+    assert len(corners) <= len(path) + 1
+    # every line between two kept squares only goes through free squares
+    for s, t in zip(corners, corners[1:]):
+        rows, cols, valid = traceRays(s, [t])
+        assert not blocked[rows[valid], cols[valid]][1:].any()
+
+def testStraightPath():
+    blocked = np.zeros((30, 30), dtype=bool)
+    path = [(i, i) for i in range(1, 20)]
+    assert simplifyPath(blocked, (0, 0), path) == [(0, 0), (19, 19)]
+
+def testLookahead():
+    path = Path([{'X': 0, 'Y': 0}, {'X': 4, 'Y': 0}, {'X': 4, 'Y': 4}])
+    assert path.getLength() == 8
+    point, first = path.getLookaheadPoint({'X': 1, 'Y': 0}, 2)
+    assert first == 0 and hypot(point['X'] - 3, point['Y']) < 1e-9
+    point, first = path.getLookaheadPoint({'X': 4, 'Y': 1}, 2, 1)
+    assert first == 1 and hypot(point['X'] - 4, point['Y'] - 3) < 1e-9
+    point, _ = path.getLookaheadPoint({'X': 4, 'Y': 3}, 2, 2)
+    assert point == path[-1]
+
+def testSection():
+    path = Path([{'X': 0, 'Y': 0}, {'X': 4, 'Y': 0}, {'X': 4, 'Y': 4}])
+    section = path.getSection(2, 6)
+    assert len(section) == 3 and section.getLength() == 4
+    assert section[0] == {'X': 2, 'Y': 0} and section[-1] == {'X': 4, 'Y': 2}
+
+def passed():
+    print(__file__, '\x1b[6;30;42m' + 'Success!' + '\x1b[0m')
+
+if __name__ == "__main__":
+    for _ in range(20):
+        testSimplifyPath()
+    testStraightPath()
+    testLookahead()
+    testSection()
+    passed()
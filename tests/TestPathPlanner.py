@@ -0,0 +1,113 @@
+import sys
+sys.path.append("../src/")
+from PathPlanner import findPath, getGridGraph, isInSight, DistanceField, GridGraph, ASTAR, DIJKSTRA
+from math import hypot
+import numpy as np
+
+def getLength(start, path):
+    squares = [start] + path
+    return sum(hypot(s[0] - t[0], s[1] - t[1]) for s, t in zip(squares, squares[1:]))
+
+def testFindPath():
+    blocked = np.random.random((60, 60)) < 0.25
+    start, goal = (0, 0), (59, 59)
+    blocked[start] = blocked[goal] = False
+    aStarPath = findPath(blocked, start, goal, ASTAR)
+    dijkstraPath = findPath(blocked, start, goal, DIJKSTRA)
+    if aStarPath is None:
+        assert dijkstraPath is None
+        return
+    assert aStarPath[-1] == goal
+    assert not any(blocked[square] for square in aStarPath)
+    assert abs(getLength(start, aStarPath) - getLength(start, dijkstraPath)) < 1e-6
+
+def testNoPath():
+    blocked = np.zeros((20, 20), dtype=bool)
+    blocked[10, :] = True
+    assert findPath(blocked, (0, 0), (19, 19)) is None
+
+def testDistanceField():
+    blocked = np.random.random((40, 50)) < 0.25
+    start = (20, 25)
+    blocked[start] = False
+    field = DistanceField(GridGraph(blocked), start)
+    goals = np.argwhere(~blocked)[::7]
+    costs = field.getCosts(goals)
+    for goal, cost in zip(map(tuple, goals.tolist()), costs):
+        path = findPath(blocked, start, goal, DIJKSTRA)
+        fieldPath = field.getPath(goal)
+        if path is None:
+            assert np.isinf(cost) and fieldPath is None
+            continue
+        assert fieldPath[-1] == goal
+        assert abs(getLength(start, fieldPath) - cost) < 1e-6
+        if goal != start:
+            assert abs(getLength(start, path) - cost) < 1e-6
+    assert field.getPath(tuple(np.argwhere(blocked)[0])) is None
+
+def testGridGraph():
+    blocked = np.random.random((40, 50)) < 0.25
+    graph = getGridGraph(blocked)
+    # no move from the blocked squares
+    assert not np.diff(graph.indptr)[blocked.ravel()].any()
+    # a graph of a window, updated in place, has the moves of a graph built again
+    window = (5, 35, 10, 45)
+    windowGraph = GridGraph(blocked[5:35, 10:45], window)
+    changed = np.random.random((6, 8)) < 0.5
+    blocked[12:18, 20:28] = changed
+    windowGraph.update((12, 18, 20, 28), changed)
+    assert np.array_equal(windowGraph.costs, GridGraph(blocked[5:35, 10:45], window).costs)
+    # with the same moves as getGridGraph
+    matrix = windowGraph.matrix
+    finite = np.isfinite(matrix.data)
+    sources = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+    expected = getGridGraph(blocked[5:35, 10:45]).tocoo()
+    assert set(zip(sources[finite].tolist(), matrix.indices[finite].tolist(), matrix.data[finite].tolist())) == \
+        set(zip(expected.row.tolist(), expected.col.tolist(), expected.data.tolist()))
+
+def testLimitedField():
+    blocked = np.random.random((60, 60)) < 0.2
+    start = (30, 30)
+    blocked[start] = False
+    graph = GridGraph(blocked)
+    targets = np.argwhere(~blocked)[::11]
+    costs = DistanceField(graph, start).getCosts(targets)
+    field = DistanceField(graph, start, targets, 5)
+    limitedCosts = field.getCosts(targets)
+    # the 5 closest targets are reached, with the same costs
+    closest = np.argsort(costs, kind='stable')[:5]
+    assert np.allclose(limitedCosts[closest], costs[closest])
+    reached = limitedCosts < np.inf
+    assert np.allclose(limitedCosts[reached], costs[reached])
+
+def testBlockedStart():
+    blocked = np.zeros((20, 20), dtype=bool)
+    blocked[5:8, 5:7] = True
+    start, goal = (6, 6), (15, 15)
+    path = DistanceField(GridGraph(blocked), start).getPath(goal)
+    assert path is not None and path[-1] == goal
+    assert abs(getLength(start, path) - getLength(start, findPath(blocked, start, goal))) < 1e-6
+
+def testBlockedOrigin():
+    blocked = np.zeros((10, 10), dtype=bool)
+    blocked[2, 2] = True
+    # the origin is not checked, whichever the direction of the first step
+    assert isInSight(blocked, (2, 2), np.array([(2, 6), (6, 2), (6, 6)])).all()
+    # the corners of the diagonal steps are
+    blocked[5, 6] = True
+    assert isInSight(blocked, (2, 2), np.array([(2, 6), (6, 2), (6, 6)])).tolist() == [True, True, False]
+
+def passed():
+    print(__file__, '\x1b[6;30;42m' + 'Success!' + '\x1b[0m')
+
+if __name__ == "__main__":
+    for _ in range(20):
+        testFindPath()
+    testNoPath()
+    for _ in range(5):
+        testDistanceField()
+        testGridGraph()
+        testLimitedField()
+    testBlockedStart()
+    testBlockedOrigin()
+    passed()
@@ -7,7 +7,11 @@ from robot import Robot
 from PlanningModule import PlanningModule
 from Navigator import Navigator
 from Controller import Controller
+from Clock import VirtualClock
+from SimWorld import SimWorld
+from SimRobot import SimRobot
 from matplotlib import pyplot as plt
+import numpy as np
 
 
 def testPlanningModule():
@@ -29,8 +33,31 @@ def testPlanningModule():
     plt.plot(pos[1], pos[0], 'rs', markersize=6)
     plt.show()
 
+class SlowClock(VirtualClock):
+    """A clock on which every reading takes one second"""
+    def now(self):
+        self.time += 1
+        return self.time
+
+def testScoringTime():
+    world = SimWorld.warehouse(width=30, height=20)
+    cartographer = Cartographer(-15, 15, -10, 10, -1)
+    cartographer.update(SimRobot(world))
+    empty = np.array(np.nonzero(cartographer.getStates() == cartographer.EMPTY)).T
+    squares = empty[np.linspace(0, len(empty) - 1, 64).astype(int)]
+    # a VirtualClock does not advance while computing : every square is estimated, whatever the speed of the CPU
+    planningModule = PlanningModule(cartographer, None, Controller(cartographer, VirtualClock()))
+    gains = planningModule.getInformationGains(squares)
+    assert (gains > 0).any()
+    # the budget is over after the first batch
+    planningModule = PlanningModule(cartographer, None, Controller(cartographer, SlowClock()))
+    slowGains = planningModule.getInformationGains(squares)
+    batch = planningModule.SCORING_BATCH
+    assert (slowGains[:batch] == gains[:batch]).all() and (slowGains[batch:] == 0).all()
+
 def passed():
     print(__file__, '\x1b[6;30;42m' + 'Success!' + '\x1b[0m')
 
 if __name__ == "__main__":
-    testPlanningModule()
\ No newline at end of file
+    testPlanningModule()
+    testScoringTime()
\ No newline at end of file
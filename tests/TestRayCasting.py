@@ -0,0 +1,38 @@
+import sys
+sys.path.append("../src/")
+from RayCasting import traceRays, countVisible
+from Computations import pathToObstacle
+import numpy as np
+import random
+
+def testTraceRays():
+    origin = (random.randint(-20, 20), random.randint(-20, 20))
+    ends = np.random.randint(-40, 40, size=(100, 2))
+    rows, cols, valid = traceRays(origin, ends)
+    for i, end in enumerate(ends):
+        path = list(zip(rows[i][valid[i]], cols[i][valid[i]]))
+        assert path == pathToObstacle(origin, end)
+
+def testCountVisible():
+    opaque = np.zeros((41, 41), dtype=bool)
+    counted = np.ones((41, 41), dtype=bool)
+    origins = np.array([[20, 20], [0, 0]])
+    gains = countVisible(opaque, counted, origins, 10)
+    # every square is counted once, the rays stay in a disc
+    assert gains[0] <= np.pi * 11 ** 2 and gains[1] < gains[0]
+    # the wall is seen, not what is behind it
+    opaque[:, 25] = True
+    behind = np.zeros_like(counted)
+    behind[:, 25:] = True
+    assert 0 < countVisible(opaque, behind, origins[:1], 10)[0] <= 21
+    assert countVisible(opaque, behind & ~opaque, origins, 10).tolist() == [0, 0]
+    # the rays stop at the first counted square
+    assert countVisible(opaque, counted, origins, 10, maxCounted=1).tolist() == [1, 1]
+
+def passed():
+    print(__file__, '\x1b[6;30;42m' + 'Success!' + '\x1b[0m')
+
+if __name__ == "__main__":
+    testTraceRays()
+    testCountVisible()
+    passed()
@@ -0,0 +1,29 @@
+import sys
+sys.path.append("../src/")
+from SimWorld import SimWorld
+import numpy as np
+
+def testEchoes():
+    occupied = np.zeros((100, 100), dtype=bool)
+    occupied[80, :] = True
+    world = SimWorld(occupied, 0.1, (-5, -5), (0, 0, 0))
+    echoes = world.getEchoes()
+    # the beam straight ahead hits the wall at x = 3
+    assert abs(echoes[len(echoes) // 2] - 3) <= world.resolution
+
+def testCollision():
+    occupied = np.zeros((100, 100), dtype=bool)
+    occupied[80, :] = True
+    world = SimWorld(occupied, 0.1, (-5, -5), (0, 0, 0))
+    world.setMotion(1, 0)
+    world.advance(10)
+    assert world.x < 3 - world.ROBOT_RADIUS + world.resolution
+    assert world.collisions > 0
+
+def passed():
+    print(__file__, '\x1b[6;30;42m' + 'Success!' + '\x1b[0m')
+
+if __name__ == "__main__":
+    testEchoes()
+    testCollision()
+    passed()
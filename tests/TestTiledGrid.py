@@ -0,0 +1,63 @@
+import sys
+sys.path.append("../src/")
+from TiledGrid import TiledGrid
+import numpy as np
+import tempfile
+
+def testSlicing(directory=None):
+    dense = np.full((100, 70), 7, dtype=np.uint8)
+    tiled = TiledGrid(dense.shape, np.uint8, 7, 16, directory)
+    for _ in range(50):
+        rowMin, colMin = np.random.randint(0, 100), np.random.randint(0, 70)
+        rows = slice(rowMin, rowMin + np.random.randint(0, 30))
+        cols = slice(colMin, colMin + np.random.randint(0, 30))
+        values = np.random.randint(0, 16, dense[rows, cols].shape)
+        dense[rows, cols] = values
+        tiled[rows, cols] = values
+        assert (tiled[rows, cols] == dense[rows, cols]).all()
+    dense[-1, 3] = tiled[-1, 3] = 15
+    assert tiled[-1, 3] == 15 and tiled[42, 17] == dense[42, 17]
+    assert (np.asarray(tiled) == dense).all()
+
+def testPoints():
+    dense = np.full((100, 70), -1, dtype=np.int32)
+    tiled = TiledGrid(dense.shape, np.int32, -1, 16)
+    for _ in range(20):
+        rows, cols = np.random.randint(0, 100, 40), np.random.randint(0, 70, 40)
+        values = np.random.randint(0, 1000, 40)
+        # a square given twice keeps the last value, like numpy
+        dense[rows, cols] = values
+        tiled[rows, cols] = values
+        assert (tiled[rows, cols] == dense[rows, cols]).all()
+    assert (np.asarray(tiled) == dense).all()
+    assert tiled[np.array([-1]), np.array([0])] == dense[-1, 0]
+    tiled[np.array([], dtype=int), np.array([], dtype=int)] = 3
+    tiled = TiledGrid((64, 64), bool, False, 16)
+    tiled[np.array([1, 2]), np.array([3, 4])] = False
+    assert tiled.getAllocatedBytes() == 0
+
+def testLazyAllocation():
+    tiled = TiledGrid((1000, 1000), bool, False, 64)
+    tiled[:, :] = False
+    assert tiled.getAllocatedBytes() == 0
+    tiled[500, 500] = True
+    assert len(tiled.tiles) == 1 and tiled[500, 500] and not tiled[499, 500]
+
+def testGrow():
+    tiled = TiledGrid((40, 40), np.int8, -1, 16)
+    tiled[3, 5] = 1
+    tiled.grow(32, 10, 16, 0)
+    assert tiled.shape == (82, 56)
+    assert tiled[35, 21] == 1 and tiled[3, 5] == -1
+
+def passed():
+    print(__file__, '\x1b[6;30;42m' + 'Success!' + '\x1b[0m')
+
+if __name__ == "__main__":
+    testSlicing()
+    with tempfile.TemporaryDirectory() as directory:
+        testSlicing(directory)
+    testPoints()
+    testLazyAllocation()
+    testGrow()
+    passed()
@@ -1,3 +1,16 @@
 python3 TestCartographer.py
 python3 TestNavigator.py
 python3 TestPlanningModule.py
+python3 TestRayCasting.py
+python3 TestPathPlanner.py
+python3 TestSimWorld.py
+python3 TestTiledGrid.py
+python3 TestMapPyramid.py
+python3 TestHierarchicalPlanner.py
+python3 TestPath.py
+python3 TestClock.py
+python3 TestMappingWorker.py
+python3 TestIncrementalPlanner.py
+python3 TestFrontiers.py
+python3 TestMapUpdate.py
+python3 TestAsyncExplorer.py